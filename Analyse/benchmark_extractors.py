@@ -0,0 +1,255 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmarks of the extractors of process_funct, on a result file or, without argument, on a 
+synthetic full-year result:
+
+    python benchmark_extractors.py [path of the result] [variable ...]
+"""
+
+import os
+import sys
+import time
+import numpy as np
+from termcolor import colored
+
+project_root = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.append(os.path.join(project_root, 'Modules'))
+
+import GBOML_function as gf
+import process_funct as pf
+
+
+def synthetic_result(clusters=6, nodes=10, hours=8760, seed=0):
+    # Result dictionary with clusters x nodes sub nodes producing "electricity" each hour
+    rng = np.random.default_rng(seed)
+    elements, model_nodes = {}, {}
+    for c in range(clusters):
+        sub_elements, sub_nodes = {}, {}
+        for n in range(nodes):
+            sub_elements[f"NODE_{n}"] = {"variables": {"electricity": {"values": rng.random(hours).tolist()},
+                                                       "new_capacity": {"values": [float(rng.random())]}},
+                                         "objectives": {"named": {"capex": float(rng.random()), "opex": float(rng.random())}}}
+            sub_nodes[f"NODE_{n}"] = {"parameters": {"pre_installed_capacity": [1.0], "max_capacity": [10.0]}}
+        elements[f"CLUSTER_{c}"] = {"sub_elements": sub_elements, "variables": {}}
+        model_nodes[f"CLUSTER_{c}"] = {"sub_nodes": sub_nodes, "variables": {}, "parameters": {}}
+    return {"solution": {"elements": elements}, "model": {"nodes": model_nodes, "global_parameters": {}}}
+
+
+def _best_time(function, repeat, *args, **kwargs):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        value = function(*args, **kwargs)
+        best = min(best, time.perf_counter() - start)
+    return best, value
+
+
+#%% get_all_from_variable_and_parameter: single pass against the former loop
+
+def get_all_from_variable_and_parameter_loop(dictionary, variable=None, parameter=None, to_print='no', cluster=None, global_parameter=None): 
+    # Former implementation of pf.get_all_from_variable_and_parameter (one capacity call 
+    # per node and variable), kept here as the reference of the benchmark
+    if cluster is None:
+        cluster = pf.get_all_cluster_names(dictionary)
+
+    var = {} 
+    cap = {} 
+    par = {}
+    glob_par = {}
+    objective = {} 
+    cost = {}
+    prod = {}
+
+    if variable is not None:
+        for v in variable: 
+            for clust in cluster: 
+                if clust not in var:
+                    var[clust] = {}
+                    cap[clust] = {}
+                    cost[clust] = {}
+                    prod[clust] = {}
+
+                var[clust][v] = {}
+                cap[clust][v] = {}
+                prod[clust][v] = {}
+
+                try:
+                    nodes = pf.get_cluster_subnodes_names_from_variable(variable=v, cluster=clust, dictionary=dictionary)
+                except:
+                    try:
+                        cluster_data = pf.get_cluster_variable(node=clust, variable=v, dictionary=dictionary)
+                        try:
+                            var[clust][v] = cluster_data['values']
+                        except:
+                            var[clust][v] = cluster_data
+                    except:
+                        continue
+
+                if not nodes:
+                    continue
+
+                for node in nodes:
+                    try:
+                        if "sub_elements" not in dictionary["solution"]["elements"].get(clust, {}): 
+                            continue  
+
+                        # Capacités
+                        cluster_cap_data = {}
+                        not_given = False
+
+                        try:
+                            cap_result = pf.get_cluster_subnodes_capacities_from_nodes(nodes=[node], cluster=clust, dictionary=dictionary)
+                            cluster_cap_data = cap_result
+                            values = list(cap_result.values())
+                            if values and isinstance(values[0], dict) and values[0].get("Max capacity", '') == 'Not given':
+                                not_given = True
+                        except:
+                            not_given = True
+
+                        if not_given:
+                            try:
+                                cluster_cap_data = pf.get_cluster_subnodes_capacities_from_storage(nodes=[node], cluster=clust, dictionary=dictionary)
+                            except:
+                                cluster_cap_data = {}
+
+                        cap[clust][v].update(cluster_cap_data)
+
+                        # Objectif
+                        if clust not in objective:
+                            objective[clust] = {}
+
+                        try:
+                            obj_data = dictionary["solution"]["elements"][clust]["sub_elements"][node]["objectives"]
+                            obj_values = obj_data.get("named", obj_data).values()
+                            objective_sum = sum(val for val in obj_values if isinstance(val, (int, float)))
+                            objective[clust][node] = objective_sum
+                        except:
+                            objective_sum = 0
+
+                        # Production
+                        prod_val = 0
+                        try:
+                            var_entry = dictionary["solution"]["elements"][clust]["sub_elements"][node]["variables"].get(v, None)
+                            if var_entry is not None:
+                                if isinstance(var_entry, dict):
+                                    var_data = var_entry.get('values', [])
+                                else:
+                                    var_data = var_entry
+                                prod_val = sum(var_data) if isinstance(var_data, list) else var_data
+                                prod[clust][v][node] = prod_val / 1000
+                        except Exception as e:
+                            prod[clust][v][node] = 0
+                            print(f"Error computing prod for {clust}-{node}: {e}")
+                            continue
+
+                        # Coût
+                        try:
+                            cost[clust][node] = (objective_sum * 1000 / prod_val) if prod_val > 0 else 0
+                        except Exception as e:
+                            cost[clust][node] = 0
+                            print(f"Error computing cost for {clust}-{node}: {e}")
+
+                    except KeyError as e:
+                        print(f"KeyError in cluster {clust} for node {node}: {e}")
+                        continue  
+
+                # Variable globale (hors sous-nœuds)
+                try:
+                    cluster_data = pf.get_timeseries_dict(dictionary, variable=v, cluster=clust)
+                    if cluster_data:
+                        if 'PRODUCTION' in cluster_data:
+                            try:
+                                special_data = pf.get_cluster_variable(node=clust, variable=v, dictionary=dictionary)
+                                var[clust][v] = special_data['values']
+                            except:
+                                pass
+                        else:
+                            var[clust][v] = cluster_data
+                except:
+                    try:
+                        special_data = pf.get_cluster_variable(node=clust, variable=v, dictionary=dictionary)
+                        if 'values' in special_data:
+                            var[clust][v] = special_data['values']
+                    except:
+                        continue
+
+    if parameter is not None:
+        for p in parameter:
+            for clust in cluster:
+                if clust not in par:
+                    par[clust] = {}
+
+                try:
+                    cluster_data = pf.get_timeseries_dict(dictionary, parameter=p, cluster=clust)
+                    if cluster_data:
+                        par[clust][p] = cluster_data
+                except:
+                    continue
+
+    if global_parameter is not None:
+        for gp in global_parameter:
+            try:
+                data = pf.get_timeseries_of_global_parameters(dictionary, gp)
+                glob_par[gp] = data
+            except:
+                continue 
+
+    return {
+        'variables': var,
+        'objectives': objective,
+        'prod': prod,
+        'cost': cost,
+        'capacities': cap,
+        'parameters': par,
+        'global_parameters': glob_par,
+    }
+
+
+def benchmark_get_all_from_variable_and_parameter(dictionary, variable, parameter=None, global_parameter=None, repeat=3):
+    # Compare the time of the single pass version with the former loop version and check 
+    # that they give the same outputs
+    times, results = {}, {}
+    for name, function in (("loop", get_all_from_variable_and_parameter_loop), ("single pass", pf.get_all_from_variable_and_parameter.__wrapped__)):
+        times[name], results[name] = _best_time(function, repeat, dictionary, variable=variable, parameter=parameter, 
+                                                global_parameter=global_parameter)
+    
+    same = all(results["loop"][k] == results["single pass"][k] for k in results["loop"])
+    print(f"Loop version        : {times['loop']:.3f} s")
+    print(f"Single pass version : {times['single pass']:.3f} s")
+    print(f"Speedup             : x{times['loop'] / max(times['single pass'], 1e-12):.1f}")
+    print(colored("✅ Same results", 'green') if same else colored("⚠️ Results differ", 'red'))
+    return times
+
+
+#%% Memoization: a hit must be faster than a plain call
+
+def benchmark_memoization(dictionary, variable, repeat=5):
+    # Plain call, first call (miss: computed and stored) and repeated calls (hits) of 
+    # pf.get_all_from_variable_and_parameter with the memo enabled
+    enabled = pf.EXTRACTOR_MEMO.enabled
+    pf.disable_memoization()
+    plain, _ = _best_time(pf.get_all_from_variable_and_parameter, repeat, dictionary, variable=variable)
+    pf.enable_memoization()
+    miss, _ = _best_time(pf.get_all_from_variable_and_parameter, 1, dictionary, variable=variable)
+    hit, _ = _best_time(pf.get_all_from_variable_and_parameter, repeat, dictionary, variable=variable)
+    print(f"Plain call  : {plain:.4f} s")
+    print(f"Cache miss  : {miss:.4f} s")
+    print(f"Cache hit   : {hit:.4f} s ({pf.EXTRACTOR_MEMO.total_bytes / 1024**2:.1f} MB cached)")
+    print(colored("✅ A hit is faster than a plain call", 'green') if hit < plain 
+          else colored("⚠️ A hit is not faster than a plain call", 'red'))
+    if enabled != 'yes':
+        pf.disable_memoization()
+    return {"plain": plain, "miss": miss, "hit": hit}
+
+
+#%% Main
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        result = gf.load_result(sys.argv[1])
+        variables = sys.argv[2:] or ["electricity"]
+    else:
+        result = synthetic_result()
+        variables = ["electricity"]
+    benchmark_get_all_from_variable_and_parameter(result, variables)
+    benchmark_memoization(result, variables)
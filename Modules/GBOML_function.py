@@ -14,24 +14,46 @@ from termcolor import colored
 from gboml import GbomlGraph
 from gboml.compiler.classes import Expression 
 import argparse 
+from fnmatch import fnmatchcase
+import hashlib
+import mmap
+import pickle
+import sqlite3
 
 
 #%% Function to load a JSON file and convert into a usefull dictionnary
 class MakeMeReadable:
-    def __init__(self, d):
+    # The child wrappers and the arrays are created once, on the first access, and kept in 
+    # _cache. With as_array = 'yes' the lists of numbers (values, time series parameters) are 
+    # given as numpy arrays (default 'no': the python lists, as before)
+    __slots__ = ("d", "as_array", "_cache", "__weakref__") # __weakref__: memoization keys
+    
+    def __init__(self, d, as_array='no'):
         self.d = d
+        self.as_array = as_array
+        self._cache = {}
    
     def __dir__(self):
         return self.d.keys()
    
     def __getattr__(self, v):
+        if v in MakeMeReadable.__slots__: # Not initialized yet (copy, pickle)
+            raise AttributeError(v)
+        cache = self._cache
+        if v in cache:
+            return cache[v]
         try:
             out = self.d[v]
-            if isinstance(out, dict):
-                return MakeMeReadable(out)
-            return out
-        except:
+        except (KeyError, TypeError, IndexError): # not a key: attribute of the dict / list
             return getattr(self.d, v)
+        if isinstance(out, dict):
+            out = MakeMeReadable(out, self.as_array)
+        elif self.as_array == 'yes' and _is_numeric_series(out):
+            out = np.asarray(out, dtype=float)
+        else:
+            return out
+        cache[v] = out
+        return out
        
     def __str__(self):
         return str(self.d)
@@ -84,7 +106,12 @@ def transform_makemereadable_into_dict(obj):
 
 #%% Function to load data and solve the model
 
-def load_data_and_solve(VECTOR, TIME_HORIZON, result_path): # Has a several vectors in list format and time horizon in hours (default is 8760)
+def load_data_and_solve(VECTOR, TIME_HORIZON, result_path, store_format="json", export_profile=None): # Has a several vectors in list format and time horizon in hours (default is 8760)
+    # store_format : 'json', 'h5' (columnar result store) or 'both'
+    # export_profile : what is written, see EXPORT_PROFILES (None = everything)
+    
+    if store_format not in ("json", "h5", "both"):
+        raise ValueError("store_format must be 'json', 'h5' or 'both'")
     
     vector_path = []
     
@@ -121,6 +148,7 @@ def load_data_and_solve(VECTOR, TIME_HORIZON, result_path): # Has a several vect
             
         
         dico = gboml_model.turn_solution_to_dictionary(solver_info, status, solution, objective, constraints_information, variables_information) # Turn the solution into a dictionary
+        dico = filter_result_dictionary(dico, export_profile) # Keep only what the export profile asks
         
         print("Json done\n")
         
@@ -140,11 +168,17 @@ def load_data_and_solve(VECTOR, TIME_HORIZON, result_path): # Has a several vect
                 
                 
         full_path = os.path.join(vector_dir, output_file_path) 
-        vector_path.append(full_path)
         
-        with open(full_path, "w") as json_file:
-            json_obj = json.dumps(dico)
-            json_file.write(json_obj)
+        if store_format in ("json", "both"):
+            with open(full_path, "w") as json_file:
+                json_obj = json.dumps(dico)
+                json_file.write(json_obj)
+            vector_path.append(full_path)
+                
+        if store_format in ("h5", "both"):
+            store_path = write_result_store(dico, full_path.replace(".json", ".h5"))
+            if store_format == "h5":
+                vector_path.append(store_path)
 
     return vector_path
 
@@ -201,31 +235,1044 @@ def get_the_result_file_with_name(VECTOR, TIME_HORIZON, PATH, HHV):
 
         with open(path, 'r') as file:
             RREH_json = json.load(file)
-            RREH_dico = MakeMeReadable(RREH_json)
+            RREH_dico = MakeMeReadable(RREH_json, as_array='yes') # only sums of series
             total_cost = RREH_dico.solution.objective
             
             if VECTOR[index] == "Hydrogen" :
-                total_production = sum(RREH_dico.solution.elements.LIQUEFIED_HYDROGEN_REGASIFICATION.variables.hydrogen.values)
+                total_production = np.sum(RREH_dico.solution.elements.LIQUEFIED_HYDROGEN_REGASIFICATION.variables.hydrogen.values)
                 
             if VECTOR[index] == "Methanol" :
-                total_production = sum(RREH_dico.solution.elements.LIQUEFIED_METHANOL_CARRIERS.variables.liquefied_methanol_out.values)
+                total_production = np.sum(RREH_dico.solution.elements.LIQUEFIED_METHANOL_CARRIERS.variables.liquefied_methanol_out.values)
                 
             if VECTOR[index] == "Methane" :
-                total_production = sum(RREH_dico.solution.elements.LIQUEFIED_METHANE_REGASIFICATION.variables.methane.values)
+                total_production = np.sum(RREH_dico.solution.elements.LIQUEFIED_METHANE_REGASIFICATION.variables.methane.values)
                 
             if VECTOR[index] == "Ammonia" :
-                total_production = sum(RREH_dico.solution.elements.LIQUEFIED_NH3_REGASIFICATION.variables.ammonia.values)
+                total_production = np.sum(RREH_dico.solution.elements.LIQUEFIED_NH3_REGASIFICATION.variables.ammonia.values)
                 
             if VECTOR[index] == "DME from MEOH" or VECTOR[index] == "DME_new" or VECTOR[index] == "DME":
-                total_production = sum(RREH_dico.solution.elements.LIQUEFIED_DME_CARRIERS.variables.liquefied_dme_out.values)
+                total_production = np.sum(RREH_dico.solution.elements.LIQUEFIED_DME_CARRIERS.variables.liquefied_dme_out.values)
                 
             if VECTOR[index] == "DME D1" or VECTOR[index] == "DME I1" or VECTOR[index] == "DME D1 scaled" or VECTOR[index] == "DME I1 scaled":
-                total_production = sum(RREH_dico.solution.elements.LIQUEFIED_DME_CARRIERS.variables.liquefied_dme_out.values)    
+                total_production = np.sum(RREH_dico.solution.elements.LIQUEFIED_DME_CARRIERS.variables.liquefied_dme_out.values)    
                 
             if VECTOR[index] == "Ethanol_corn" or VECTOR[index] == "Ethanol_cellulosique" or VECTOR[index] == "Ethanol_wheat":
-                total_production = sum(RREH_dico.solution.elements.ETHANOL_PLANTS.variables.ethanol.values)
+                total_production = np.sum(RREH_dico.solution.elements.ETHANOL_PLANTS.variables.ethanol.values)
                 
             cost_per_MWH = (total_cost)/(total_production*HHV[index]) # HHV
             print(f"{VECTOR[index]} model: {(round(cost_per_MWH, 2))} €/MWh (HHV)")
             
-       
\ No newline at end of file
+       
+
+#%% Columnar result store (HDF5) to replace the big solution JSON files
+# Every numeric series of the solution dictionary (variables values, parameters, 
+# duals, global parameters) is stored as one typed dataset, the rest of the tree 
+# (names, objectives, solver information...) is kept as a small JSON header. 
+# A function then only reads from the disk the columns it asks for.
+
+RESULT_STORE_VERSION = 1
+STORE_COLUMN_TAG = "$column"
+
+
+def _import_h5py():
+    try:
+        import h5py
+    except ImportError:
+        raise ImportError("h5py is needed for the result store, install it with 'pip install h5py'")
+    return h5py
+
+
+def _is_numeric_series(value):
+    # A series is a non empty list of numbers (bool excluded)
+    if not isinstance(value, list) or not value:
+        return False
+    return all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value)
+
+
+def split_result_dictionary(dico):
+    # Split the GBOML dictionary into a skeleton (everything except the series) and 
+    # a dict {column_name: list of values}. The column name is the json path joined by "/"
+    columns = {}
+
+    def walk(obj, path):
+        if isinstance(obj, dict):
+            return {k: walk(v, path + [str(k)]) for k, v in obj.items()}
+        if _is_numeric_series(obj):
+            name = "/".join(path)
+            columns[name] = obj
+            return {STORE_COLUMN_TAG: name}
+        return obj
+
+    skeleton = walk(dico, [])
+    return skeleton, columns
+
+
+def result_path_to_column(path, kind="variables"):
+    # Translate a short path "cluster/node/name" into the column name of the store
+    #   kind = 'variables'  : "INLAND/NH3_PLANTS/nh3_produced" or "INLAND/e_ens"
+    #   kind = 'parameters' : "INLAND/NH3_PLANTS/capex", "INLAND/param" or "global_param"
+    #   kind = 'duals'      : "INLAND_BALANCE/electricity"
+    parts = path.strip("/").split("/")
+
+    if kind == "variables":
+        if len(parts) == 3:
+            return "solution/elements/{}/sub_elements/{}/variables/{}/values".format(*parts)
+        if len(parts) == 2:
+            return "solution/elements/{}/variables/{}/values".format(*parts)
+
+    elif kind == "parameters":
+        if len(parts) == 3:
+            return "model/nodes/{}/sub_nodes/{}/parameters/{}".format(*parts)
+        if len(parts) == 2:
+            return "model/nodes/{}/parameters/{}".format(*parts)
+        if len(parts) == 1:
+            return "model/global_parameters/{}".format(*parts)
+
+    elif kind == "duals":
+        if len(parts) == 2:
+            return "solution/elements/{}/constraints/{}/Pi".format(*parts)
+
+    else:
+        raise ValueError(f"Unknown kind '{kind}', use 'variables', 'parameters' or 'duals'")
+
+    raise ValueError(f"Path '{path}' is not valid for kind '{kind}'")
+
+
+def write_result_store(dico, store_path, dtype="float64", compression=None):
+    # Native writer: store the GBOML dictionary (output of turn_solution_to_dictionary) 
+    # in a HDF5 file with one dataset per series and a JSON header
+    h5py = _import_h5py()
+
+    if dtype not in ("float64", "float32"):
+        raise ValueError("dtype must be 'float64' or 'float32'")
+
+    skeleton, columns = split_result_dictionary(dico)
+    solution = dico.get("solution", {})
+    header = {
+        "format": "gboml-result-store",
+        "version": RESULT_STORE_VERSION,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "dtype": dtype,
+        "objective": solution.get("objective"),
+        "status": solution.get("status"),
+        "horizon": dico.get("model", {}).get("horizon"),
+        "number_columns": len(columns),
+    }
+
+    with h5py.File(store_path, "w") as f:
+        f.attrs["header"] = json.dumps(header)
+        f.attrs["skeleton"] = json.dumps(skeleton)
+        for name, values in columns.items():
+            f.create_dataset(name, data=np.asarray(values, dtype=dtype), compression=compression)
+
+    return store_path
+
+
+def convert_json_to_result_store(json_path, store_path=None, dtype="float64", compression=None):
+    # Converter for the results already written as JSON in Simulations/
+    if store_path is None:
+        store_path = os.path.splitext(json_path)[0] + ".h5"
+
+    with open(json_path, "r") as file:
+        dico = json.load(file)
+
+    write_result_store(dico, store_path, dtype=dtype, compression=compression)
+    print(f"✅ {os.path.basename(json_path)} converted into {os.path.basename(store_path)}")
+    return store_path
+
+
+def read_result_store_header(store_path):
+    # Read only the metadata header of a result store
+    h5py = _import_h5py()
+    with h5py.File(store_path, "r") as f:
+        return json.loads(f.attrs["header"])
+
+
+def read_result_store(store_path, paths, kind="variables"):
+    # Read only the requested series of a result store
+    # paths : list of short paths "cluster/node/name" (see result_path_to_column)
+    # Return a dict {path: numpy array}
+    h5py = _import_h5py()
+    out = {}
+    with h5py.File(store_path, "r") as f:
+        for path in paths:
+            column = result_path_to_column(path, kind)
+            if column not in f:
+                print(f"[Warning] {path} ({kind}) is not in {os.path.basename(store_path)}")
+                continue
+            out[path] = f[column][()]
+    return out
+
+
+class _LazyStoreNode(dict):
+    # Dictionary of the skeleton whose series are read from the store the first time 
+    # they are accessed, so the functions of process_funct work without modification
+    
+    def __init__(self, data, store):
+        super().__init__(data)
+        self._store = store
+
+    def _resolve(self, key, value):
+        if isinstance(value, dict):
+            if len(value) == 1 and STORE_COLUMN_TAG in value:
+                value = self._store.column(value[STORE_COLUMN_TAG])
+            elif not isinstance(value, _LazyStoreNode):
+                value = _LazyStoreNode(value, self._store)
+            dict.__setitem__(self, key, value)
+        return value
+
+    def __getitem__(self, key):
+        return self._resolve(key, dict.__getitem__(self, key))
+
+    def __iter__(self):
+        # Defined so that dict(node), {**node} and update(node) read the items through 
+        # __getitem__ (the fast path of dict would copy the column placeholders)
+        return dict.__iter__(self)
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def values(self):
+        return [self[k] for k in self.keys()]
+
+    def items(self):
+        return [(k, self[k]) for k in self.keys()]
+
+    def pop(self, key, *default):
+        if key in self:
+            value = self[key]
+            dict.__delitem__(self, key)
+            return value
+        return dict.pop(self, key, *default)
+
+    def copy(self):
+        # Lazy copy: the series not read yet are read from the store when accessed
+        return _LazyStoreNode(dict.copy(self), self._store)
+
+    def close(self):
+        # Close the file of the store (load_result returns the root node, not the store)
+        self._store.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class ResultStore:
+    # Lazy view on a result store. ResultStore(path).dictionary has the same structure 
+    # as the json dictionary but only the series really used are loaded. The file stays 
+    # open until close() (store or dictionary) or the end of a with block
+    
+    def __init__(self, store_path, as_list="yes"):
+        self._h5py = _import_h5py()
+        self.path = store_path
+        self.as_list = as_list
+        self._file = self._h5py.File(store_path, "r")
+        self.header = json.loads(self._file.attrs["header"])
+        self.dictionary = _LazyStoreNode(json.loads(self._file.attrs["skeleton"]), self)
+
+    def column(self, name):
+        values = self._file[name][()]
+        # The analysis functions expect python lists, 'no' keeps the numpy array
+        return values.tolist() if self.as_list == "yes" else values
+
+    def columns(self):
+        # Name of all the series available in the store
+        names = []
+        self._file.visititems(lambda name, obj: names.append(name) if isinstance(obj, self._h5py.Dataset) else None)
+        return names
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def load_result(path):
+    # Load a result whatever its format: the json dictionary, a lazy view on a result 
+    # store or the memory-mapped layout. The lazy view keeps the store open: close it 
+    # with result.close() or use it in a with block
+    if path.endswith(".h5"):
+        return ResultStore(path).dictionary
+    if is_tensor_layout(path):
+        return load_tensor_layout(path)
+    if path.endswith(MANIFEST_EXTENSION):
+        return load_delta_result(os.path.dirname(path), os.path.basename(path)[:-len(MANIFEST_EXTENSION)])
+    with open(path, "r") as file:
+        return json.load(file)
+
+
+#%% Selective streaming reader for the solution JSON files
+# The file is parsed as a flow of events (ijson), only the requested arrays are 
+# kept in memory, so a cell which needs 3 variables does not load the 160 MB tree.
+
+def _import_ijson():
+    try:
+        import ijson
+    except ImportError:
+        raise ImportError("ijson is needed for the streaming reader, install it with 'pip install ijson'")
+    return ijson
+
+
+def stream_result_json(json_path, paths, kind="variables", as_array="no"):
+    # Extract in a single pass the series of "paths" from a solution JSON file
+    # paths : list of short paths "cluster/node/name" (see result_path_to_column)
+    # Return a dict {path: list of values} (numpy arrays if as_array = 'yes')
+    ijson = _import_ijson()
+
+    targets = {}
+    for path in paths:
+        prefix = result_path_to_column(path, kind).replace("/", ".")
+        targets[prefix] = path
+    
+    out = {}
+    remaining = set(targets)
+    current, values = None, None
+
+    with open(json_path, "rb") as file:
+        for prefix, event, value in ijson.parse(file, use_float=True):
+            if current is None:
+                if prefix in remaining and event in ("start_array", "number"):
+                    if event == "number": # Scalar parameter
+                        out[targets[prefix]] = [value]
+                        remaining.discard(prefix)
+                    else:
+                        current, values = prefix, []
+            elif event == "number" and prefix == current + ".item":
+                values.append(value)
+            elif event == "end_array" and prefix == current:
+                out[targets[current]] = values
+                remaining.discard(current)
+                current, values = None, None
+            
+            if not remaining: # Everything has been found, the end of the file is not read
+                break
+
+    for prefix in remaining:
+        print(f"[Warning] {targets[prefix]} ({kind}) is not in {os.path.basename(json_path)}")
+
+    if as_array == "yes":
+        out = {k: np.asarray(v, dtype=float) for k, v in out.items()}
+    
+    return out
+
+
+def read_selected_series(path, paths, kind="variables", as_array="no"):
+    # Same interface for the json files (streaming) and the result stores (column reading)
+    if path.endswith(".h5"):
+        out = read_result_store(path, paths, kind)
+        return out if as_array == "yes" else {k: v.tolist() for k, v in out.items()}
+    return stream_result_json(path, paths, kind, as_array)
+
+
+#%% Memory-mapped NumPy layout for the hourly series
+# All the series of length T of one element (cluster or hyperedge) are stacked in one 
+# matrix (rows x T) saved as .npy, a JSON index gives the row of each series. 
+# The loader opens the matrices with mmap_mode='r' so every series is a zero-copy view.
+
+TENSOR_INDEX_FILE = "index.json"
+
+
+def _tensor_group(column):
+    # solution/elements/INLAND/... -> solution_INLAND ; model/nodes/INLAND/... -> model_INLAND
+    parts = column.split("/")
+    if parts[0] == "model" and parts[1] == "global_parameters":
+        return "model_global_parameters"
+    return f"{parts[0]}_{parts[2]}"
+
+
+def write_tensor_layout(dico, directory, dtype="float64"):
+    # Write the GBOML dictionary as one nodes x T matrix per element + a JSON index
+    if dtype not in ("float64", "float32"):
+        raise ValueError("dtype must be 'float64' or 'float32'")
+    
+    os.makedirs(directory, exist_ok=True)
+    skeleton, columns = split_result_dictionary(dico)
+    horizon = max((len(v) for v in columns.values()), default=0)
+
+    groups = {}
+    for name, values in columns.items():
+        if len(values) == horizon:
+            groups.setdefault(_tensor_group(name), []).append(name)
+
+    rows = {}
+    for group, names in groups.items():
+        matrix = np.empty((len(names), horizon), dtype=dtype)
+        for i, name in enumerate(names):
+            matrix[i] = columns[name]
+            rows[name] = [f"{group}.npy", i]
+        np.save(os.path.join(directory, f"{group}.npy"), matrix)
+
+    # The short series (scalars, capacities...) stay in the index
+    def put_back(obj):
+        if isinstance(obj, dict):
+            if len(obj) == 1 and STORE_COLUMN_TAG in obj and obj[STORE_COLUMN_TAG] not in rows:
+                return columns[obj[STORE_COLUMN_TAG]]
+            return {k: put_back(v) for k, v in obj.items()}
+        return obj
+
+    index = {
+        "version": RESULT_STORE_VERSION,
+        "horizon": horizon,
+        "dtype": dtype,
+        "rows": rows,
+        "skeleton": put_back(skeleton),
+    }
+    with open(os.path.join(directory, TENSOR_INDEX_FILE), "w") as file:
+        json.dump(index, file)
+
+    return directory
+
+
+def convert_json_to_tensor_layout(json_path, directory=None, dtype="float64"):
+    # Converter for the results already written as JSON in Simulations/
+    if directory is None:
+        directory = os.path.splitext(json_path)[0]
+
+    with open(json_path, "r") as file:
+        dico = json.load(file)
+
+    write_tensor_layout(dico, directory, dtype=dtype)
+    print(f"✅ {os.path.basename(json_path)} converted into {directory}")
+    return directory
+
+
+def is_tensor_layout(path):
+    return os.path.isdir(path) and os.path.isfile(os.path.join(path, TENSOR_INDEX_FILE))
+
+
+def load_tensor_layout(directory):
+    # Rebuild the GBOML dictionary, the hourly series are read-only views on the 
+    # memory-mapped matrices (np.ndarray instead of lists of 8760 floats)
+    with open(os.path.join(directory, TENSOR_INDEX_FILE), "r") as file:
+        index = json.load(file)
+
+    matrices = {}
+    def row(name):
+        file_name, i = index["rows"][name]
+        if file_name not in matrices:
+            matrices[file_name] = np.load(os.path.join(directory, file_name), mmap_mode="r")
+        return matrices[file_name][i]
+
+    def walk(obj):
+        if isinstance(obj, dict):
+            if len(obj) == 1 and STORE_COLUMN_TAG in obj:
+                return row(obj[STORE_COLUMN_TAG])
+            return {k: walk(v) for k, v in obj.items()}
+        return obj
+
+    return walk(index["skeleton"])
+
+
+def get_tensor_series(directory, path, kind="variables"):
+    # Zero-copy view on one series of the layout, path = "cluster/node/name"
+    with open(os.path.join(directory, TENSOR_INDEX_FILE), "r") as file:
+        rows = json.load(file)["rows"]
+    column = result_path_to_column(path, kind)
+    if column not in rows:
+        raise ValueError(f"{path} ({kind}) is not an hourly series of {directory}")
+    file_name, i = rows[column]
+    return np.load(os.path.join(directory, file_name), mmap_mode="r")[i]
+
+
+#%% Export profile: choose what is written after a solve
+# A profile is a dictionary, every key is optional:
+#   "nodes"             : globs of the nodes to keep, "INLAND" is the cluster itself, 
+#                         "INLAND/*" its sub nodes, "INLAND*" both (None = all)
+#   "exclude_nodes"     : globs of the nodes to remove
+#   "variables"         : globs of the variables to keep (None = all)
+#   "exclude_variables" : globs of the variables to remove
+#   "parameters"        : 'yes' / 'no', write the parameters of the nodes
+#   "constraints"       : 'yes' / 'no', write the constraint information (duals, slacks)
+#   "scalars_only"      : globs of the nodes for which only the scalar values are written 
+#                         (capacities...), the time series are removed
+
+COUNTRIES = ["FRANCE", "NETHERLANDS", "DEUTSCHLAND", "LUXEMBOURG", "UNITED_KINGDOM", "DENMARK"]
+
+EXPORT_PROFILES = {
+    "full": {},
+    # What the analysis notebooks use: the duals are kept for the prices, only the 
+    # scalar values of the countries are written
+    "analysis": {"constraints": "yes", "scalars_only": [c + "*" for c in COUNTRIES]},
+    "light": {"constraints": "no", "scalars_only": [c + "*" for c in COUNTRIES]},
+}
+
+
+def get_export_profile(profile):
+    # profile : name of a profile in EXPORT_PROFILES, a dictionary or None (= "full")
+    if profile is None:
+        return {}
+    if isinstance(profile, str):
+        if profile not in EXPORT_PROFILES:
+            raise ValueError(f"Unknown export profile '{profile}', choose among {list(EXPORT_PROFILES)}")
+        return EXPORT_PROFILES[profile]
+    if isinstance(profile, dict):
+        return profile
+    raise TypeError("profile must be None, a name or a dictionary")
+
+
+def _match_any(name, patterns):
+    return any(fnmatchcase(name, p) for p in patterns)
+
+
+def _keep_node(path, profile):
+    if profile.get("nodes") is not None and not _match_any(path, profile["nodes"]):
+        return False
+    return not _match_any(path, profile.get("exclude_nodes", []))
+
+
+def _keep_variable(name, profile):
+    if profile.get("variables") is not None and not _match_any(name, profile["variables"]):
+        return False
+    return not _match_any(name, profile.get("exclude_variables", []))
+
+
+def _filter_variables(variables, path, profile):
+    scalars_only = _match_any(path, profile.get("scalars_only", []))
+    out = {}
+    for name, var in variables.items():
+        if not _keep_variable(name, profile):
+            continue
+        values = var.get("values") if isinstance(var, dict) else var
+        if scalars_only and isinstance(values, list) and len(values) > 1:
+            continue
+        out[name] = var
+    return out
+
+
+def _filter_element(element, path, profile):
+    out = {}
+    for key, value in element.items():
+        if key == "variables":
+            out[key] = _filter_variables(value, path, profile)
+        elif key == "constraints":
+            if profile.get("constraints", "yes") == "yes":
+                out[key] = value
+        elif key == "parameters":
+            if profile.get("parameters", "yes") == "yes":
+                out[key] = value
+        elif key in ("sub_elements", "sub_nodes"):
+            out[key] = {n: _filter_element(v, f"{path}/{n}", profile) 
+                        for n, v in value.items() if _keep_node(f"{path}/{n}", profile)}
+        else:
+            out[key] = value
+    return out
+
+
+def filter_result_dictionary(dico, profile=None):
+    # Apply an export profile to the output of turn_solution_to_dictionary
+    # A cluster is kept as soon as one of its sub nodes is kept
+    profile = get_export_profile(profile)
+    if not profile:
+        return dico
+
+    def keep_top(name, element):
+        if _keep_node(name, profile):
+            return True
+        subs = element.get("sub_elements", element.get("sub_nodes", {}))
+        return any(_keep_node(f"{name}/{n}", profile) for n in subs)
+
+    out = dict(dico)
+    if "solution" in dico:
+        out["solution"] = dict(dico["solution"])
+        out["solution"]["elements"] = {n: _filter_element(e, n, profile) 
+                                       for n, e in dico["solution"].get("elements", {}).items() if keep_top(n, e)}
+    if "model" in dico:
+        out["model"] = dict(dico["model"])
+        for section in ("nodes", "hyperedges"):
+            if section in dico["model"]:
+                out["model"][section] = {n: _filter_element(e, n, profile) 
+                                         for n, e in dico["model"][section].items() if keep_top(n, e)}
+    return out
+
+
+def filter_result_list(names, values, profile=None):
+    # Apply an export profile to the output of turn_solution_to_list (names "CLUSTER.NODE.variable")
+    profile = get_export_profile(profile)
+    if not profile:
+        return names, values
+
+    kept_names, kept_values = [], []
+    for name, value in zip(names, values):
+        parts = name.split(".")
+        path, variable = "/".join(parts[:-1]), parts[-1]
+        if not _keep_node(path, profile) or not _keep_variable(variable, profile):
+            continue
+        if _match_any(path, profile.get("scalars_only", [])) and isinstance(value, list) and len(value) > 1:
+            continue
+        kept_names.append(name)
+        kept_values.append(value)
+    return kept_names, kept_values
+
+
+#%% Streaming solution writer
+# Walk once the solution vector of the solver with the variable mapping of the graph and 
+# write each variable directly, without building turn_solution_to_dictionary and 
+# turn_solution_to_list. The memory stays close to the one of the solution vector.
+# Only the variables are written (no parameters / objectives per node).
+
+def iter_solution_mapping(model, export_profile=None):
+    # (keys in the json dictionary, start, size) of every variable of the built model, 
+    # sorted so that the variables of a same node follow each other
+    profile = get_export_profile(export_profile)
+    mapping = []
+    for node_name, variables in model.program.get_tuple_name():
+        path = node_name.split(".")
+        node_path = "/".join(path)
+        if profile and not _keep_node(node_path, profile):
+            continue
+        element_keys = [path[0]]
+        for sub in path[1:]:
+            element_keys += ["sub_elements", sub]
+        for var_name, var in variables:
+            if profile and not _keep_variable(var_name, profile):
+                continue
+            size = var.get_size()
+            if profile and size > 1 and _match_any(node_path, profile.get("scalars_only", [])):
+                continue
+            mapping.append((element_keys + ["variables", var_name, "values"], var.get_index(), size))
+    mapping.sort(key=lambda x: x[0])
+    return mapping
+
+
+def _write_nested_json(file, items):
+    # Write sorted (keys, value) items as nested json objects, one item at a time
+    stack, first = [], [True]
+    for keys, value in items:
+        common = 0
+        while common < min(len(stack), len(keys) - 1) and stack[common] == keys[common]:
+            common += 1
+        while len(stack) > common:
+            file.write("}")
+            stack.pop()
+            first.pop()
+        for k in keys[len(stack):-1]:
+            file.write(("" if first[-1] else ", ") + json.dumps(k) + ": {")
+            first[-1] = False
+            stack.append(k)
+            first.append(True)
+        file.write(("" if first[-1] else ", ") + json.dumps(keys[-1]) + ": " + json.dumps(value))
+        first[-1] = False
+    while stack:
+        file.write("}")
+        stack.pop()
+
+
+def write_solution_stream(model, solution, outfile, objective=None, status=None, export_profile=None, dtype="float64"):
+    # model : built and solved GbomlGraph, solution : solution vector returned by the solver
+    # The format is given by the extension of outfile: .json, .h5 (result store) or .csv 
+    # (one row per variable: name, values...)
+    solution = np.asarray(solution, dtype=float)
+    mapping = iter_solution_mapping(model, export_profile)
+    extension = os.path.splitext(outfile)[1]
+
+    def values(start, size):
+        return solution[start:start + size].tolist()
+
+    if extension == ".json":
+        with open(outfile, "w") as file:
+            file.write('{"solution": {"status": ' + json.dumps(str(status)) + ', "objective": ' + json.dumps(objective) + ', "elements": {')
+            _write_nested_json(file, ((keys, values(start, size)) for keys, start, size in mapping))
+            file.write('}}, "model": {"horizon": ' + json.dumps(model.timehorizon) + '}}')
+
+    elif extension == ".h5":
+        h5py = _import_h5py()
+        skeleton = {"solution": {"status": str(status), "objective": objective, "elements": {}}, 
+                    "model": {"horizon": model.timehorizon}}
+        with h5py.File(outfile, "w") as f:
+            for keys, start, size in mapping:
+                name = "solution/elements/" + "/".join(keys)
+                f.create_dataset(name, data=solution[start:start + size].astype(dtype))
+                node = skeleton["solution"]["elements"]
+                for k in keys[:-1]:
+                    node = node.setdefault(k, {})
+                node[keys[-1]] = {STORE_COLUMN_TAG: name}
+            f.attrs["skeleton"] = json.dumps(skeleton)
+            f.attrs["header"] = json.dumps({
+                "format": "gboml-result-store",
+                "version": RESULT_STORE_VERSION,
+                "created": datetime.now().isoformat(timespec="seconds"),
+                "dtype": dtype,
+                "objective": objective,
+                "status": str(status),
+                "horizon": model.timehorizon,
+                "number_columns": len(mapping),
+            })
+
+    elif extension == ".csv":
+        with open(outfile, "w", newline="") as file:
+            writer = csv.writer(file)
+            for keys, start, size in mapping:
+                name = ".".join(k for k in keys if k not in ("sub_elements", "variables", "values"))
+                writer.writerow([name] + values(start, size))
+
+    else:
+        raise ValueError("outfile must end with .json, .h5 or .csv")
+
+    return outfile
+
+
+#%% Cache of the parsed results (keyed by file size + mtime + content hash)
+# The parsed dictionary is saved once with pickle protocol 5: the series are numpy arrays 
+# written as out-of-band buffers, so the reload is a memory map of the file.
+
+CACHE_FOLDER = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Cache")
+CACHE_MAX_BYTES = 5 * 1024**3 # 5 GB
+CACHE_INDEX_FILE = "index.json"
+
+
+def _file_content_hash(path, chunk_size=2**22):
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def result_cache_key(path, cache_folder=CACHE_FOLDER):
+    # The content hash is only recomputed when the size or the mtime of the file changed
+    stat = os.stat(path)
+    index_path = os.path.join(cache_folder, CACHE_INDEX_FILE)
+    index = {}
+    if os.path.isfile(index_path):
+        with open(index_path, "r") as file:
+            index = json.load(file)
+
+    full_path = os.path.abspath(path)
+    entry = index.get(full_path)
+    if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+        return entry["hash"]
+
+    content_hash = _file_content_hash(path)
+    index[full_path] = {"size": stat.st_size, "mtime": stat.st_mtime, "hash": content_hash}
+    os.makedirs(cache_folder, exist_ok=True)
+    with open(index_path, "w") as file:
+        json.dump(index, file)
+    return content_hash
+
+
+def _write_cache_file(cache_path, dico):
+    skeleton, columns = split_result_dictionary(dico)
+    columns = {k: np.asarray(v, dtype=float) for k, v in columns.items()}
+    buffers = []
+    data = pickle.dumps((skeleton, columns), protocol=5, buffer_callback=buffers.append)
+    raws = [b.raw() for b in buffers]
+    header = pickle.dumps([len(data)] + [r.nbytes for r in raws])
+
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "wb") as file:
+        file.write(len(header).to_bytes(8, "little"))
+        file.write(header)
+        file.write(data)
+        for r in raws:
+            file.write(r)
+    os.replace(tmp_path, cache_path) # No half written file in the cache
+
+
+def _read_cache_file(cache_path, as_list="no"):
+    with open(cache_path, "rb") as file:
+        mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(mm)
+    n = int.from_bytes(view[:8], "little")
+    sizes = pickle.loads(view[8:8 + n])
+    position = 8 + n
+    data = view[position:position + sizes[0]]
+    position += sizes[0]
+    buffers = []
+    for size in sizes[1:]:
+        buffers.append(view[position:position + size])
+        position += size
+    skeleton, columns = pickle.loads(data, buffers=buffers)
+
+    def walk(obj):
+        if isinstance(obj, dict):
+            if len(obj) == 1 and STORE_COLUMN_TAG in obj:
+                values = columns[obj[STORE_COLUMN_TAG]]
+                return values.tolist() if as_list == "yes" else values
+            return {k: walk(v) for k, v in obj.items()}
+        return obj
+
+    return walk(skeleton)
+
+
+def evict_result_cache(cache_folder=CACHE_FOLDER, max_bytes=CACHE_MAX_BYTES):
+    # Remove the least recently used cache files until the folder is smaller than max_bytes
+    if not os.path.isdir(cache_folder):
+        return []
+    files = [os.path.join(cache_folder, f) for f in os.listdir(cache_folder) if f.endswith(".pkl")]
+    files.sort(key=os.path.getmtime)
+    total = sum(os.path.getsize(f) for f in files)
+    removed = []
+    while files and total > max_bytes:
+        oldest = files.pop(0)
+        total -= os.path.getsize(oldest)
+        os.remove(oldest)
+        removed.append(oldest)
+    return removed
+
+
+def load_result_cached(path, cache_folder=CACHE_FOLDER, max_bytes=CACHE_MAX_BYTES, as_list="no"):
+    # Same as load_result for a json file, but the parsed result is kept in cache_folder.
+    # The series are read-only numpy arrays over the cache file (zero copy), as_list = 'yes' 
+    # rebuilds the python lists (slower, same output as load_result)
+    key = result_cache_key(path, cache_folder)
+    cache_path = os.path.join(cache_folder, key + ".pkl")
+
+    if os.path.isfile(cache_path):
+        os.utime(cache_path) # Most recently used
+        return _read_cache_file(cache_path, as_list)
+
+    dico = load_result(path)
+    _write_cache_file(cache_path, dico)
+    removed = evict_result_cache(cache_folder, max_bytes)
+    if cache_path in removed:
+        print(f"[Warning] {os.path.basename(path)} is bigger than the cache size ({max_bytes} bytes)")
+        return dico
+    # Same types on the first call as on the next ones
+    return dico if as_list == "yes" else _read_cache_file(cache_path, as_list)
+
+
+def clear_result_cache(cache_folder=CACHE_FOLDER):
+    return evict_result_cache(cache_folder, max_bytes=0)
+
+
+#%% Scenario catalog (SQLite)
+# One row per solved scenario with what defines it and where the result is, so finding 
+# a run does not need to open the result files. The global parameters are also stored 
+# one per row to be queried directly (e.g. all the runs with grid_limit = 50).
+
+CATALOG_FILE = "catalog.sqlite"
+
+
+def _connect_catalog(catalog_path):
+    connection = sqlite3.connect(catalog_path)
+    connection.execute("PRAGMA foreign_keys = ON") # per connection, needed by ON DELETE CASCADE
+    connection.executescript("""
+        CREATE TABLE IF NOT EXISTS scenarios (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT NOT NULL,
+            period TEXT,
+            model_file TEXT,
+            modifications TEXT,
+            global_parameters TEXT,
+            objective REAL,
+            status TEXT,
+            build_time REAL,
+            solve_time REAL,
+            total_time REAL,
+            result_path TEXT,
+            created TEXT
+        );
+        CREATE TABLE IF NOT EXISTS scenario_parameters (
+            scenario_id INTEGER REFERENCES scenarios(id) ON DELETE CASCADE,
+            name TEXT,
+            value REAL,
+            text_value TEXT
+        );
+        CREATE INDEX IF NOT EXISTS idx_scenarios_name ON scenarios(name);
+        CREATE INDEX IF NOT EXISTS idx_parameters_name ON scenario_parameters(name, value);
+    """)
+    return connection
+
+
+def get_literal_global_parameters(model):
+    # Values of the global parameters of a GBOML graph given as a literal (grid_limit, meoh...)
+    out = {}
+    for param in getattr(model, "global_parameters", []):
+        expression = getattr(param, "expression", None)
+        if expression is not None and getattr(expression, "type", None) == "literal":
+            out[param.name] = expression.name
+    return out
+
+
+def add_scenario_to_catalog(catalog_path, name, period=None, model_file=None, modifications=None, 
+                            global_parameters=None, objective=None, status=None, timings=None, result_path=None):
+    # Add a solved run to the catalog, return its id
+    # timings : dictionary with the wall times in seconds ('build', 'solve', 'total')
+    timings = timings or {}
+    global_parameters = global_parameters or {}
+    with _connect_catalog(catalog_path) as connection:
+        cursor = connection.execute(
+            "INSERT INTO scenarios (name, period, model_file, modifications, global_parameters, objective, status, "
+            "build_time, solve_time, total_time, result_path, created) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (name, period, model_file, json.dumps(modifications), json.dumps(global_parameters, default=str), 
+             objective, None if status is None else str(status), timings.get("build"), timings.get("solve"), 
+             timings.get("total"), result_path, datetime.now().isoformat(timespec="seconds")))
+        scenario_id = cursor.lastrowid
+        for param, value in global_parameters.items():
+            if isinstance(value, (bool, np.bool_)): # 0 / 1, as the filters of query_catalog
+                connection.execute("INSERT INTO scenario_parameters VALUES (?, ?, ?, NULL)", (scenario_id, param, int(value)))
+            elif isinstance(value, (int, float, np.integer, np.floating)):
+                connection.execute("INSERT INTO scenario_parameters VALUES (?, ?, ?, NULL)", (scenario_id, param, float(value)))
+            else:
+                connection.execute("INSERT INTO scenario_parameters VALUES (?, ?, NULL, ?)", (scenario_id, param, str(value)))
+    connection.close()
+    return scenario_id
+
+
+def query_catalog(catalog_path, sql=None, params=(), **filters):
+    # Return a DataFrame of the catalog
+    #   sql     : free SQL query on the tables scenarios / scenario_parameters
+    #   filters : equality on the global parameters, e.g. query_catalog(path, grid_limit=50, meoh=0)
+    if not os.path.isfile(catalog_path):
+        raise ValueError(f"No catalog at {catalog_path}")
+    
+    if sql is None:
+        sql = "SELECT * FROM scenarios"
+        conditions = []
+        params = []
+        for param, value in filters.items():
+            numeric = isinstance(value, (bool, int, float, np.bool_, np.integer, np.floating))
+            column = "value" if numeric else "text_value"
+            conditions.append(f"id IN (SELECT scenario_id FROM scenario_parameters WHERE name = ? AND {column} = ?)")
+            params += [param, float(value) if numeric else value]
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += " ORDER BY id"
+
+    connection = _connect_catalog(catalog_path)
+    try:
+        return pd.read_sql_query(sql, connection, params=params)
+    finally:
+        connection.close()
+
+
+#%% Deduplicated storage of the scenarios (content-addressed chunks + baseline)
+# Every series is cut in chunks of chunk_size values, a chunk is saved once under the hash 
+# of its bytes (chunks/<hash>.bin). A scenario is a manifest: its baseline, the skeleton 
+# and only the series whose chunks differ from the baseline. Sensitivity runs which share 
+# most of their variables with the baseline then only cost the chunks that changed.
+
+MANIFEST_EXTENSION = ".manifest.json"
+
+
+def _save_chunks(values, chunk_folder, chunk_size, baseline_chunks=None, tolerance=0.0):
+    hashes = []
+    for n, start in enumerate(range(0, len(values), chunk_size)):
+        chunk = values[start:start + chunk_size]
+        # Nearly identical chunk (lossy, only if tolerance > 0): the chunk of the baseline is kept
+        if tolerance > 0 and baseline_chunks is not None and n < len(baseline_chunks):
+            base = _load_chunk(chunk_folder, baseline_chunks[n])
+            if len(base) == len(chunk) and np.max(np.abs(base - chunk)) <= tolerance:
+                hashes.append(baseline_chunks[n])
+                continue
+        data = chunk.tobytes()
+        key = hashlib.blake2b(data, digest_size=20).hexdigest()
+        path = os.path.join(chunk_folder, key + ".bin")
+        if not os.path.isfile(path):
+            with open(path, "wb") as file:
+                file.write(data)
+        hashes.append(key)
+    return hashes
+
+
+def _load_chunk(chunk_folder, key):
+    with open(os.path.join(chunk_folder, key + ".bin"), "rb") as file:
+        return np.frombuffer(file.read(), dtype=np.float64)
+
+
+def _read_manifest(store_folder, name):
+    with open(os.path.join(store_folder, name + MANIFEST_EXTENSION), "r") as file:
+        return json.load(file)
+
+
+def _resolve_manifest_columns(store_folder, name):
+    # {column: list of chunk hashes} of a scenario, following the baselines
+    manifest = _read_manifest(store_folder, name)
+    columns = {}
+    if manifest.get("baseline"):
+        columns = _resolve_manifest_columns(store_folder, manifest["baseline"])
+        for column in manifest.get("removed", []):
+            columns.pop(column, None)
+    columns.update(manifest["columns"])
+    return columns
+
+
+def _baseline_chain(store_folder, name):
+    # Names of the baselines of a scenario, nearest first
+    chain = []
+    baseline = _read_manifest(store_folder, name).get("baseline")
+    while baseline:
+        if baseline in chain:
+            raise ValueError(f"Cycle in the baselines of '{name}': {chain}")
+        chain.append(baseline)
+        baseline = _read_manifest(store_folder, baseline).get("baseline")
+    return chain
+
+
+def delta_dependents(store_folder, name):
+    # Scenarios of the store stored as a delta against "name" (directly or not)
+    dependents = []
+    if not os.path.isdir(store_folder):
+        return dependents
+    for file in sorted(os.listdir(store_folder)):
+        if file.endswith(MANIFEST_EXTENSION):
+            other = file[:-len(MANIFEST_EXTENSION)]
+            if other != name and name in _baseline_chain(store_folder, other):
+                dependents.append(other)
+    return dependents
+
+
+def write_delta_result(dico, store_folder, name, baseline=None, chunk_size=1024, tolerance=0.0):
+    # Save a result in the deduplicated store under "name"
+    # baseline  : name of a scenario already in the store, only the differences are written
+    # tolerance : 0 = lossless, > 0 reuses the baseline chunks which differ by less than it
+    # The chunks are never modified (content addressed). A scenario used as a baseline by 
+    # others cannot be rewritten, it would silently change them.
+    if baseline is not None and (baseline == name or name in _baseline_chain(store_folder, baseline)):
+        raise ValueError(f"'{name}' cannot be stored as a delta against '{baseline}': it is '{name}' or one of its deltas.")
+    if os.path.isfile(os.path.join(store_folder, name + MANIFEST_EXTENSION)):
+        dependents = delta_dependents(store_folder, name)
+        if dependents:
+            raise ValueError(f"'{name}' is the baseline of {dependents}, store the new result under another name.")
+    chunk_folder = os.path.join(store_folder, "chunks")
+    os.makedirs(chunk_folder, exist_ok=True)
+    
+    skeleton, series = split_result_dictionary(dico)
+    base_columns = _resolve_manifest_columns(store_folder, baseline) if baseline else {}
+
+    columns = {}
+    for column, values in series.items():
+        values = np.asarray(values, dtype=np.float64)
+        hashes = _save_chunks(values, chunk_folder, chunk_size, base_columns.get(column), tolerance)
+        if base_columns.get(column) != hashes:
+            columns[column] = hashes
+
+    manifest = {
+        "version": RESULT_STORE_VERSION,
+        "baseline": baseline,
+        "chunk_size": chunk_size,
+        "tolerance": tolerance,
+        "skeleton": skeleton,
+        "columns": columns,
+        "removed": sorted(base_columns.keys() - series.keys()),
+    }
+    manifest_path = os.path.join(store_folder, name + MANIFEST_EXTENSION)
+    with open(manifest_path, "w") as file:
+        json.dump(manifest, file)
+
+    print(f"✅ {name}: {len(columns)}/{len(series)} series written" + (f" (baseline {baseline})" if baseline else ""))
+    return manifest_path
+
+
+def load_delta_result(store_folder, name):
+    # Rebuild the full dictionary of a scenario of the deduplicated store
+    chunk_folder = os.path.join(store_folder, "chunks")
+    skeleton = _read_manifest(store_folder, name)["skeleton"]
+    columns = _resolve_manifest_columns(store_folder, name)
+    
+    def walk(obj):
+        if isinstance(obj, dict):
+            if len(obj) == 1 and STORE_COLUMN_TAG in obj:
+                hashes = columns[obj[STORE_COLUMN_TAG]]
+                return np.concatenate([_load_chunk(chunk_folder, h) for h in hashes]).tolist()
+            return {k: walk(v) for k, v in obj.items()}
+        return obj
+
+    return walk(skeleton)
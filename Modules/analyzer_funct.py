@@ -18,13 +18,14 @@ from IPython.display import display
 from builtins import sum as sum
 import os
 import sys
+import warnings
 import GBOML_function as gf
 import process_funct as pf
+import storage_funct as sf
 
 from process_funct import merge_dictionaries as merge
 from process_funct import convert_mmr_to_dict as convert
 from process_funct import transform_dict_into_table_several_column as table
-from process_funct import all_cost_prod_dict_per_cluster as node_stat
 
 #%% COST CHECK FUNCTION:
 
@@ -165,6 +166,12 @@ def storage_analysis(soc, soc_cap, dischar, dischar_cap, char, char_cap):
     energy_sollicitation = ((max(soc)-min(soc)) / soc_cap) * 100
     print('Energy sollicitation:', round(energy_sollicitation, 2), '%')
     print('')
+
+
+def storage_report(models, clusters=None, periodic='yes', to_display='yes'):
+    # KPIs and rainflow cycles of every storage node of every cluster, one table per scenario
+    # (see storage_funct.storage_kpis); storage_analysis details a single storage
+    return sf.storage_kpi_tables(models, clusters=clusters, periodic=periodic, to_display=to_display)
     
 
 def state_of_charge(model_dict, cluster, node, capacity = 'new_energy_capacity',
@@ -209,6 +216,35 @@ def state_of_charge(model_dict, cluster, node, capacity = 'new_energy_capacity',
 
 #%% ENERGY NOT SERVED FUNCTION:
 
+def ens_hours(model_dict, variables):
+    # Number of hours and of events with energy not served of the variables of INLAND
+    events = pf.ens_events(model_dict, variables=variables)
+    counts = events.groupby("Variable")["Duration [h]"].agg(["sum", "size"])
+    inland = model_dict['solution']["elements"]['INLAND']['variables']
+    for variable in variables:
+        if variable not in inland:
+            continue
+        hours, n_events = counts.loc[variable] if variable in counts.index else (0, 0)
+        print(f"Hours with {pf.ENS_VARIABLES.get(variable, variable).lower()} not served: {hours} ({n_events} events)")
+
+
+def ens_event_analysis(models, variables=None, threshold=0.0, to_display='yes'):
+    """
+    Energy not served events of all the scenarios in one call (pf.ens_events): every event 
+    with its start, duration, peak and energy, and their seasonal clustering.
+    models : result, list of results or {name: result}
+    Returns (events, seasonal summary)
+    """
+    events = pf.ens_events(models, variables=variables, threshold=threshold)
+    seasons = pf.ens_event_summary(events)
+    if to_display == 'yes':
+        print(colored('\n=== Energy not served events ===', 'black', 'on_red'))
+        display(events.round(2))
+        print(colored('\n=== Energy not served events per season ===', 'black', 'on_red'))
+        display(seasons.round(2))
+    return events, seasons
+
+
 def ens_func(model_dict):
     """
     Function to calculate energy not served for each scenario.
@@ -259,33 +295,8 @@ def ens_func(model_dict):
         max_methanol_ens = 0
         cost_methanol_ens = 0
     
-    # Find hours with energy not served
-    e_ens_hours = [i for i, val in enumerate(e_ens) if val > 0]
-    h2_ens_hours = [i for i, val in enumerate(h2_ens) if val > 0]
-    ng_ens_hours = [i for i, val in enumerate(ng_ens) if val > 0]
-    try: 
-        methanol_ens_hours = [i for i, val in enumerate(methanol_ens) if val > 0]
-    except:
-        pass
-
-    # Print summary of hours with energy not served
-    print(f"Hours with electricity not served: {len(e_ens_hours)}")
-    # if e_ens_hours:
-    #     display(e_ens_hours)
-
-    print(f"Hours with hydrogen not served: {len(h2_ens_hours)}")
-    # if h2_ens_hours:
-    #     display(h2_ens_hours)
-
-    print(f"Hours with natural gas not served: {len(ng_ens_hours)}")
-    # if ng_ens_hours:
-    #     display(ng_ens_hours)
-    
-    
-    try:
-        print(f"Hours with methanol not served: {len(methanol_ens_hours)}")
-    except:
-        pass
+    # Hours and events with energy not served (run lengths of pf.ens_events)
+    ens_hours(model_dict, ['e_ens', 'h2_ens', 'ng_ens', 'methanol_ens'])
     
     
     # Store energy not served statistics
@@ -384,23 +395,8 @@ def ens_func_no_efuel(model_dict):
     
     
     
-    # Find hours with energy not served
-    e_ens_hours = [i for i, val in enumerate(e_ens) if val > 0]
-    h2_ens_hours = [i for i, val in enumerate(h2_ens) if val > 0]
-    ng_ens_hours = [i for i, val in enumerate(ng_ens) if val > 0]
-
-    # Print summary of hours with energy not served
-    print(f"Hours with electricity not served: {len(e_ens_hours)}")
-    # if e_ens_hours:
-    #     display(e_ens_hours)
-
-    print(f"Hours with hydrogen not served: {len(h2_ens_hours)}")
-    # if h2_ens_hours:
-    #     display(h2_ens_hours)
-
-    print(f"Hours with natural gas not served: {len(ng_ens_hours)}")
-    # if ng_ens_hours:
-    #     display(ng_ens_hours)
+    # Hours and events with energy not served (run lengths of pf.ens_events)
+    ens_hours(model_dict, ['e_ens', 'h2_ens', 'ng_ens'])
     
 
     
@@ -924,102 +920,116 @@ def balance_hydrogen(model_h2, model_dict, start=0, end=8760, steps=1, figsize=(
     plt.show()
 
 
-#%% ELECTRICITY OFFSHORE BALANCE: 
-
-def elec_offshore_balance(model, e_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
-
-    # Initialize lists to store tables for production, consumption, and storage
-    
-    prod_tables = []
-    cons_tables = [] 
-    flex_tables_storage = [] 
-    bal_tables = [] 
-
-    for i, m in enumerate(model):
-
-        # Production 
-        _, prod = node_stat(m, ['OFFSHORE'], variable='e_produced',all_var='no', zero_node=zero_nodes, show ='no')  
-        elec_prod = pf.remove_string(prod,' (OFFSHORE)')
-        prod_tables.append(table(elec_prod,show='no'))
-        elec_prod_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.OFFSHORE.e_produced)
-
-        # Consommation
-        _, cons = node_stat(m, ['OFFSHORE'], variable='e_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')  
-        elec_cons = pf.remove_string(cons,' (OFFSHORE)')
-        cons_tables.append(table(elec_cons,show='no'))  
-        elec_cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(e_obj[i].variables.OFFSHORE.e_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['OFFSHORE'], variable=['e_charged','e_discharged'], all_var='no', zero_node=zero_nodes, show ='no')
-        elec_storage = pf.remove_string(storage,' (OFFSHORE)')  
-        flex_tables_storage.append(table(elec_storage,show='no'))  
-        elec_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(e_obj[i].variables.OFFSHORE.e_charged))
-        elec_discharged_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.OFFSHORE.e_discharged)
-        
-        ##### Balance 
-        elec_balance = convert(e_obj[i].prod.OFFSHORE.e_balanced.BALANCE)  
-        elec_balance = pf.merge_dictionaries_replace_keys(elec_balance, name=['OFFSHORE BALANCE' ]) 
-        bal_tables.append((elec_balance)) 
-        elec_balance_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.OFFSHORE.e_balanced.BALANCE) 
-        
-        
-
-    print(colored('\n=== Electricity production ===', 'black', 'on_green'))
-    for t in prod_tables:
-        display(t)
-
-    print(colored('\n=== Electricity consumption ===', 'black', 'on_green'))
-    for t in cons_tables:
-        display(t)
-
-    print(colored('\n=== Storage charged/discharged ===', 'black', 'on_green'))
-    for t in flex_tables_storage:
-        display(t) 
-        
-    print(colored('\n=== Electricity Balance ===', 'black', 'on_green'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Electricity exchange [TWh]", zero_print="yes").T.round(2))
-        
-    if zoom is not None:
-        elec_prod_over_time = pf.zoom_with_timestep(elec_prod_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        elec_cons_over_time = pf.zoom_with_timestep(elec_cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_charged_over_time = pf.zoom_with_timestep(elec_charged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_discharged_over_time = pf.zoom_with_timestep(elec_discharged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_balance_over_time = pf.zoom_with_timestep(elec_balance_over_time, zero_nodes=zero_nodes, zoom=zoom)
-    
+#%% CARRIER BALANCE RENDERER:
+
+# Tables shown for a cluster balance: (roles, title)
+BALANCE_TABLES = [(("produced",), "{label} production"), (("captured",), "{label} captured"), 
+                  (("consumed",), "{label} consumption"), (("charged", "discharged"), "Storage charged/discharged"), 
+                  (("load_increase", "load_reduction"), "Load shifting/shedding"),
+                  (("imported",), "{label} Import"), (("exported",), "{label} Export"), (("released",), "{label} Released")]
+CLUSTER_COLORS = {'OFFSHORE': 'on_green', 'ZEEBRUGGE': 'on_cyan', 'INLAND': 'on_red'}
+
+
+def _balance_table(costs, balances, carrier, cluster, roles, zero_nodes):
+    # Totals of one scenario (one row per role, one column per node), with the capacity, 
+    # cost and load factor of the production and storage nodes (costs: node_cost_table of
+    # the cluster, one row per node)
+    spec = pf.CARRIERS[carrier]
+    totals = balances.table(carrier, cluster, roles, zero_nodes=zero_nodes).iloc[:, 0]
+    if totals.empty:
+        return None
+    t = totals.groupby(level=["Role", "Node"], sort=False).sum().unstack("Node")
+    t.index = [f"Total {role.replace('_', ' ')} [{spec['total']}]" for role in t.index]
+    if roles[0] in ("produced", "charged"):
+        kton = spec["unit"] != "GWh"
+        costs = costs.reindex(t.columns)[["Total capacity", "Objective [M€]", "Load factor [%]", "Cost [€/MWh]"]]
+        costs.columns = ["Total capacity [kt/h]" if kton else "Total capacity [GW]", "Total cost [M€]", 
+                         "Load factor [%]", "Total cost [€/ton]" if kton else "Total cost [€/MWh]"]
+        t = pd.concat([t, costs.T])
+    return t.round(3)
+
+
+def _deprecated_argument(function, name, value):
+    # Arguments of the balance functions which are not used anymore, kept for the notebooks
+    if value is not None:
+        warnings.warn(f"{function}: '{name}' is deprecated and ignored (the series come from "
+                      f"pf.carrier_balances), it will be removed.", FutureWarning, stacklevel=3)
+
+
+def carrier_balance(model, carrier, cluster, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # Render the balance of a carrier in a cluster from pf.carrier_balances: tables of every 
+    # scenario, balance table and plot of the last scenario
+    spec = pf.CARRIERS[carrier]
+    color = CLUSTER_COLORS.get(cluster, 'on_white')
+    balances = [pf.carrier_balances(m) for m in model]
+    costs = [pf.node_cost_table(m, clusters=[cluster]).droplevel("Cluster").groupby(level="Node").first() for m in model]
+    
+    for roles, title in BALANCE_TABLES:
+        tables = [_balance_table(c, b, carrier, cluster, roles, zero_nodes) for c, b in zip(costs, balances)]
+        tables = [t for t in tables if t is not None]
+        if not tables:
+            continue
+        print(colored(f'\n=== {title.format(label=spec["label"])} ===', 'black', color))
+        for t in tables:
+            display(t)
+    
+    print(colored(f"\n=== {spec['label']} Balance ===", 'black', color))
+    for b in balances:
+        summary = b.summary()
+        if (carrier, cluster) in summary.index:
+            summary = summary.loc[[(carrier, cluster)]].add_suffix(f" [{spec['total']}]")
+            summary.index = [f'{cluster} BALANCE']
+            display(summary.round(2))
+    
+    frame = balances[-1].frame(carrier, cluster, zoom=zoom, zero_nodes=zero_nodes)
+    balance = balances[-1].balance(carrier, cluster, zoom=zoom)
     
     plt.figure(figsize=figsize)
-    for key in elec_prod_over_time.keys():
-        plt.plot(elec_prod_over_time[key], label=f'{key}')
-        
-    for key in elec_cons_over_time.keys():
-        plt.plot(elec_cons_over_time[key], label=f'{key}')
-    
-    for key in elec_charged_over_time.keys():
-        plt.plot(elec_charged_over_time[key], label=f'Battery charged')
-        
-    plt.plot(elec_balance_over_time, label=f'Offshore balance', linestyle='--')
-        
-    for key in elec_discharged_over_time.keys():
-        plt.plot(elec_discharged_over_time[key], label=f'Battery discharged')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(elec_discharged_over_time[key]), 1), rotation=90)
-            
-        else:
-            plt.xlabel('Time (hours)')
-        
-    plt.title('Offshore electricity balance')
+    for (role, node, variable), serie in frame.iterrows():
+        label = f'{node} {role}' if role in ("charged", "discharged") else f'{node}'
+        plt.plot(serie.to_numpy(), label=label)
+    plt.plot(balance, label=f'{cluster.capitalize()} balance', linestyle='--')
     
-        
-    plt.ylabel('Electricity (GWh)')
+    if zoom is not None:
+        plt.xlabel(f'Time ({zoom})')
+        plt.xticks(np.arange(0, len(balance), 1), rotation=90)
+    else:
+        plt.xlabel('Time (hours)')
+    plt.title(f"{cluster.capitalize()} {spec['label'].lower()} balance")
+    plt.ylabel(f"{spec['label']} ({spec['unit']})")
     plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
     plt.grid()
     if figsave is not None:
         plt.savefig(figsave, format="pdf", bbox_inches="tight")
     plt.show()
-        
-        
+    return balances
+
+
+def carrier_balance_batch(results, carrier, cluster, processes=None, zero_nodes='yes', cached='no'):
+    # Balance of a carrier in a cluster for many scenarios at once (pf.batch_balances: the 
+    # result files are loaded and balanced in a process pool), shown in one table with a 
+    # column per scenario. results : {name: path or result} or a list of results
+    spec = pf.CARRIERS[carrier]
+    color = CLUSTER_COLORS.get(cluster, 'on_white')
+    totals, summary = pf.batch_balances(results, carriers=[carrier], processes=processes, cached=cached)
+    
+    print(colored(f"\n=== {spec['label']} flows [{spec['total']}] ===", 'black', color))
+    display(pf.batch_balance_table(totals, carrier, cluster, zero_nodes=zero_nodes).round(3))
+    
+    print(colored(f"\n=== {spec['label']} Balance ===", 'black', color))
+    summary = summary.xs((carrier, cluster), level=["Carrier", "Cluster"]).add_suffix(f" [{spec['total']}]")
+    display(summary.round(2))
+    return totals, summary
+
+
+#%% ELECTRICITY OFFSHORE BALANCE: 
+
+def elec_offshore_balance(model, e_obj=None, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # e_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('elec_offshore_balance', 'e_obj', e_obj)
+    carrier_balance(model, 'electricity', 'OFFSHORE', zoom, figsize, zero_nodes, figsave)
+
+
 #%% ELECTRICITY OFFSHORE HYPEREDGE: 
 
 def elec_offshore_hyperedge(e_obj, model, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
@@ -1103,97 +1113,12 @@ def elec_offshore_hyperedge(e_obj, model, zoom = None, figsize = (12, 6), zero_n
     
 #%% ELECTRICITY ZEEBRUGGE BALANCE: 
 
-def elec_zeebrugge_balance(model, e_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
-    
-    prod_tables = []
-    cons_tables = [] 
-    flex_tables_storage = []
-    bal_tables = []
-
-    for i, m in enumerate(model):
-
-        # Production 
-        _, prod = node_stat(m, ['ZEEBRUGGE'], variable='e_produced',all_var='no', zero_node=zero_nodes, show ='no')  
-        elec_prod = pf.remove_string(prod,' (ZEEBRUGGE)')
-        prod_tables.append(table(elec_prod,show='no'))
-        elec_prod_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.ZEEBRUGGE.e_produced)
-
-        # Consommation
-        _, cons = node_stat(m, ['ZEEBRUGGE'], variable='e_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')  
-        elec_cons = pf.remove_string(cons,' (ZEEBRUGGE)')
-        cons_tables.append(table(elec_cons,show='no'))  
-        elec_cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(e_obj[i].variables.ZEEBRUGGE.e_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['ZEEBRUGGE'], variable=['e_charged','e_discharged'], all_var='no', zero_node=zero_nodes, show ='no')
-        elec_storage = pf.remove_string(storage,' (ZEEBRUGGE)')  
-        flex_tables_storage.append(table(elec_storage,show='no')) 
-        elec_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(e_obj[i].variables.ZEEBRUGGE.e_charged))
-        elec_discharged_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.ZEEBRUGGE.e_discharged)
-        
-        ##### BALANCE
-        elec_balance = convert(e_obj[i].prod.ZEEBRUGGE.e_balanced.BALANCE)
-        elec_balance = pf.merge_dictionaries_replace_keys(elec_balance, name=['ZEEBRUGGE BALANCE'])
-        bal_tables.append(elec_balance)
-        elec_balance_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.ZEEBRUGGE.e_balanced.BALANCE) 
-        
-
-    print(colored('\n=== Electricity production ===', 'black', 'on_cyan'))
-    for t in prod_tables:
-        display(t)
+def elec_zeebrugge_balance(model, e_obj=None, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # e_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('elec_zeebrugge_balance', 'e_obj', e_obj)
+    carrier_balance(model, 'electricity', 'ZEEBRUGGE', zoom, figsize, zero_nodes, figsave)
 
-    print(colored('\n=== Electricity consumption ===', 'black', 'on_cyan'))
-    for t in cons_tables:
-        display(t)
 
-    print(colored('\n=== Storage charged/discharged ===', 'black', 'on_cyan'))
-    for t in flex_tables_storage:
-        display(t)
-        
-    print(colored('\n=== Electricity Balance ===', 'black', 'on_cyan'))
-    for t in bal_tables:
-        v = (table(pf.transform_dict_into_table(t, column_name="Electricity [TWh]", zero_print="yes").T.round(2)))
-        
-        
-    if zoom is not None:
-        elec_prod_over_time = pf.zoom_with_timestep(elec_prod_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        elec_cons_over_time = pf.zoom_with_timestep(elec_cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_charged_over_time = pf.zoom_with_timestep(elec_charged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_discharged_over_time = pf.zoom_with_timestep(elec_discharged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_balance_over_time = pf.zoom_with_timestep(elec_balance_over_time, zero_nodes=zero_nodes, zoom=zoom)
-    
-    plt.figure(figsize=figsize)
-    for key in elec_prod_over_time.keys():
-        plt.plot(elec_prod_over_time[key], label=f'{key}')
-        
-    for key in elec_cons_over_time.keys():
-        plt.plot(elec_cons_over_time[key], label=f'{key}')
-    
-    for key in elec_charged_over_time.keys():
-        plt.plot(elec_charged_over_time[key], label=f'Battery charged')
-    
-    plt.plot(elec_balance_over_time, label=f'Offshore balance', linestyle='--')
-        
-    for key in elec_discharged_over_time.keys():
-        plt.plot(elec_discharged_over_time[key], label=f'Battery discharged')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(elec_discharged_over_time[key]), 1), rotation=90)
-            
-        else:
-            plt.xlabel('Time (hours)')
-        
-    plt.title('Zeebrugge electricity balance')
-    
-        
-    plt.ylabel('Electricity (GWh)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-        
-        
 #%% ELECTRICITY ZEEBRUGGE HYPEREDGE: 
 
 def elec_zeebrugge_hyperedge(e_obj, model, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
@@ -1297,120 +1222,12 @@ def elec_zeebrugge_hyperedge(e_obj, model, zoom = None, figsize = (12, 6), zero_
         
 #%% ELECTRICITY INLAND BALANCE: 
 
-def elec_inland_balance(model, e_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):  
+def elec_inland_balance(model, e_obj=None, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # e_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('elec_inland_balance', 'e_obj', e_obj)
+    carrier_balance(model, 'electricity', 'INLAND', zoom, figsize, zero_nodes, figsave)
 
-    prod_tables = []
-    cons_tables = []
-    flex_tables_load = []
-    flex_tables_storage = []
-    bal_tables = []
 
-    for i, m in enumerate(model):
-
-        # Production 
-        _, prod = node_stat(m, ['INLAND'], variable='e_produced',all_var='no', zero_node=zero_nodes, show ='no')  
-        elec_prod = pf.remove_string(prod,' (INLAND)')
-        prod_tables.append(table(elec_prod,show='no'))
-        elec_prod_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.INLAND.e_produced)
-
-        # Consommation
-        _, cons = node_stat(m, ['INLAND'], variable='e_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')  
-        elec_cons = pf.remove_string(cons,' (INLAND)')
-        cons_tables.append(table(elec_cons,show='no'))  
-        elec_cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(e_obj[i].variables.INLAND.e_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['INLAND'], variable=['e_charged','e_discharged'], all_var='no', zero_node=zero_nodes, show ='no')
-        elec_storage = pf.remove_string(storage,' (INLAND)')  
-        flex_tables_storage.append(table(elec_storage,show='no'))
-        elec_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(e_obj[i].variables.INLAND.e_charged))
-        elec_discharged_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.INLAND.e_discharged)
-        
-        # Load shifting 
-        _, load_inc = node_stat(m, ['INLAND'], variable='load_increase', all_var='no', zero_node=zero_nodes, show ='no')
-        _, load_red = node_stat(m, ['INLAND'], variable='load_reduction', all_var='no', zero_node=zero_nodes, show ='no') 
-        elec_load_inc = pf.remove_string(load_inc,' (INLAND)')
-        elec_load_red = pf.remove_string(load_red,' (INLAND)')
-        elec_load = pf.merge_dictionaries(elec_load_inc, elec_load_red)
-        flex_tables_load.append(table(elec_load,show='no'))
-        elec_load_inc_over_time = pf.negate_values(pf.convert_mmr_to_dict(e_obj[i].variables.INLAND.load_increase))
-        elec_load_red_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.INLAND.load_reduction) 
-        
-        ##### BALANCE
-        elec_balance = convert(e_obj[i].prod.INLAND.e_balanced.BALANCE)
-        elec_balance = pf.merge_dictionaries_replace_keys(elec_balance, name=['INLAND BALANCE'])
-        bal_tables.append(elec_balance)
-        elec_balance_over_time = pf.convert_mmr_to_dict(e_obj[i].variables.INLAND.e_balanced.BALANCE) 
-
-
-
-    print(colored('\n=== Electricity production ===', 'black', 'on_red'))
-    for t in prod_tables:
-        display(t)
-
-    print(colored('\n=== Electricity consumption ===', 'black', 'on_red'))
-    for t in cons_tables:
-        display(t)
-
-    print(colored('\n=== Storage charged/discharged ===', 'black', 'on_red'))
-    for t in flex_tables_storage:
-        display(t)
-        
-    print(colored('\n=== Load shifting/shedding ===', 'black', 'on_red'))
-    for t in flex_tables_load:
-        display(t)
-    
-    print(colored('\n=== Electricity Balance ===', 'black', 'on_red'))
-    for t in bal_tables:
-        v = (table(pf.transform_dict_into_table(t, column_name="Electricity [TWh]", zero_print="yes").T.round(2))) 
-    
-    if zoom is not None:
-        elec_prod_over_time = pf.zoom_with_timestep(elec_prod_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        elec_cons_over_time = pf.zoom_with_timestep(elec_cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_charged_over_time = pf.zoom_with_timestep(elec_charged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_discharged_over_time = pf.zoom_with_timestep(elec_discharged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_load_inc_over_time = pf.zoom_with_timestep(elec_load_inc_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_load_red_over_time = pf.zoom_with_timestep(elec_load_red_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        elec_balance_over_time = pf.zoom_with_timestep(elec_balance_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        
-    
-    plt.figure(figsize=figsize)
-    for key in elec_prod_over_time.keys():
-        plt.plot(elec_prod_over_time[key], label=f'{key}')
-        
-    for key in elec_cons_over_time.keys():
-        plt.plot(elec_cons_over_time[key], label=f'{key}')
-    
-    for key in elec_charged_over_time.keys():
-        plt.plot(elec_charged_over_time[key], label=f'Battery charged')
-        
-    for key in elec_discharged_over_time.keys():
-        plt.plot(elec_discharged_over_time[key], label=f'Battery discharged')
-        
-    plt.plot(elec_balance_over_time, label=f'Inland balance', linestyle='--')
-    
-    for key in elec_load_inc_over_time.keys():
-        plt.plot(elec_load_inc_over_time[key], label=f'{key}')
-        
-    for key in elec_load_red_over_time.keys():
-        plt.plot(elec_load_red_over_time[key], label=f'{key}')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(elec_load_red_over_time[key]), 1), rotation=90)
-            
-        else:
-            plt.xlabel('Time (hours)')
-        
-    plt.title('Inland electricity balance')
-    
-        
-    plt.ylabel('Electricity (GWh)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-        
 #%% ELECTRICITY INLAND HYPEREDGE: 
 
 def elec_inland_hyperedge(model, e_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
@@ -1523,96 +1340,12 @@ def elec_inland_hyperedge(model, e_obj, zoom = None, figsize = (12, 6), zero_nod
         
 #%% HYDROGEN OFFSHORE BALANCE:     
 
-def h2_offshore_balance(model, h2_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
-    
-    prod_tables = []
-    cons_tables = [] 
-    flex_tables_storage = [] 
-    bal_tables = [] 
-    
-    for i, m in enumerate(model):
-
-        # Production 
-        _, prod = node_stat(m, ['OFFSHORE'], variable='h2_produced', all_var='no', zero_node=zero_nodes, show='no')  
-        h2_prod = pf.remove_string(prod, ' (OFFSHORE)')
-        prod_tables.append(table(h2_prod, show='no'))
-        h2_prod_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.OFFSHORE.h2_produced)
-
-        # Consumption
-        _, cons = node_stat(m, ['OFFSHORE'], variable='h2_consumed', all_var='no', zero_node=zero_nodes, show='no', just_prod='yes')  
-        h2_cons = pf.remove_string(cons, ' (OFFSHORE)')
-        cons_tables.append(table(h2_cons, show='no'))  
-        h2_cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.OFFSHORE.h2_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['OFFSHORE'], variable=['h2_charged', 'h2_discharged'], all_var='no', zero_node=zero_nodes, show='no')
-        h2_storage = pf.remove_string(storage, ' (OFFSHORE)')  
-        flex_tables_storage.append(table(h2_storage, show='no'))  
-        h2_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.OFFSHORE.h2_charged))
-        h2_discharged_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.OFFSHORE.h2_discharged)
-        
-        ##### Balance 
-        h2_balance = convert(h2_obj[i].prod.OFFSHORE.h2_balanced.BALANCE)  
-        h2_balance = pf.merge_dictionaries_replace_keys(h2_balance, name=['OFFSHORE BALANCE' ]) 
-        bal_tables.append((h2_balance)) 
-        h2_balance_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.OFFSHORE.h2_balanced.BALANCE) 
-        
-
-    print(colored('\n=== Hydrogen production ===', 'black', 'on_green'))
-    for t in prod_tables:
-        display(t)
+def h2_offshore_balance(model, h2_obj=None, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # h2_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('h2_offshore_balance', 'h2_obj', h2_obj)
+    carrier_balance(model, 'hydrogen', 'OFFSHORE', zoom, figsize, zero_nodes, figsave)
 
-    print(colored('\n=== Hydrogen consumption ===', 'black', 'on_green'))
-    for t in cons_tables:
-        display(t)
 
-    print(colored('\n=== Hydrogen storage charged/discharged ===', 'black', 'on_green'))
-    for t in flex_tables_storage:
-        display(t)   
-        
-    print(colored('\n=== Hydrogen Balance ===', 'black', 'on_green'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Hydrogen [TWh]", zero_print="yes").T.round(2))       
-        
-    if zoom is not None:
-        h2_prod_over_time = pf.zoom_with_timestep(h2_prod_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        h2_cons_over_time = pf.zoom_with_timestep(h2_cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_charged_over_time = pf.zoom_with_timestep(h2_charged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_discharged_over_time = pf.zoom_with_timestep(h2_discharged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_balance_over_time = pf.zoom_with_timestep(h2_balance_over_time, zero_nodes=zero_nodes, zoom=zoom)
-    
-    
-    plt.figure(figsize=figsize)
-    for key in h2_prod_over_time.keys():
-        plt.plot(h2_prod_over_time[key], label=f'{key}')
-        
-    for key in h2_cons_over_time.keys():
-        plt.plot(h2_cons_over_time[key], label=f'{key}')
-    
-    for key in h2_charged_over_time.keys():
-        plt.plot(h2_charged_over_time[key], label=f'Battery charged')
-        
-    plt.plot(h2_balance_over_time, label=f'Offshore balance', linestyle='--')
-        
-    for key in h2_discharged_over_time.keys():
-        plt.plot(h2_discharged_over_time[key], label=f'Battery discharged')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(h2_discharged_over_time[key]), 1), rotation=90)
-            
-        else:
-            plt.xlabel('Time (hours)')
-        
-    plt.title('Offshore hydrogen balance')
-    
-    plt.ylabel('Hydrogen (GWh)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-        
-            
 #%% HYDROGEN OFFSHORE HYPEREDGE: 
     
 def h2_offshore_hyperedge(model, h2_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
@@ -1679,120 +1412,12 @@ def h2_offshore_hyperedge(model, h2_obj, zoom = None, figsize = (12, 6), zero_no
 
 #%% HYDROGEN ZEEBRUGGE BALANCE:
 
-def h2_zeebrugge_balance(model, h2_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
-    
-    prod_tables = []
-    cons_tables = [] 
-    flex_tables_storage = []
-    imp_tables = []
-    exp_tables = []
-    bal_tables = [] 
+def h2_zeebrugge_balance(model, h2_obj=None, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # h2_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('h2_zeebrugge_balance', 'h2_obj', h2_obj)
+    carrier_balance(model, 'hydrogen', 'ZEEBRUGGE', zoom, figsize, zero_nodes, figsave)
 
-    for i, m in enumerate(model):
-
-        # Production 
-        _, prod = node_stat(m, ['ZEEBRUGGE'], variable='h2_produced',all_var='no', zero_node=zero_nodes, show ='no')  
-        h2_prod = pf.remove_string(prod,' (ZEEBRUGGE)')
-        prod_tables.append(table(h2_prod,show='no'))
-        h2_prod_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.ZEEBRUGGE.h2_produced)
-
-        # Consommation
-        _, cons = node_stat(m, ['ZEEBRUGGE'], variable='h2_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')  
-        h2_cons = pf.remove_string(cons,' (ZEEBRUGGE)')
-        cons_tables.append(table(h2_cons,show='no'))  
-        h2_cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.ZEEBRUGGE.h2_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['ZEEBRUGGE'], variable=['h2_charged','h2_discharged'], all_var='no', zero_node=zero_nodes, show ='no')
-        h2_storage = pf.remove_string(storage,' (ZEEBRUGGE)')  
-        flex_tables_storage.append(table(h2_storage,show='no'))
-        h2_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.ZEEBRUGGE.h2_charged))
-        h2_discharged_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.ZEEBRUGGE.h2_discharged) 
-        
-        # Import 
-        _, imp = node_stat(m, ['ZEEBRUGGE'], variable='h2_imported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        h2_imp = pf.remove_string(imp,' (ZEEBRUGGE)')
-        imp_tables.append(table(h2_imp,show='no'))
-        h2_imp_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.ZEEBRUGGE.h2_imported)
-        
-        # Export 
-        _, exp = node_stat(m, ['ZEEBRUGGE'], variable='h2_exported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        h2_exp = pf.remove_string(exp,' (ZEEBRUGGE)')
-        exp_tables.append(table(h2_exp,show='no'))
-        h2_exp_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.ZEEBRUGGE.h2_exported))
-        
-        ##### Balance 
-        h2_balance = convert(h2_obj[i].prod.OFFSHORE.h2_balanced.BALANCE)  
-        h2_balance = pf.merge_dictionaries_replace_keys(h2_balance, name=['OFFSHORE BALANCE' ]) 
-        bal_tables.append((h2_balance)) 
-        h2_balance_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.ZEEBRUGGE.h2_balanced.BALANCE) 
-        
-        
-
-    print(colored('\n=== Hydrogen production ===', 'black', 'on_cyan'))
-    for t in prod_tables:
-        display(t)
-
-    print(colored('\n=== Hydrogen consumption ===', 'black', 'on_cyan'))
-    for t in cons_tables:
-        display(t)
-
-    print(colored('\n=== Storage charged/discharged ===', 'black', 'on_cyan'))
-    for t in flex_tables_storage:
-        display(t)
-        
-    print(colored('\n=== Hydrogen Import ===', 'black', 'on_cyan'))
-    for t in imp_tables:
-        display(t)
-        
-    print(colored('\n=== Hydrogen Export ===', 'black', 'on_cyan'))
-    for t in exp_tables:
-        display(t)
-        
-    print(colored('\n=== Hydrogen Balance ===', 'black', 'on_cyan'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Hydrogen [TWh]", zero_print="yes").T.round(2))
 
-    if zoom is not None:
-        h2_prod_over_time = pf.zoom_with_timestep(h2_prod_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        h2_cons_over_time = pf.zoom_with_timestep(h2_cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_charged_over_time = pf.zoom_with_timestep(h2_charged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_discharged_over_time = pf.zoom_with_timestep(h2_discharged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_balance_over_time = pf.zoom_with_timestep(h2_balance_over_time, zero_nodes=zero_nodes, zoom=zoom)
-    
-    
-    plt.figure(figsize=figsize)
-    for key in h2_prod_over_time.keys():
-        plt.plot(h2_prod_over_time[key], label=f'{key}')
-        
-    for key in h2_cons_over_time.keys():
-        plt.plot(h2_cons_over_time[key], label=f'{key}')
-    
-    for key in h2_charged_over_time.keys():
-        plt.plot(h2_charged_over_time[key], label=f'Battery charged')
-        
-    plt.plot(h2_balance_over_time, label=f'Zeebrugge balance', linestyle='--')
-        
-    for key in h2_discharged_over_time.keys():
-        plt.plot(h2_discharged_over_time[key], label=f'Battery discharged')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(h2_discharged_over_time[key]), 1), rotation=90)
-            
-        else:
-            plt.xlabel('Time (hours)')
-        
-    plt.title('Zeebrugge hydrogen balance')
-    
-        
-    plt.ylabel('Hydrogen (GWh)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-    
-    
 #%% HYDROGEN ZEEBRUGGE HYPEREDGE:
 
 def h2_zeebrugge_hyperedge(model, h2_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
@@ -1863,121 +1488,12 @@ def h2_zeebrugge_hyperedge(model, h2_obj, zoom = None, figsize = (12, 6), zero_n
 
 #%% HYDROGEN INLAND BALANCE:
 
-def h2_inland_balance(model, h2_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
-    
-    prod_tables = []
-    cons_tables = []
-    imp_tables = []
-    exp_tables = []
-    flex_tables_storage = []
-    bal_tables = []
+def h2_inland_balance(model, h2_obj=None, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # h2_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('h2_inland_balance', 'h2_obj', h2_obj)
+    carrier_balance(model, 'hydrogen', 'INLAND', zoom, figsize, zero_nodes, figsave)
+
 
-    for i, m in enumerate(model):
-
-        # Production 
-        _, prod = node_stat(m, ['INLAND'], variable='h2_produced',all_var='no', zero_node=zero_nodes, show ='no')  
-        h2_prod = pf.remove_string(prod,' (INLAND)')
-        prod_tables.append(table(h2_prod,show='no'))
-        h2_prod_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.INLAND.h2_produced)
-
-        # Consommation
-        _, cons = node_stat(m, ['INLAND'], variable='h2_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')  
-        h2_cons = pf.remove_string(cons,' (INLAND)')
-        cons_tables.append(table(h2_cons,show='no'))  
-        h2_cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.INLAND.h2_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['INLAND'], variable=['h2_charged','h2_discharged'], all_var='no', zero_node=zero_nodes, show ='no')
-        h2_storage = pf.remove_string(storage,' (INLAND)')  
-        flex_tables_storage.append(table(h2_storage,show='no'))
-        h2_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.INLAND.h2_charged))
-        h2_discharged_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.INLAND.h2_discharged)
-        
-        # Import 
-        _, imp = node_stat(m, ['INLAND'], variable='h2_imported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        h2_imp = pf.remove_string(imp,' (INLAND)')  
-        imp_tables.append(table(h2_imp,show='no'))
-        h2_imp_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.INLAND.h2_imported)
-        
-        # Export 
-        _, exp = node_stat(m, ['INLAND'], variable='h2_exported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        h2_exp = pf.remove_string(exp,' (INLAND)')  
-        exp_tables.append(table(h2_exp,show='no'))
-        h2_exp_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2_obj[i].variables.INLAND.h2_exported))
-
-        ##### Balance
-        h2_balance = convert(h2_obj[i].prod.INLAND.h2_balanced.BALANCE)  
-        h2_balance = pf.merge_dictionaries_replace_keys(h2_balance, name=['INLAND BALANCE' ]) 
-        bal_tables.append((h2_balance)) 
-        h2_balance_over_time = pf.convert_mmr_to_dict(h2_obj[i].variables.INLAND.h2_balanced.BALANCE)
-
-    print(colored('\n=== Hydrogen production ===', 'black', 'on_red'))
-    for t in prod_tables:
-        display(t)
-
-    print(colored('\n=== Hydrogen consumption ===', 'black', 'on_red'))
-    for t in cons_tables:
-        display(t)
-
-    print(colored('\n=== Storage charged/discharged ===', 'black', 'on_red'))
-    for t in flex_tables_storage:
-        display(t)
-        
-    print(colored('\n=== Hydrogen Import ===', 'black', 'on_red'))
-    for t in imp_tables:
-        display(t)
-        
-    print(colored('\n=== Hydrogen Export ===', 'black', 'on_red'))
-    for t in exp_tables:
-        display(t) 
-    
-    print(colored('\n=== Hydrogen Balance ===', 'black', 'on_red'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Hydrogen [TWh]", zero_print="yes").T.round(2))
-        
-    if zoom is not None:
-        h2_prod_over_time = pf.zoom_with_timestep(h2_prod_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        h2_cons_over_time = pf.zoom_with_timestep(h2_cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_charged_over_time = pf.zoom_with_timestep(h2_charged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_discharged_over_time = pf.zoom_with_timestep(h2_discharged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_imp_over_time = pf.zoom_with_timestep(h2_imp_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_exp_over_time = pf.zoom_with_timestep(h2_exp_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_balance_over_time = pf.zoom_with_timestep(h2_balance_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        
-    plt.figure(figsize=figsize)
-    for key in h2_prod_over_time.keys():
-        plt.plot(h2_prod_over_time[key], label=f'{key}')
-        
-    for key in h2_cons_over_time.keys():
-        plt.plot(h2_cons_over_time[key], label=f'{key}')
-        
-    for key in h2_charged_over_time.keys():
-        plt.plot(h2_charged_over_time[key], label=f'Battery charged')
-    
-    plt.plot(h2_balance_over_time, label=f'Inland balance', linestyle='--')
-    
-    for key in h2_exp_over_time.keys():
-        plt.plot(h2_exp_over_time[key])
-        
-    for key in h2_imp_over_time.keys():
-        plt.plot(h2_imp_over_time[key] )
-    
-    for key in h2_discharged_over_time.keys():
-        plt.plot(h2_discharged_over_time[key], label=f'Battery discharged')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(h2_discharged_over_time[key]), 1), rotation=90)
-        else:
-            plt.xlabel('Time (hours)')
-            
-    plt.title('Inland hydrogen balance')
-    plt.ylabel('Hydrogen (GWh)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()  
-        
 #%% HYDROGEN INLAND HYPEREDGE:
 
 def h2_inland_hyperedge(model, h2_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
@@ -2071,92 +1587,12 @@ def h2_inland_hyperedge(model, h2_obj, zoom = None, figsize = (12, 6), zero_node
     
 #%% NATURAL GAS ZEEBRUGGE BALANCE:    
 
-def ng_zeebrugge_balance(model, ng_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
-    
-    prod_tables = [] 
-    imp_tables = []
-    exp_tables = []
-    bal_tables = []
+def ng_zeebrugge_balance(model, ng_obj=None, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
+    # ng_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('ng_zeebrugge_balance', 'ng_obj', ng_obj)
+    carrier_balance(model, 'natural_gas', 'ZEEBRUGGE', zoom, figsize, zero_nodes, figsave)
 
-    for i, m in enumerate(model):
 
-        # Production 
-        _, prod = node_stat(m, ['ZEEBRUGGE'], variable='ng_produced',all_var='no', zero_node=zero_nodes, show ='no')  
-        ng_prod = pf.remove_string(prod,' (ZEEBRUGGE)')
-        prod_tables.append(table(ng_prod,show='no')) 
-        prod_over_time = pf.convert_mmr_to_dict(ng_obj[i].variables.ZEEBRUGGE.ng_produced)
-        
-        # Import 
-        _, imp = node_stat(m, ['ZEEBRUGGE'], variable='ng_imported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        ng_imp = pf.remove_string(imp,' (ZEEBRUGGE)')
-        imp_tables.append(table(ng_imp,show='no'))
-        imp_over_time = pf.convert_mmr_to_dict(ng_obj[i].variables.ZEEBRUGGE.ng_imported)
-        
-        # Export 
-        _, exp = node_stat(m, ['ZEEBRUGGE'], variable='ng_exported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        ng_exp = pf.remove_string(exp,' (ZEEBRUGGE)')
-        exp_tables.append(table(ng_exp,show='no'))
-        exp_over_time = pf.negate_values(pf.convert_mmr_to_dict(ng_obj[i].variables.ZEEBRUGGE.ng_exported))
-        
-        ##### Balance
-        ng_balance = convert(ng_obj[i].prod.ZEEBRUGGE.ng_balanced.BALANCE)  
-        ng_balance = pf.merge_dictionaries_replace_keys(ng_balance, name=['ZEEBRUGGE BALANCE' ]) 
-        bal_tables.append((ng_balance)) 
-        bal_over_time = pf.convert_mmr_to_dict(ng_obj[i].variables.ZEEBRUGGE.ng_balanced.BALANCE)
-        
-
-    print(colored('\n=== Natural gas production ===', 'black', 'on_cyan'))
-    for t in prod_tables:
-        display(t) 
-        
-    print(colored('\n=== Natural gas Import ===', 'black', 'on_cyan'))
-    for t in imp_tables:
-        display(t)
-        
-    print(colored('\n=== Natural gas Export ===', 'black', 'on_cyan'))
-    for t in exp_tables:
-        display(t)
-        
-    print(colored('\n=== Natural gas Balance ===', 'black', 'on_cyan'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Natural gas [TWh]", zero_print="yes").T.round(2))
-        
-        
-    if zoom is not None:
-        prod_over_time = pf.zoom_with_timestep(prod_over_time, zero_nodes='yes', zoom=zoom)  
-        imp_over_time = pf.zoom_with_timestep(imp_over_time, zero_nodes='yes', zoom=zoom)
-        exp_over_time = pf.zoom_with_timestep(exp_over_time, zero_nodes='yes', zoom=zoom)
-        bal_over_time = pf.zoom_with_timestep(bal_over_time, zero_nodes='yes', zoom=zoom)
-        
-    plt.figure(figsize=figsize)
-    
-    for key in prod_over_time.keys():
-        plt.plot(prod_over_time[key], label=f'{key}')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(prod_over_time[key]), 1), rotation=90)
-        else:
-            plt.xlabel('Time (hours)')
-    
-    for key in imp_over_time.keys():
-        plt.plot(imp_over_time[key], label=f'{key}')
-        
-    for key in exp_over_time.keys():
-        plt.plot(exp_over_time[key], label=f'{key}')
-        
-    plt.plot(bal_over_time, label=f'Zeebrugge balance', linestyle='--')
-    
-    
-        
-    plt.title('Zeebrugge natural gas balance')
-    plt.ylabel('Natural gas (GWh)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-    
-        
 #%% NATURAL GAS ZEEBRUGGE HYPEREDGE:  
 
 def ng_zeebrugge_hyperedge(model, ng_obj, zoom = None, figsize = (12, 6), zero_nodes='yes', figsave = None):
@@ -2221,126 +1657,12 @@ def ng_zeebrugge_hyperedge(model, ng_obj, zoom = None, figsize = (12, 6), zero_n
 
 #%% NATURAL GAS INLAND BALANCE:
 
-def ng_inland_balance(model, ng_obj, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
-    
-    prod_tables = []
-    cons_tables = []
-    imp_tables = []
-    exp_tables = []
-    flex_tables_storage = []
-    bal_tables = []
-
-
-    for i, m in enumerate(model):
+def ng_inland_balance(model, ng_obj=None, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
+    # ng_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('ng_inland_balance', 'ng_obj', ng_obj)
+    carrier_balance(model, 'natural_gas', 'INLAND', zoom, figsize, zero_nodes, figsave)
 
-        # Production 
-        _, prod = node_stat(m, ['INLAND'], variable='ng_produced',all_var='no', zero_node=zero_nodes, show ='no')  
-        ng_prod = pf.remove_string(prod,' (INLAND)')
-        prod_tables.append(table(ng_prod,show='no'))
-        prod_over_time = pf.convert_mmr_to_dict(ng_obj[i].variables.INLAND.ng_produced)
 
-        # Consommation
-        _, cons = node_stat(m, ['INLAND'], variable='ng_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')  
-        ng_cons = pf.remove_string(cons,' (INLAND)')
-        cons_tables.append(table(ng_cons,show='no'))  
-        cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(ng_obj[i].variables.INLAND.ng_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['INLAND'], variable=['ng_charged','ng_discharged'], all_var='no', zero_node=zero_nodes, show ='no')
-        ng_storage = pf.remove_string(storage,' (INLAND)')  
-        flex_tables_storage.append(table(ng_storage,show='no'))
-        ng_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(ng_obj[i].variables.INLAND.ng_charged))
-        ng_discharged_over_time = pf.convert_mmr_to_dict(ng_obj[i].variables.INLAND.ng_discharged)
-        
-        # Import 
-        _, imp = node_stat(m, ['INLAND'], variable='ng_imported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        ng_imp = pf.remove_string(imp,' (INLAND)')  
-        imp_tables.append(table(ng_imp,show='no'))
-        ng_imp_over_time = pf.convert_mmr_to_dict(ng_obj[i].variables.INLAND.ng_imported)
-        
-        # Export 
-        _, exp = node_stat(m, ['INLAND'], variable='ng_exported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes')
-        ng_exp = pf.remove_string(exp,' (INLAND)')  
-        exp_tables.append(table(ng_exp,show='no'))
-        ng_exp_over_time = pf.negate_values(pf.convert_mmr_to_dict(ng_obj[i].variables.INLAND.ng_exported))
-        
-        ##### Balance
-        ng_balance = convert(ng_obj[i].prod.INLAND.ng_balanced.BALANCE)  
-        ng_balance = pf.merge_dictionaries_replace_keys(ng_balance, name=['INLAND BALANCE' ]) 
-        bal_tables.append((ng_balance)) 
-        ng_balance_over_time = pf.convert_mmr_to_dict(ng_obj[i].variables.INLAND.ng_balanced.BALANCE)
-
-
-    print(colored('\n=== Natural gas production ===', 'black', 'on_red'))
-    for t in prod_tables:
-        display(t)
-
-    print(colored('\n=== Natural gas consumption ===', 'black', 'on_red'))
-    for t in cons_tables:
-        display(t)
-
-    print(colored('\n=== Storage charged/discharged ===', 'black', 'on_red'))
-    for t in flex_tables_storage:
-        display(t)
-        
-    print(colored('\n=== Natural gas Import ===', 'black', 'on_red'))
-    for t in imp_tables:
-        display(t)
-        
-    print(colored('\n=== Natural gas Export ===', 'black', 'on_red'))
-    for t in exp_tables:
-        display(t)
-        
-    print(colored('\n=== Natural gas Balance ===', 'black', 'on_red'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Natural gas [TWh]", zero_print="yes").T.round(2))
-        
-        
-    if zoom is not None:
-        prod_over_time = pf.zoom_with_timestep(prod_over_time, zero_nodes='yes', zoom=zoom)  
-        cons_over_time = pf.zoom_with_timestep(cons_over_time, zero_nodes='yes', zoom=zoom)
-        ng_charged_over_time = pf.zoom_with_timestep(ng_charged_over_time, zero_nodes='yes', zoom=zoom)
-        ng_discharged_over_time = pf.zoom_with_timestep(ng_discharged_over_time, zero_nodes='yes', zoom=zoom)
-        ng_imp_over_time = pf.zoom_with_timestep(ng_imp_over_time, zero_nodes='yes', zoom=zoom)
-        ng_exp_over_time = pf.zoom_with_timestep(ng_exp_over_time, zero_nodes='yes', zoom=zoom)
-        ng_balance_over_time = pf.zoom_with_timestep(ng_balance_over_time, zero_nodes='yes', zoom=zoom)
-        
-    plt.figure(figsize=figsize)
-    
-    for key in prod_over_time.keys():
-        plt.plot(prod_over_time[key], label=f'{key}')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(prod_over_time[key]), 1), rotation=90)
-        else:
-            plt.xlabel('Time (hours)')
-            
-    for key in cons_over_time.keys():
-        plt.plot(cons_over_time[key], label=f'{key}')
-        
-    for key in ng_charged_over_time.keys():
-        plt.plot(ng_charged_over_time[key], label=f'Battery charged')
-        
-    plt.plot(ng_balance_over_time, label=f'Inland balance', linestyle='--')
-    
-    for key in ng_exp_over_time.keys():
-        plt.plot(ng_exp_over_time[key], label=f'{key}')
-        
-    for key in ng_imp_over_time.keys():
-        plt.plot(ng_imp_over_time[key], label=f'{key}')
-        
-    for key in ng_discharged_over_time.keys():
-        plt.plot(ng_discharged_over_time[key], label=f'Battery discharged')
-        
-    plt.title('Inland natural gas balance')
-    plt.ylabel('Natural gas (GWh)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-        
-        
 #%% NATURAL GAS INLAND HYPEREDGE:
 
 def ng_inland_hyperedge(model, ng_obj, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
@@ -2438,73 +1760,12 @@ def ng_inland_hyperedge(model, ng_obj, zoom= 'week', figsize=(12, 5), zero_nodes
 
 #%% CARBON DIOXIDE ZEEBRUGGE BALANCE:
 
-def co2_zeebrugge_balance(model, co2_obj, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
-    
-    capt_tables = []
-    cons_tables = []  
-    bal_tables = []
-
-    for i, m in enumerate(model):
+def co2_zeebrugge_balance(model, co2_obj=None, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
+    # co2_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('co2_zeebrugge_balance', 'co2_obj', co2_obj)
+    carrier_balance(model, 'co2', 'ZEEBRUGGE', zoom, figsize, zero_nodes, figsave)
 
-        # CO2 Capture 
-        _, capt = node_stat(m, ['ZEEBRUGGE'], variable='co2_captured',all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes', type_node='kton')  
-        co2_capt = pf.remove_string(capt,' (ZEEBRUGGE)')
-        capt_tables.append(table(co2_capt,show='no'))
-        capt_over_time = pf.convert_mmr_to_dict(co2_obj[i].variables.ZEEBRUGGE.co2_captured)
 
-        # CO2 Consumption
-        _, cons = node_stat(m, ['ZEEBRUGGE'], variable='co2_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes', type_node='kton')  
-        co2_cons = pf.remove_string(cons,' (ZEEBRUGGE)')
-        cons_tables.append(table(co2_cons,show='no'))  
-        cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(co2_obj[i].variables.ZEEBRUGGE.co2_consumed))
-        
-        # Balance
-        co2_balance = convert(co2_obj[i].prod.ZEEBRUGGE.co2_balanced.BALANCE)
-        co2_balance = pf.merge_dictionaries_replace_keys(co2_balance, name=['ZEEBRUGGE BALANCE'])
-        bal_tables.append(co2_balance)
-        bal_over_time = pf.convert_mmr_to_dict(co2_obj[i].variables.ZEEBRUGGE.co2_balanced.BALANCE)
-
-    print(colored('\n=== Carbon dioxide captured ===', 'black', 'on_cyan'))
-    for t in capt_tables:
-        display(t)
-
-    print(colored('\n=== Carbon dioxide consumption ===', 'black', 'on_cyan'))
-    for t in cons_tables:
-        display(t)
-        
-    print(colored('\n=== Carbon dioxide Balance ===', 'black', 'on_cyan'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Carbon dioxide [Mton]", zero_print="yes").T.round(2))
-        
-    if zoom is not None:
-        capt_over_time = pf.zoom_with_timestep(capt_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        cons_over_time = pf.zoom_with_timestep(cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        bal_over_time = pf.zoom_with_timestep(bal_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        
-    plt.figure(figsize=figsize)
-    for key in capt_over_time.keys():
-        plt.plot(capt_over_time[key], label=f'{key}')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(capt_over_time[key]), 1), rotation=90)
-        else:
-            plt.xlabel('Time (hours)')
-            
-    for key in cons_over_time.keys():
-        plt.plot(cons_over_time[key], label=f'{key}')
-        
-    plt.plot(bal_over_time, label=f'Zeebrugge balance', linestyle='--')
-    
-    plt.title('Zeebrugge carbon dioxide balance')
-    plt.ylabel('Carbon dioxide (kton)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    plt.tight_layout()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-        
-        
 #%% CARBON DIOXIDE ZEEBRUGGE HYPEREDGE:
 
 def co2_zeebrugge_hyperedge(model, co2_obj, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
@@ -2551,140 +1812,16 @@ def co2_zeebrugge_hyperedge(model, co2_obj, zoom= 'week', figsize=(12, 5), zero_
 
 #%% CARBON DIOXIDE INLAND BALANCE: 
 
-def co2_inland_balance(model, co2_obj, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
-    
-    prod_tables = []
-    capt_tables = []
-    cons_tables = [] 
-    flex_tables_storage = []
-    exp_tables = []
-    released_tables = []
-    bal_tables = []
-
-    for i, m in enumerate(model):
-        
-        # CO2 production
-        _, prod = node_stat(m, ['INLAND'], variable='co2_produced',all_var='no', zero_node=zero_nodes, show ='no', type_node='kton')  
-        co2_prod = pf.remove_string(prod,' (INLAND)')
-        prod_tables.append(table(co2_prod,show='no'))
-        prod_over_time = pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_produced)
-
-        # CO2 Capture 
-        _, capt = node_stat(m, ['INLAND'], variable='co2_captured',all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'no', type_node='kton')  
-        co2_capt = pf.remove_string(capt,' (INLAND)')
-        capt_tables.append(table(co2_capt,show='no'))
-        capt_over_time = pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_captured)
-
-        # CO2 Consumption
-        _, cons = node_stat(m, ['INLAND'], variable='co2_consumed', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes', type_node='kton')  
-        co2_cons = pf.remove_string(cons,' (INLAND)')
-        cons_tables.append(table(co2_cons,show='no'))  
-        cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_consumed))
-        
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['INLAND'], variable=['co2_charged','co2_discharged'], all_var='no', zero_node=zero_nodes, show ='no', type_node='kton')
-        co2_storage = pf.remove_string(storage,' (INLAND)')  
-        flex_tables_storage.append(table(co2_storage,show='no'))
-        co2_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_charged))
-        co2_discharged_over_time = pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_discharged)
-        
-        # Export 
-        _, exp = node_stat(m, ['INLAND'], variable='co2_exported', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes', type_node='kton')
-        co2_exp = pf.remove_string(exp,' (INLAND)')  
-        exp_tables.append(table(co2_exp,show='no'))
-        co2_exp_over_time = pf.negate_values(pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_exported))
-        
-        # Released 
-        _, released = node_stat(m, ['INLAND'], variable='co2_released', all_var='no', zero_node=zero_nodes, show ='no', just_prod = 'yes', type_node='kton')
-        co2_released = pf.remove_string(released,' (INLAND)')  
-        released_tables.append(table(co2_released,show='no'))
-        co2_released_over_time = pf.negate_values(pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_released))
-        
-        print(colored('\n=== total_co2_emitted ===', 'black', 'on_red')) 
+def co2_inland_balance(model, co2_obj=None, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
+    # co2_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('co2_inland_balance', 'co2_obj', co2_obj)
+    for m in model:
+        print(colored('\n=== total_co2_emitted ===', 'black', 'on_red'))
         total_co2_emitted = m['solution']['elements']['INLAND']["variables"]["total_co2_emitted"]["values"][0]
         print(f'Total CO2 Emitted: {total_co2_emitted:.2f} kton')
-        
-        # Balance
-        co2_balance = convert(co2_obj[i].prod.INLAND.co2_balanced.BALANCE)  
-        co2_balance = pf.merge_dictionaries_replace_keys(co2_balance, name=['INLAND BALANCE' ]) 
-        bal_tables.append((co2_balance)) 
-        bal_over_time = pf.convert_mmr_to_dict(co2_obj[i].variables.INLAND.co2_balanced.BALANCE)
-
-
-    print(colored('\n=== Carbon dioxide production ===', 'black', 'on_red'))
-    for t in prod_tables:
-        display(t)
+    carrier_balance(model, 'co2', 'INLAND', zoom, figsize, zero_nodes, figsave)
 
-    print(colored('\n=== Carbon dioxide captured ===', 'black', 'on_red'))
-    for t in capt_tables:
-        display(t)
 
-    print(colored('\n=== Carbon dioxide consumption ===', 'black', 'on_red'))
-    for t in cons_tables:
-        display(t)
-
-    print(colored('\n=== Storage charged/discharged ===', 'black', 'on_red'))
-    for t in flex_tables_storage:
-        display(t)
-        
-    print(colored('\n=== Carbon dioxide Export ===', 'black', 'on_red'))
-    for t in exp_tables:
-        display(t)
-        
-    print(colored('\n=== Carbon dioxide Released ===', 'black', 'on_red'))
-    for t in released_tables:
-        display(t)
-        
-    print(colored('\n=== Carbon dioxide Balance ===', 'black', 'on_red'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Carbon dioxide [kton]", zero_print="yes").T.round(2))
-        
-    if zoom is not None:
-        capt_over_time = pf.zoom_with_timestep(capt_over_time, zero_nodes='yes', zoom=zoom)  
-        cons_over_time = pf.zoom_with_timestep(cons_over_time, zero_nodes='yes', zoom=zoom)
-        co2_charged_over_time = pf.zoom_with_timestep(co2_charged_over_time, zero_nodes='yes', zoom=zoom)
-        co2_discharged_over_time = pf.zoom_with_timestep(co2_discharged_over_time, zero_nodes='yes', zoom=zoom)
-        co2_exp_over_time = pf.zoom_with_timestep(co2_exp_over_time, zero_nodes='yes', zoom=zoom)
-        co2_released_over_time = pf.zoom_with_timestep(co2_released_over_time, zero_nodes='yes', zoom=zoom)
-        bal_over_time = pf.zoom_with_timestep(bal_over_time, zero_nodes='yes', zoom=zoom)
-        
-    plt.figure(figsize=figsize)
-    
-    for key in capt_over_time.keys():
-        plt.plot(capt_over_time[key], label=f'{key}')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(capt_over_time[key]), 1), rotation=90)
-        else:
-            plt.xlabel('Time (hours)')
-    
-    for key in cons_over_time.keys():
-        plt.plot(cons_over_time[key], label=f'{key}')
-    
-    for key in co2_charged_over_time.keys():
-        plt.plot(co2_charged_over_time[key], label=f'Battery charged')
-        
-    plt.plot(bal_over_time, label=f'Inland balance', linestyle='--')
-    
-    for key in co2_exp_over_time.keys():
-        plt.plot(co2_exp_over_time[key], label=f'{key}')
-        
-    for key in co2_released_over_time.keys():
-        plt.plot(co2_released_over_time[key], label=f'{key}')
-        
-    for key in co2_discharged_over_time.keys():
-        plt.plot(co2_discharged_over_time[key], label=f'Battery discharged')
-        
-    plt.title('Inland carbon dioxide balance')
-    plt.ylabel('Carbon dioxide (kton)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    plt.tight_layout()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-        
-        
 #%% CARBON DIOXIDE INLAND HYPEREDGE:
 
 def co2_inland_hyperedge(model, co2_obj, zoom= 'week', figsize=(12, 5)):
@@ -2721,92 +1858,8 @@ def co2_inland_hyperedge(model, co2_obj, zoom= 'week', figsize=(12, 5)):
 
 #%% WATER OFFSHORE:
 
-def water_offshore(model, h2o_obj, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
-    
-    prod_tables = []
-    cons_tables = [] 
-    flex_tables_storage = [] 
-    bal_tables = []
+def water_offshore(model, h2o_obj=None, zoom= 'week', figsize=(12, 5), zero_nodes='yes', figsave = None):
+    # h2o_obj is deprecated (series from pf.carrier_balances)
+    _deprecated_argument('water_offshore', 'h2o_obj', h2o_obj)
+    carrier_balance(model, 'water', 'OFFSHORE', zoom, figsize, zero_nodes, figsave)
 
-    for i, m in enumerate(model):
-
-        # Production 
-        _, prod = node_stat(m, ['OFFSHORE'], variable='h2o_produced', all_var='no', zero_node=zero_nodes, show='no', type_node='kton')  
-        h2_prod = pf.remove_string(prod, ' (OFFSHORE)')
-        prod_tables.append(table(h2_prod, show='no'))
-        prod_over_time = pf.convert_mmr_to_dict(h2o_obj[i].variables.OFFSHORE.h2o_produced)
-
-        # Consumption
-        _, cons = node_stat(m, ['OFFSHORE'], variable='h2o_consumed', all_var='no', zero_node=zero_nodes, show='no', just_prod='yes', type_node='kton') 
-        h2_cons = pf.remove_string(cons, ' (OFFSHORE)')
-        cons_tables.append(table(h2_cons, show='no'))  
-        cons_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2o_obj[i].variables.OFFSHORE.h2o_consumed))
-
-        # Storage (charged / discharged)
-        _, storage = node_stat(m, ['OFFSHORE'], variable=['h2o_charged', 'h2o_discharged'], all_var='no', zero_node=zero_nodes, show='no', type_node='kton')
-        h2_storage = pf.remove_string(storage, ' (OFFSHORE)')  
-        flex_tables_storage.append(table(h2_storage, show='no'))  
-        h2_charged_over_time = pf.negate_values(pf.convert_mmr_to_dict(h2o_obj[i].variables.OFFSHORE.h2o_charged))
-        h2_discharged_over_time = pf.convert_mmr_to_dict(h2o_obj[i].variables.OFFSHORE.h2o_discharged)
-        
-        # Balance
-        h2_balance = convert(h2o_obj[i].prod.OFFSHORE.h2o_balanced.BALANCE)  
-        h2_balance = pf.merge_dictionaries_replace_keys(h2_balance, name=['OFFSHORE BALANCE']) 
-        bal_tables.append(h2_balance) 
-        h2_balance_over_time = pf.convert_mmr_to_dict(h2o_obj[i].variables.OFFSHORE.h2o_balanced.BALANCE)
-        
-        
-
-    print(colored('\n=== Water production ===', 'black', 'on_green'))
-    for t in prod_tables:
-        display(t)
-
-    print(colored('\n=== Water consumption ===', 'black', 'on_green'))
-    for t in cons_tables:
-        display(t)
-
-    print(colored('\n=== Water storage charged/discharged ===', 'black', 'on_green'))
-    for t in flex_tables_storage:
-        display(t) 
-        
-    print(colored('\n=== Water Balance ===', 'black', 'on_green'))
-    for t in bal_tables:
-        v = table(pf.transform_dict_into_table(t, column_name="Water [kton]", zero_print="yes").T.round(2))
-        
-    if zoom is not None:
-        prod_over_time = pf.zoom_with_timestep(prod_over_time, zero_nodes=zero_nodes, zoom=zoom)  
-        cons_over_time = pf.zoom_with_timestep(cons_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_charged_over_time = pf.zoom_with_timestep(h2_charged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_discharged_over_time = pf.zoom_with_timestep(h2_discharged_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        h2_balance_over_time = pf.zoom_with_timestep(h2_balance_over_time, zero_nodes=zero_nodes, zoom=zoom)
-        
-    plt.figure(figsize=figsize)
-    
-    for key in prod_over_time.keys():
-        plt.plot(prod_over_time[key], label=f'{key}')
-        if zoom is not None:
-            plt.xlabel(f'Time ({zoom})')
-            plt.xticks(np.arange(0, len(prod_over_time[key]), 1), rotation=90)
-        else:
-            plt.xlabel('Time (hours)')
-            
-    for key in cons_over_time.keys():
-        plt.plot(cons_over_time[key], label=f'{key}')
-        
-    for key in h2_charged_over_time.keys():
-        plt.plot(h2_charged_over_time[key], label=f'Battery charged')
-        
-    plt.plot(h2_balance_over_time, label=f'Offshore balance', linestyle='--')
-    
-    for key in h2_discharged_over_time.keys():
-        plt.plot(h2_discharged_over_time[key], label=f'Battery discharged')
-        
-    plt.title('Offshore water balance')
-    plt.ylabel('Water (kton)')
-    plt.legend(loc='upper center', bbox_to_anchor=(0.5, -0.15), ncol=4)
-    plt.grid()
-    plt.tight_layout()
-    if figsave is not None:
-        plt.savefig(figsave, format="pdf", bbox_inches="tight")
-    plt.show()
-    
\ No newline at end of file
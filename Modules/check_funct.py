@@ -0,0 +1,200 @@
+#%% Residuals of the hyperedge constraints of solved models
+import re
+import numpy as np
+import pandas as pd
+from fnmatch import fnmatchcase
+from termcolor import colored
+import process_funct as pf
+import recost_funct as rf
+
+# The constraints of the hyperedges of the model file (INLAND_BALANCE, OFFSHORE_BALANCE,
+# ZEEBRUGGE_BALANCE, CO2_QUOTA and the BALANCES of every cluster) are rebuilt from the stored
+# variables and global parameters. Each reference NODE.variable[t] is the stack of the series
+# of all the scenarios (scenarios x T), so a constraint is evaluated once for all the hours
+# and all the scenarios.
+
+
+#%% Expressions of the hyperedges
+
+_GLOBAL_REF = re.compile(r"\bglobal\.(\w+)(\[t\])?")
+_NODE_REF = re.compile(r"\b([A-Za-z_]\w*)\.(\w+)(\[t\])?")
+_FUNCTIONS = {"mod": np.mod, "exp": np.exp, "log": np.log, "sqrt": np.sqrt, "abs": np.abs}
+
+
+def compile_hyperedge_expression(expression):
+    # GBOML side of a constraint -> compiled Python expression calling _ref_(node, variable)
+    # and _global_(name), None when it cannot be evaluated (sum over a range, other index...)
+    expression = " ".join(expression.split())
+    if re.search(r"\b(for|where)\b", expression):
+        return None
+    python = _GLOBAL_REF.sub(r"_global_('\1')", expression)
+    python = _NODE_REF.sub(r"_ref_('\1', '\2')", python)
+    if "[" in python:
+        return None
+    try:
+        return compile(python, "<gboml>", "eval")
+    except SyntaxError:
+        return None
+
+
+def _stack(values):
+    # Values of the scenarios -> (scenarios x T) or (scenarios x 1) for the scalars
+    arrays = [np.atleast_1d(np.asarray(v, dtype=float)) for v in values]
+    lengths = {len(a) for a in arrays}
+    if len(lengths) > 1:
+        raise ValueError(f"different horizons {sorted(lengths)}")
+    return np.array(arrays)
+
+
+def _lookup(dictionary, scope, node, variable):
+    # Variable (or parameter) "node.variable" seen from a hyperedge of the scope
+    elements = dictionary["solution"]["elements"]
+    model_nodes = dictionary["model"]["nodes"]
+    candidates = []
+    if scope:
+        candidates.append((elements.get(scope, {}).get("sub_elements", {}).get(node, {}),
+                           model_nodes.get(scope, {}).get("sub_nodes", {}).get(node, {})))
+    candidates.append((elements.get(node, {}), model_nodes.get(node, {})))
+    for solution, model in candidates:
+        if variable in solution.get("variables", {}):
+            var = solution["variables"][variable]
+            return var["values"] if isinstance(var, dict) else var
+        if variable in model.get("parameters", {}):
+            return model["parameters"][variable]
+    raise KeyError(f"{node}.{variable}")
+
+
+#%% Residuals
+
+class HyperedgeChecker:
+    """
+    Residuals of the hyperedge constraints of several scenarios solved with the same model file.
+
+        checker = HyperedgeChecker({"methanol": dictionary}, "Models GBOML/scenario_methanol.txt")
+        summary, violations = checker.check(tolerance=1e-3)
+
+    results    : {name: result} (a list is named "Scenario 1", "Scenario 2"...)
+    hyperedges : patterns on "NAME" (top level) or "SCOPE.NAME" (e.g. "INLAND.BALANCES"),
+                 default all the hyperedges written in the model file
+    """
+
+    def __init__(self, results, model_file, hyperedges=None):
+        if isinstance(results, (list, tuple)):
+            results = {f"Scenario {i+1}": r for i, r in enumerate(results)}
+        self.results = {name: r.dictionary if isinstance(r, pf.ResultModel) else r for name, r in results.items()}
+        self.names = list(self.results)
+        self.model_file = model_file
+        self.hyperedges = {}
+        for (scope, name), data in rf.read_hyperedges(model_file).items():
+            label = f"{scope}.{name}" if scope else name
+            if hyperedges is None or any(fnmatchcase(label, p) for p in hyperedges):
+                self.hyperedges[(scope, label)] = data
+        self._references = {}
+        first = next(iter(self.results.values()), None)
+        self.horizon = next((len(v) for _, _, _, v in pf.iter_variables(first) if len(v) > 1), 
+                            pf.HOURS_PER_YEAR) if first is not None else pf.HOURS_PER_YEAR
+
+    def _reference(self, scope, node, variable):
+        # Stacked values of a reference, built once for all the constraints
+        key = (scope, node, variable)
+        if key not in self._references:
+            self._references[key] = _stack([_lookup(d, scope, node, variable) for d in self.results.values()])
+        return self._references[key]
+
+    def _global(self, name):
+        key = ("global", name)
+        if key not in self._references:
+            self._references[key] = _stack([d["model"]["global_parameters"][name] for d in self.results.values()])
+        return self._references[key]
+
+    def evaluate(self, scope, constraint, parameters=None):
+        # (lhs, rhs) of one constraint, arrays (scenarios x T)
+        _, _, lhs, rhs = constraint
+        namespace = {"_ref_": lambda n, v: self._reference(scope, n, v), "_global_": self._global,
+                     "__builtins__": {}, **_FUNCTIONS}
+        sides = []
+        for expression in (lhs, rhs):
+            code = compile_hyperedge_expression(expression)
+            if code is None:
+                raise ValueError("expression not evaluable outside GBOML")
+            sides.append(np.atleast_2d(np.asarray(eval(code, namespace, dict(parameters or {})), dtype=float)))
+        shape = np.broadcast_shapes(sides[0].shape, sides[1].shape, (len(self.names), 1))
+        return np.broadcast_to(sides[0], shape), np.broadcast_to(sides[1], shape)
+
+    def _parameters(self, scope, data):
+        # Parameters of the hyperedge (constants or global parameters)
+        values = {"T": self.horizon}
+        for name, expression in data["parameters"]:
+            code = compile_hyperedge_expression(expression)
+            try:
+                values[name] = eval(code, {"_global_": self._global, "_ref_": lambda n, v: self._reference(scope, n, v),
+                                           "__builtins__": {}, **_FUNCTIONS}, dict(values))
+            except Exception:
+                pass
+        return values
+
+    def check(self, tolerance=1e-3, relative=1e-6):
+        """
+        summary    : (Scenario, Hyperedge, Constraint) -> Sense, Max residual, Violated hours,
+                     Worst hour, Status ('ok', 'violated' or 'not evaluated: <reason>')
+        violations : (Scenario, Hyperedge, Constraint, Hour) -> LHS, RHS, Residual for every
+                     violated hour, residual = LHS - RHS
+        A constraint is violated at an hour when its residual (its excess for <= and >=) is
+        above tolerance + relative * max(|LHS|, |RHS|).
+        """
+        summary, violations = [], []
+        for (scope, label), data in self.hyperedges.items():
+            parameters = self._parameters(scope, data)
+            for constraint in data["constraints"]:
+                name, sense = constraint[0], constraint[1]
+                try:
+                    lhs, rhs = self.evaluate(scope, constraint, parameters)
+                except Exception as e:
+                    reason = f"not evaluated: {e.args[0] if e.args else e}"
+                    summary += [(n, label, name, sense, np.nan, 0, np.nan, reason) for n in self.names]
+                    continue
+                residual = lhs - rhs
+                excess = {"==": np.abs(residual), "<=": residual, ">=": -residual}[sense]
+                violated = excess > tolerance + relative * np.maximum(np.abs(lhs), np.abs(rhs))
+                worst = np.argmax(np.where(np.isnan(excess), -np.inf, excess), axis=1)
+                for i, n in enumerate(self.names):
+                    count = int(violated[i].sum())
+                    summary.append((n, label, name, sense, float(np.max(np.abs(residual[i]))), count,
+                                    int(worst[i]), "violated" if count else "ok"))
+                rows, hours = np.nonzero(violated)
+                violations += [(self.names[i], label, name, int(h), lhs[i, h], rhs[i, h], residual[i, h])
+                               for i, h in zip(rows, hours)]
+
+        index = ["Scenario", "Hyperedge", "Constraint"]
+        summary = pd.DataFrame(summary, columns=index + ["Sense", "Max residual", "Violated hours", "Worst hour", "Status"])
+        violations = pd.DataFrame(violations, columns=index + ["Hour", "LHS", "RHS", "Residual"])
+        return summary.set_index(index), violations.set_index(index + ["Hour"])
+
+    def report(self, tolerance=1e-3, relative=1e-6):
+        summary, violations = self.check(tolerance, relative)
+        status = summary["Status"]
+        n_violated = (status == "violated").sum()
+        n_skipped = status.str.startswith("not evaluated").sum()
+        if n_violated:
+            print(colored(f"{n_violated} constraints violated (tolerance {tolerance}) over {len(violations)} hours", 'red', attrs=['bold']))
+        else:
+            print(colored(f"All the evaluated hyperedge constraints hold (tolerance {tolerance})", 'green', attrs=['bold']))
+        if n_skipped:
+            print(f"[Warning] {n_skipped} constraints could not be evaluated outside GBOML")
+        return summary, violations
+
+
+def check_hyperedges(results, model_file, hyperedges=None, tolerance=1e-3, relative=1e-6, to_display='no'):
+    # Shortcut, see HyperedgeChecker. model_file can be {name: model file} when the scenarios
+    # come from different model files: the scenarios of a same file are checked together
+    if isinstance(results, (list, tuple)):
+        results = {f"Scenario {i+1}": r for i, r in enumerate(results)}
+    files = model_file if isinstance(model_file, dict) else {name: model_file for name in results}
+    groups = {}
+    for name, result in results.items():
+        groups.setdefault(files[name], {})[name] = result
+    outputs = []
+    for file, group in groups.items():
+        checker = HyperedgeChecker(group, file, hyperedges)
+        outputs.append(checker.report(tolerance, relative) if to_display == 'yes' else checker.check(tolerance, relative))
+    return pd.concat([o[0] for o in outputs]), pd.concat([o[1] for o in outputs])
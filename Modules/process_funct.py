@@ -37,6 +37,312 @@ import matplotlib.colors as mcolors
 import matplotlib 
 import GBOML_function as gf
 
+#%% N°0 : def get_schema_index(dictionary, rebuild='no'):
+
+from collections import OrderedDict
+
+_SCHEMA_INDEXES = OrderedDict() # id(dictionary) -> (guard, index), never the dictionary itself
+SCHEMA_CACHE_SIZE = 64
+
+def build_schema_index(dictionary):
+    # Walk once "model" and "solution" and build the inverted index used by the discovery 
+    # functions underneath (name of variable / parameter -> clusters and sub nodes)
+    index = {
+        "clusters": [],           # names of model.nodes
+        "sub_nodes": {},          # cluster -> names of its sub nodes (model)
+        "cluster_variables": {},  # variable -> clusters using it (model.nodes[.]["variables"])
+        "cluster_parameters": {}, # parameter -> clusters using it
+        "sub_variables": {},      # cluster -> variable -> sub nodes (solution sub_elements)
+        "sub_parameters": {},     # cluster -> parameter -> sub nodes (model sub_nodes)
+    }
+    for cluster, node in dictionary["model"]["nodes"].items():
+        index["clusters"].append(cluster)
+        for variable in node.get("variables", {}):
+            index["cluster_variables"].setdefault(variable, []).append(cluster)
+        for parameter in node.get("parameters", {}):
+            index["cluster_parameters"].setdefault(parameter, []).append(cluster)
+        if "sub_nodes" in node:
+            index["sub_nodes"][cluster] = list(node["sub_nodes"])
+            by_parameter = index["sub_parameters"][cluster] = {}
+            for sub, sub_node in node["sub_nodes"].items():
+                for parameter in sub_node.get("parameters", {}):
+                    by_parameter.setdefault(parameter, []).append(sub)
+
+    for cluster, element in dictionary["solution"]["elements"].items():
+        if "sub_elements" in element:
+            by_variable = index["sub_variables"][cluster] = {}
+            for sub, sub_element in element["sub_elements"].items():
+                for variable in sub_element.get("variables", {}):
+                    by_variable.setdefault(variable, []).append(sub)
+    return index
+
+
+def _schema_guard(dictionary):
+    # Changes when the id is reused by another dictionary (other "solution" / "model" 
+    # trees) and when clusters, sub nodes or sub elements are added or removed
+    nodes = dictionary["model"]["nodes"]
+    elements = dictionary["solution"]["elements"]
+    return (id(dictionary["solution"]), id(dictionary["model"]), len(nodes), len(elements), 
+            sum(len(n.get("sub_nodes", ())) for n in nodes.values()),
+            sum(len(e.get("sub_elements", ())) for e in elements.values()))
+
+
+def get_schema_index(dictionary, rebuild='no'):
+    # Schema index of a result, kept outside the data in a side table keyed by the id of 
+    # the dictionary (a copy has its own index). Rebuilt when nodes are added / removed; 
+    # after other in place changes of the dictionary use rebuild='yes' (or 
+    # invalidate_schema_index)
+    key = id(dictionary)
+    guard = _schema_guard(dictionary)
+    entry = _SCHEMA_INDEXES.get(key)
+    if rebuild == 'yes' or entry is None or entry[0] != guard:
+        entry = _SCHEMA_INDEXES[key] = (guard, build_schema_index(dictionary))
+        while len(_SCHEMA_INDEXES) > SCHEMA_CACHE_SIZE:
+            _SCHEMA_INDEXES.popitem(last=False)
+    else:
+        _SCHEMA_INDEXES.move_to_end(key)
+    return entry[1]
+
+
+def invalidate_schema_index(dictionary):
+    _SCHEMA_INDEXES.pop(id(dictionary), None)
+
+#%% N°0bis : memoization of the extractors (opt-in): enable_memoization(max_entries, max_bytes)
+
+import copy
+import functools
+import inspect
+import itertools
+import weakref
+
+_RESULT_TOKENS = OrderedDict() # id(object) -> (guard, token), never the object itself
+_RESULT_TOKENS_SIZE = 4096
+_NEXT_TOKEN = itertools.count(1)
+
+
+def _identity_guard(obj):
+    # A dictionary reusing the id of a freed one has other "solution" / "model" trees
+    if isinstance(obj, dict):
+        return (id(obj.get("solution")), id(obj.get("model")))
+    return type(obj)
+
+
+def _forget_result(key, token):
+    # Called when a weak referenceable object (ResultModel, MakeMeReadable) is freed
+    if _RESULT_TOKENS.get(key, (None, None))[1] == token:
+        del _RESULT_TOKENS[key]
+    EXTRACTOR_MEMO.invalidate_token(token)
+
+
+def get_result_id(obj):
+    # Identity token of a loaded result (or of any object given to a memoized extractor). 
+    # The caches are keyed on the token and never hold the object, so the results can be 
+    # freed. A copy (dict(result), filter_result_dictionary, deepcopy...) is another object 
+    # and gets its own token. The entries of the weak referenceable objects are removed 
+    # when they are freed, the ones of plain dictionaries leave the caches by LRU eviction.
+    key = id(obj)
+    guard = _identity_guard(obj)
+    entry = _RESULT_TOKENS.get(key)
+    if entry is not None and entry[0] == guard:
+        _RESULT_TOKENS.move_to_end(key)
+        return entry[1]
+    token = next(_NEXT_TOKEN)
+    _RESULT_TOKENS[key] = (guard, token)
+    try:
+        weakref.finalize(obj, _forget_result, key, token)
+    except TypeError: # dict, list... (no weak reference)
+        pass
+    while len(_RESULT_TOKENS) > _RESULT_TOKENS_SIZE:
+        _RESULT_TOKENS.popitem(last=False)
+    return token
+
+
+def _is_result_dictionary(obj):
+    return isinstance(obj, dict) and "solution" in obj and "model" in obj
+
+
+_KEY_TYPES = (str, bytes, int, float, complex, bool, type(None))
+
+
+def _normalize_argument(value):
+    # Value of an argument in the memo key. TypeError when the call cannot be cached
+    if isinstance(value, _KEY_TYPES):
+        return value
+    if _is_result_dictionary(value):
+        return ("result", get_result_id(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(_normalize_argument(v) for v in value)
+    if isinstance(value, dict):
+        return tuple(sorted((str(k), _normalize_argument(v)) for k, v in value.items()))
+    if isinstance(value, (set, frozenset)):
+        return tuple(sorted(_normalize_argument(v) for v in value))
+    if isinstance(value, (np.ndarray, pd.DataFrame, pd.Series)): # mutable data, not cached
+        raise TypeError(type(value).__name__)
+    # Other objects (ResultModel, MakeMeReadable...) by identity, only when they are freed
+    # their entries are removed
+    weakref.ref(value)
+    return ("result", get_result_id(value))
+
+
+_SCALAR_TYPES = _KEY_TYPES + (np.generic,)
+
+
+def _copy_cached(value):
+    # New containers (dict, list of containers) around shared values: the lists of numbers 
+    # (hourly series) are shared, as the extractors return the lists of the result itself, 
+    # and the arrays are returned as read-only views. Adding / replacing entries of the 
+    # returned value does not change the cached one, and no series is copied
+    if isinstance(value, np.ndarray):
+        view = value.view()
+        view.flags.writeable = False
+        return view
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return value.copy()
+    if isinstance(value, dict):
+        result = copy.copy(value)
+        for k, v in value.items():
+            result[k] = _copy_cached(v)
+        return result
+    if type(value) in (list, tuple, set):
+        if value and not isinstance(next(iter(value)), _SCALAR_TYPES):
+            return type(value)(_copy_cached(v) for v in value)
+        return value # series
+    return value
+
+
+def _size_in_bytes(obj):
+    # Estimate of the memory of a cached value from the sizes of its arrays: nbytes of the 
+    # numpy / pandas objects, 8 bytes per item of a list of numbers, the containers around 
+    # them are not counted
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(index=True).sum()) if isinstance(obj, pd.DataFrame) else int(obj.memory_usage(index=True))
+    if isinstance(obj, dict):
+        return sum(_size_in_bytes(v) for v in obj.values())
+    if isinstance(obj, (list, tuple, set)):
+        if not obj:
+            return 0
+        if isinstance(next(iter(obj)), _SCALAR_TYPES):
+            return 8 * len(obj)
+        return sum(_size_in_bytes(v) for v in obj)
+    return 8
+
+
+def _contains(key, target):
+    if key == target:
+        return True
+    return isinstance(key, tuple) and any(_contains(k, target) for k in key)
+
+
+class ExtractorMemo:
+    # LRU cache bounded on the number of entries and on the total bytes
+    
+    def __init__(self, max_entries=128, max_bytes=1024**3):
+        self.enabled = 'no'
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict() # key -> (value, bytes)
+        self.total_bytes = 0
+        self.hits = {}
+        self.misses = {}
+
+    def get(self, key):
+        if key in self.entries:
+            self.entries.move_to_end(key)
+            self.hits[key[0]] = self.hits.get(key[0], 0) + 1
+            return True, self.entries[key][0]
+        self.misses[key[0]] = self.misses.get(key[0], 0) + 1
+        return False, None
+
+    def put(self, key, value):
+        size = _size_in_bytes(value)
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (value, size)
+        self.total_bytes += size
+        while len(self.entries) > self.max_entries or self.total_bytes > self.max_bytes:
+            _, (_, old_size) = self.entries.popitem(last=False)
+            self.total_bytes -= old_size
+
+    def invalidate_token(self, token):
+        self.invalidate(token=token)
+
+    def invalidate(self, dictionary=None, function=None, token=None):
+        # Remove the entries of one result and/or one function (everything by default)
+        if dictionary is not None:
+            token = get_result_id(dictionary)
+        result = ("result", token) if token is not None else None
+        name = function.__name__ if callable(function) else function
+        for key in list(self.entries):
+            if name is not None and key[0] != name:
+                continue
+            if result is not None and not _contains(key[1], result):
+                continue
+            self.total_bytes -= self.entries.pop(key)[1]
+
+    def stats(self):
+        names = sorted(set(self.hits) | set(self.misses))
+        return pd.DataFrame({"Hits": [self.hits.get(n, 0) for n in names], 
+                             "Misses": [self.misses.get(n, 0) for n in names]}, index=names)
+
+
+EXTRACTOR_MEMO = ExtractorMemo()
+
+
+def enable_memoization(max_entries=128, max_bytes=1024**3):
+    EXTRACTOR_MEMO.enabled = 'yes'
+    EXTRACTOR_MEMO.max_entries = max_entries
+    EXTRACTOR_MEMO.max_bytes = max_bytes
+
+
+def disable_memoization(clear='yes'):
+    EXTRACTOR_MEMO.enabled = 'no'
+    if clear == 'yes':
+        EXTRACTOR_MEMO.invalidate()
+
+
+def invalidate_memo(dictionary=None, function=None):
+    EXTRACTOR_MEMO.invalidate(dictionary, function)
+
+
+def memo_stats():
+    print(f"{len(EXTRACTOR_MEMO.entries)} entries, {EXTRACTOR_MEMO.total_bytes / 1024**2:.1f} MB")
+    return EXTRACTOR_MEMO.stats()
+
+
+def memoize(pure_when=None):
+    # Decorator of the extractors. The key is the name of the function + the normalized 
+    # arguments (the results and the other objects are replaced by their identity token). 
+    # pure_when(arguments) : False when the call has side effects (save, display) and 
+    # must not be cached
+    # The cache keeps the value computed by the function, every call (hit or miss) gets 
+    # new containers around the shared series (_copy_cached): modify the series of a 
+    # result in place only after invalidate_memo(result).
+    def decorator(function):
+        signature = inspect.signature(function)
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if EXTRACTOR_MEMO.enabled != 'yes':
+                return function(*args, **kwargs)
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            if pure_when is not None and not pure_when(bound.arguments):
+                return function(*args, **kwargs)
+            try:
+                key = (function.__name__, tuple((k, _normalize_argument(v)) for k, v in bound.arguments.items()))
+                hash(key)
+            except TypeError: # argument which cannot be a key (DataFrame...), not cached
+                return function(*args, **kwargs)
+            found, value = EXTRACTOR_MEMO.get(key)
+            if not found:
+                value = function(*args, **kwargs)
+                EXTRACTOR_MEMO.put(key, value)
+            return _copy_cached(value)
+        return wrapper
+    return decorator
+
 #%% N°1 : def get_cluster_variable(node,variable,dictionary): 
 
 
@@ -50,6 +356,9 @@ def get_cluster_variable(node,variable,dictionary):
 
 def get_cluster_element_variable(cluster,element,variable,dictionary): 
     # get value of "variable" from "cluster" as a list in "node" from data in "dictionary"  
+    if isinstance(dictionary, ResultModel): # view on the matrix of the ResultModel
+        values = dictionary.series(cluster, element, variable)
+        return 0 if values is None else {"values": values}
     if "variables" in dictionary["solution"]["elements"][cluster]["sub_elements"][element]:
         if variable in dictionary["solution"]["elements"][cluster]["sub_elements"][element]["variables"]:
             return dictionary["solution"]["elements"][cluster]["sub_elements"][element]["variables"][variable]
@@ -80,65 +389,37 @@ def get_cluster_element_parameter(cluster,element,parameter,dictionary):
 
 def get_all_cluster_names(dictionary): 
     # get the names of all nodes as a list from data in "dictionary"
-    dic_nodes = dictionary["model"]["nodes"]
-    nodes_name = []
-    for node in dic_nodes:
-        nodes_name.append(node)
-    return nodes_name
+    return list(get_schema_index(dictionary)["clusters"])
 
 #%% N°6 : def get_all_cluster_subnodes_names(cluster,dictionary): 
 
 def get_all_cluster_subnodes_names(cluster,dictionary): 
     # get the names of all nodes as a list from data in "dictionary"
-    dic_nodes = dictionary["model"]["nodes"][cluster]["sub_nodes"]
-    nodes_name = []
-    for node in dic_nodes:
-        nodes_name.append(node)
-    return nodes_name
+    return list(get_schema_index(dictionary)["sub_nodes"][cluster])
 
 #%% N°7 : def get_cluster_names_from_variable(variable,dictionary): 
 def get_cluster_names_from_variable(variable,dictionary): 
     # get the names of nodes as a list in which the variable named "variable" is used
-    dic_nodes = dictionary["model"]["nodes"]
-    nodes_name = []
-    for node in dic_nodes:
-        if variable in dic_nodes[node]["variables"]:
-            nodes_name.append(node)
-    return nodes_name
+    return list(get_schema_index(dictionary)["cluster_variables"].get(variable, []))
 
 #%% N°8 : def get_cluster_subnodes_names_from_variable(variable,cluster,dictionary): 
 
 def get_cluster_subnodes_names_from_variable(variable,cluster,dictionary): 
     # get the names of nodes as a list in which the variable named "variable" is used
-    dic_nodes = dictionary["solution"]["elements"][cluster]["sub_elements"]
-    nodes_name = []
-    for node in dic_nodes:
-        if "variables" in dic_nodes[node]:
-            if variable in dic_nodes[node]["variables"]:
-                nodes_name.append(node)
-    return nodes_name
+    # (KeyError if "cluster" has no sub elements, as before)
+    return list(get_schema_index(dictionary)["sub_variables"][cluster].get(variable, []))
 
 #%% N°9 : def get_cluster_names_from_parameter(parameter,dictionary):
 
 def get_cluster_names_from_parameter(parameter,dictionary):
     # get the names of global nodes as a list in which the "parameter" is used
-    dic_nodes = dictionary["model"]["nodes"]
-    nodes_name = []
-    for node in dic_nodes:
-        if parameter in dic_nodes[node]["parameters"]:
-            nodes_name.append(node)
-    return nodes_name
+    return list(get_schema_index(dictionary)["cluster_parameters"].get(parameter, []))
 
 #%% N°10 : def get_cluster_subnodes_names_from_parameter(cluster,parameter,dictionary):
 
 def get_cluster_subnodes_names_from_parameter(cluster,parameter,dictionary):
     # get the names of nodes as a list in which the "parameter" is used
-    dic_nodes = dictionary["model"]["nodes"][cluster]["sub_nodes"]
-    nodes_name = []
-    for node in dic_nodes:
-        if parameter in dic_nodes[node]["parameters"]:
-            nodes_name.append(node)
-    return nodes_name
+    return list(get_schema_index(dictionary)["sub_parameters"][cluster].get(parameter, []))
 #%% N°11 : def get_cluster_capacities_from_nodes(nodes,name_capacity,name_capacity_0,name_capacity_max,dictionary):
 
 def get_cluster_capacities_from_nodes(nodes,dictionary,name_capacity="new_capacity",
@@ -705,6 +986,10 @@ def merge_dictionaries(*dictionaries, name=None):
     for idx, data in enumerate(dictionaries):
         suffix = f" ({name[idx]})" if name and idx < len(name) else ""
 
+        if isinstance(data, pd.DataFrame): # e.g. ResultModel.select(...), one row per series
+            data = {" ".join(str(k) for k in (key if isinstance(key, tuple) else (key,)) if k): row.to_numpy() 
+                    for key, row in data.iterrows()}
+
         if isinstance(data, dict):
             # chaque (clé, valeur) devient (clé + suffix)→valeur
             for k, v in data.items():
@@ -905,70 +1190,313 @@ def save_table_into_excel(table, table_name, folder=None):
         file_path = table_name + '.xlsx'
     table.to_excel(file_path)
 
-#%% N°38 : def zoom_on_variable_in_cluster(cluster,variable,zoom,dictionary): 
+#%% N°37bis : resampling engine (calendar groups + reduceat) used by all the zoom functions
+
+HOURS_PER_YEAR = 8760
+MONTH_DAYS = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31] # non-leap years, like the model
+MONTH_START_HOURS = np.concatenate(([0], np.cumsum(MONTH_DAYS) * 24)) # 13 values, last = 8760
+SEASONS_MONTHS = {
+    'spring': [3, 4, 5],    # March, April, May
+    'summer': [6, 7, 8],    # June, July, August
+    'fall':   [9, 10, 11],  # September, October, November
+    'winter': [12, 1, 2]    # December, January, February
+}
+SEASONS_ORDER = ['winter', 'spring', 'summer', 'fall']
+FREQ_PERIOD = {'day': 24, 'week': 168, 'month': HOURS_PER_YEAR, 'season': HOURS_PER_YEAR, 'year': HOURS_PER_YEAR}
+
+
+def _calendar_group_index(n_hours, freq):
+    # Group of every hour, the years restart every 8760 h (multi-year horizons)
+    return _calendar_group_of_hours(np.arange(n_hours), freq)
+
+
+def _calendar_group_of_hours(t, freq):
+    # Same for any array of absolute hours (used on the chunks of the streaming aggregator)
+    if freq == 'day':
+        return t // 24
+    if freq == 'week': # blocks of 168 h from the start, like the former zoom functions
+        return t // 168
+    if freq == 'year':
+        return t // HOURS_PER_YEAR
+    month = np.searchsorted(MONTH_START_HOURS, t % HOURS_PER_YEAR, side='right') - 1 # 0 = January
+    if freq == 'month':
+        return (t // HOURS_PER_YEAR) * 12 + month
+    if freq == 'season': # winter (Dec, Jan, Feb) = 0, spring = 1, summer = 2, fall = 3
+        return (t // HOURS_PER_YEAR) * 4 + ((month + 1) % 12) // 3
+    raise ValueError(f"Unknown frequency '{freq}', use 'hour', 'day', 'week', 'month', 'season' or 'year'")
+
+
+@functools.lru_cache(maxsize=64)
+def calendar_groups(n_hours, freq):
+    # Precomputed arrays to aggregate n_hours values by freq:
+    #   order    : permutation putting the hours of a same group together (None if already contiguous)
+    #   starts   : start of each group in the (permuted) series, for np.ufunc.reduceat
+    #   counts   : number of hours of each group
+    #   labels   : id of each group (year * groups per year + group in the year)
+    #   complete : False for a group cut by the end of the horizon
+    group = _calendar_group_index(n_hours, freq)
+    order = None if np.all(np.diff(group) >= 0) else np.argsort(group, kind='stable')
+    counts = np.bincount(group)
+    labels = np.flatnonzero(counts)
+    counts = counts[labels]
+    starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+    
+    period = FREQ_PERIOD[freq]
+    full_length = -(-n_hours // period) * period
+    full_counts = np.bincount(_calendar_group_index(full_length, freq))[labels]
+    complete = counts == full_counts
+    
+    out = (order, starts, counts, labels, complete)
+    for array in out:
+        if array is not None:
+            array.setflags(write=False)
+    return out
 
-def zoom_on_variable_in_cluster(cluster,variable,zoom,dictionary): 
-    var = dictionary["solution"]["elements"][cluster]["variables"][variable]['values']
-    variable_zoomed = []
+
+def resample_matrix(data, freq='day', how='sum', partial='keep', q=50):
+    """
+    Aggregate a series (T,) or a matrix (nodes x T) by 'hour', 'day', 'week', 'month', 
+    'season' or 'year' in one vectorized operation.
+    how     : 'sum', 'mean', 'min', 'max' or 'percentile' (q, number or list)
+    partial : 'keep' or 'drop' the last group when it is cut by the end of the horizon
+    Return a numpy array (groups,) or (nodes x groups), (len(q) x ...) for a list of percentiles
+    """
+    x = np.asarray(data, dtype=float)
+    one_d = x.ndim == 1
+    x = np.atleast_2d(x)
+    
+    if freq == 'hour' or x.shape[1] == 0:
+        return x[0] if one_d else x
+    
+    order, starts, counts, labels, complete = calendar_groups(x.shape[1], freq)
+    if order is not None:
+        x = x[:, order]
+
+    if how == 'sum':
+        out = np.add.reduceat(x, starts, axis=1)
+    elif how == 'mean':
+        out = np.add.reduceat(x, starts, axis=1) / counts
+    elif how == 'min':
+        out = np.minimum.reduceat(x, starts, axis=1)
+    elif how == 'max':
+        out = np.maximum.reduceat(x, starts, axis=1)
+    elif how == 'percentile':
+        out = np.stack([np.percentile(x[:, start:start + count], q, axis=1) for start, count in zip(starts, counts)], axis=-1)
+    else:
+        raise ValueError("how must be 'sum', 'mean', 'min', 'max' or 'percentile'")
+
+    if partial == 'drop':
+        out = out[..., complete]
+    return out[..., 0, :] if one_d else out
+
+
+def resample(data, freq='day', how='sum', partial='keep', q=50, as_list='yes'):
+    # resample_matrix for a list, an array or a dict {name: series or {'values': series}}
+    # The series of a dict are stacked and aggregated at once
+    if isinstance(data, dict):
+        keys = list(data.keys())
+        series = [v['values'] if isinstance(v, dict) else v for v in data.values()]
+        if len({len(v) for v in series}) == 1:
+            out = resample_matrix(np.array(series, dtype=float), freq, how, partial, q)
+            rows = [out[..., i, :] for i in range(len(keys))]
+        else:
+            rows = [resample_matrix(v, freq, how, partial, q) for v in series]
+        return {k: (r.tolist() if as_list == 'yes' else r) for k, r in zip(keys, rows)}
+    out = resample_matrix(data, freq, how, partial, q)
+    return out.tolist() if as_list == 'yes' else out
+
+
+def calendar_slice(n_hours, zoom, number=1):
+    # Index of the hours of month "number" (1-12), week "number", day "number" or of a 
+    # season ('spring', 'summer', 'fall', 'winter' = December + January + February) 
+    # in the first year
+    if zoom in SEASONS_MONTHS:
+        index = np.concatenate([np.arange(MONTH_START_HOURS[m - 1], MONTH_START_HOURS[m]) for m in SEASONS_MONTHS[zoom]])
+    elif zoom == 'month':
+        index = np.arange(MONTH_START_HOURS[number - 1], MONTH_START_HOURS[number])
+    elif zoom == 'week':
+        index = np.arange((number - 1) * 168, number * 168)
+    elif zoom == 'day':
+        index = np.arange((number - 1) * 24, number * 24)
+    elif zoom == 'hour':
+        index = np.arange(n_hours)
+    else:
+        raise ValueError(f"Unknown zoom '{zoom}'")
+    return index[index < n_hours]
+
+
+def _zoom_capitalized(var, zoom, partial_week='keep'):
+    # Common part of the zoom_on_* functions ('Hour', 'Day', 'Week', 'Month', sums)
     if zoom == 'Hour':
-        variable_zoomed = var
+        return var
     if zoom == 'Day':
-        n_hour = 24
-        for x in range(0,len(var),n_hour):
-            if x + n_hour < len(var):
-                variable_zoomed.append(sum(var[x:x+n_hour]))
-            else:
-                variable_zoomed.append(sum(var[x:]))
-    elif zoom == 'Week':
-        n_hour = 7 * 24
-        for x in range(0,len(var),n_hour):
-            if x + n_hour < len(var):
-                variable_zoomed.append(sum(var[x:x+n_hour]))
+        return resample(var, 'day', 'sum')
+    if zoom == 'Week':
+        return resample(var, 'week', 'sum', partial=partial_week)
+    if zoom == 'Month':
+        n_years = len(var) // HOURS_PER_YEAR # complete years only, as before
+        return resample(var[:n_years * HOURS_PER_YEAR], 'month', 'sum')
+    return []
+
+
+#%% N°37ter : streaming aggregator (running sums, extremes and counts chunk by chunk)
+
+def iter_array_chunks(data, chunk_hours=HOURS_PER_YEAR):
+    # Chunks (nodes x chunk_hours) of a series or a matrix, e.g. a memory-mapped matrix of 
+    # GBOML_function.load_tensor_layout / get_tensor_series: only one chunk is read at a time
+    for start in range(0, data.shape[-1], chunk_hours):
+        yield data[..., start:start + chunk_hours]
+
+
+def iter_csv_chunks(path, chunk_hours=HOURS_PER_YEAR, column=0, delimiter=','):
+    # Chunks of an hourly file with one value per line (Data/Load_factor, Data/Demand...)
+    # Only the first line can be a header: a later line which is not a number raises a 
+    # ValueError (it would shift all the next hours)
+    chunk = []
+    first = True
+    with open(path, 'r') as file:
+        for number, line in enumerate(file, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                chunk.append(float(line.split(delimiter)[column]))
+            except (ValueError, IndexError):
+                if first: # header
+                    first = False
+                    continue
+                raise ValueError(f"{path}, line {number}: cannot read a value in column {column} from {line!r}")
+            first = False
+            if len(chunk) == chunk_hours:
+                yield np.array(chunk)
+                chunk = []
+    if chunk:
+        yield np.array(chunk)
+
+
+def _group_full_counts(labels, freq):
+    # Number of hours of complete groups, without building the hours of the horizon
+    if freq in ('day', 'week', 'year'):
+        return np.full(len(labels), {'day': 24, 'week': 168, 'year': HOURS_PER_YEAR}[freq])
+    month_hours = np.diff(MONTH_START_HOURS)
+    if freq == 'month':
+        return month_hours[labels % 12]
+    season_hours = np.array([month_hours[[m - 1 for m in SEASONS_MONTHS[season]]].sum() for season in SEASONS_ORDER])
+    return season_hours[labels % 4]
+
+
+class StreamingAggregator:
+    """
+    Running daily / weekly / monthly / seasonal / yearly statistics of hourly series fed 
+    chunk by chunk (chunks of any length, one series (T,) or nodes x T). The memory only 
+    depends on the number of groups, not on the length of the horizon.
+    
+        aggregator = StreamingAggregator(freqs=('day', 'month', 'year'))
+        for chunk in iter_csv_chunks(path):
+            aggregator.update(chunk)
+        aggregator.result('month', 'sum')
+    """
+    
+    STATS = ('sum', 'mean', 'min', 'max', 'count')
+    
+    def __init__(self, freqs=('day', 'week', 'month', 'year'), names=None):
+        for freq in freqs:
+            _calendar_group_of_hours(np.arange(1), freq) # check the frequency
+        self.freqs = tuple(freqs)
+        self.names = names
+        self.hours = 0 # hours already consumed
+        self.state = {} # freq -> {'sum', 'min', 'max', 'count'} arrays (nodes x groups)
+
+    def _grow(self, freq, n_nodes, size):
+        state = self.state.get(freq)
+        if state is None:
+            state = self.state[freq] = {'sum': np.zeros((n_nodes, 0)), 'min': np.zeros((n_nodes, 0)), 
+                                        'max': np.zeros((n_nodes, 0)), 'count': np.zeros(0, dtype=np.int64)}
+        missing = size - len(state['count'])
+        if missing > 0:
+            missing = max(missing, len(state['count'])) # doubling, few reallocations
+            state['sum'] = np.concatenate((state['sum'], np.zeros((n_nodes, missing))), axis=1)
+            state['min'] = np.concatenate((state['min'], np.full((n_nodes, missing), np.inf)), axis=1)
+            state['max'] = np.concatenate((state['max'], np.full((n_nodes, missing), -np.inf)), axis=1)
+            state['count'] = np.concatenate((state['count'], np.zeros(missing, dtype=np.int64)))
+        return state
+
+    def update(self, chunk):
+        x = np.atleast_2d(np.asarray(chunk, dtype=float))
+        if x.shape[1] == 0:
+            return self
+        t = np.arange(self.hours, self.hours + x.shape[1])
+        
+        for freq in self.freqs:
+            group = _calendar_group_of_hours(t, freq)
+            if np.any(np.diff(group) < 0): # seasons: winter is split in two blocks
+                order = np.argsort(group, kind='stable')
+                group, xs = group[order], x[:, order]
             else:
-                variable_zoomed.append(sum(var[x:]))
-    elif zoom == 'Month':
-        n_hour = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31] * int(len(var)/8760)
-        n_hour = [x * 24 for x in n_hour] 
-        n = 0
-        for x in range(0,12 * int(len(var)/8760)):
-            variable_zoomed.append(sum(var[n:n+n_hour[x]]))
-            n += n_hour[x]
-    return variable_zoomed
+                xs = x
+            labels, starts, counts = np.unique(group, return_index=True, return_counts=True)
+            if freq in self.state and self.state[freq]['sum'].shape[0] != x.shape[0]:
+                raise ValueError(f"Chunk with {x.shape[0]} series, {self.state[freq]['sum'].shape[0]} expected")
+            state = self._grow(freq, x.shape[0], labels[-1] + 1)
+            state['sum'][:, labels] += np.add.reduceat(xs, starts, axis=1)
+            state['min'][:, labels] = np.minimum(state['min'][:, labels], np.minimum.reduceat(xs, starts, axis=1))
+            state['max'][:, labels] = np.maximum(state['max'][:, labels], np.maximum.reduceat(xs, starts, axis=1))
+            state['count'][labels] += counts
+        
+        self.hours += x.shape[1]
+        return self
+
+    def consume(self, chunks):
+        for chunk in chunks:
+            self.update(chunk)
+        return self
+
+    def result(self, freq, stat='sum', partial='keep'):
+        # DataFrame (groups x series) of one statistic, partial='drop' removes the groups 
+        # which are not complete (end of the horizon)
+        if freq not in self.state:
+            raise ValueError(f"Nothing aggregated by '{freq}' (frequencies: {self.freqs})")
+        if stat not in self.STATS:
+            raise ValueError(f"stat must be one of {self.STATS}")
+        state = self.state[freq]
+        labels = np.flatnonzero(state['count'])
+        counts = state['count'][labels]
+        if stat == 'count':
+            values = np.broadcast_to(counts, (state['sum'].shape[0], len(labels)))
+        elif stat == 'mean':
+            values = state['sum'][:, labels] / counts
+        else:
+            values = state[stat][:, labels]
+        
+        if partial == 'drop':
+            keep = counts == _group_full_counts(labels, freq)
+            labels, values = labels[keep], values[:, keep]
+        
+        names = self.names if self.names is not None else list(range(values.shape[0]))
+        return pd.DataFrame(values.T, index=pd.Index(labels, name=freq), columns=names)
+
+    def summary(self, freq, partial='keep'):
+        # All the statistics of one frequency in one table (groups x (stat, series))
+        return pd.concat({stat: self.result(freq, stat, partial) for stat in self.STATS}, axis=1)
+
+
+def aggregate_stream(chunks, freqs=('day', 'week', 'month', 'year'), names=None):
+    # One pass over an iterable of chunks (iter_array_chunks, iter_csv_chunks or any generator)
+    return StreamingAggregator(freqs, names).consume(chunks)
+
+
+#%% N°38 : def zoom_on_variable_in_cluster(cluster,variable,zoom,dictionary): 
+
+def zoom_on_variable_in_cluster(cluster,variable,zoom,dictionary): 
+    var = dictionary["solution"]["elements"][cluster]["variables"][variable]['values']
+    return _zoom_capitalized(var, zoom)
 
 #%% N°39 : def zoom_on_variable_in_cluster_subnode(cluster,variable,node,zoom,dictionary): 
 
 def zoom_on_variable_in_cluster_subnode(cluster,variable,node,zoom,dictionary): 
     var = dictionary["solution"]["elements"][cluster]["sub_elements"][node]["variables"][variable]['values']
-    variable_zoomed = []
-    if zoom == 'Hour':
-        variable_zoomed = var
-    if zoom == 'Day':
-        n_hour = 24
-        for x in range(0,len(var),n_hour):
-            if x + n_hour < len(var):
-                variable_zoomed.append(sum(var[x:x+n_hour]))
-            else:
-                variable_zoomed.append(sum(var[x:]))
-    elif zoom == 'Week':
-        n_hour = 7 * 24  # 7 jours par semaine, 24 heures par jour
-        total_weeks = len(var) / n_hour  # Nombre total de semaines
-        total_weeks = round(total_weeks)  # Arrondir le nombre de semaines à l'entier le plus proche, ici 52
-
-        # Diviser la variable en semaines arrondies
-        for i in range(total_weeks):
-            start_index = i * n_hour
-            end_index = (i + 1) * n_hour if (i + 1) * n_hour < len(var) else len(var)
-            variable_zoomed.append(sum(var[start_index:end_index]))
-
-    elif zoom == 'Month':
-        # Mois avec le nombre d'heures pour chaque mois (en considérant l'année non bissextile)
-        n_hour = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31] * int(len(var) / 8760)
-        n_hour = [x * 24 for x in n_hour]  # Conversion en heures
-        n = 0
-        for x in range(0, 12 * int(len(var) / 8760)):
-            variable_zoomed.append(sum(var[n:n + n_hour[x]]))
-            n += n_hour[x]
-    return variable_zoomed
+    # Weeks: the last incomplete week is left out (52 weeks for a year)
+    return _zoom_capitalized(var, zoom, partial_week='drop')
 
 
 
@@ -976,31 +1504,7 @@ def zoom_on_variable_in_cluster_subnode(cluster,variable,node,zoom,dictionary):
 
 def zoom_on_global_parameter(global_parameter,zoom,dictionary): 
     var = dictionary["model"]["global_parameters"][global_parameter]
-    variable_zoomed = []
-    if zoom == 'Hour':
-        variable_zoomed = var
-    if zoom == 'Day':
-        n_hour = 24
-        for x in range(0,len(var),n_hour):
-            if x + n_hour < len(var):
-                variable_zoomed.append(sum(var[x:x+n_hour]))
-            else:
-                variable_zoomed.append(sum(var[x:]))
-    elif zoom == 'Week':
-        n_hour = 7 * 24
-        for x in range(0,len(var),n_hour):
-            if x + n_hour < len(var):
-                variable_zoomed.append(sum(var[x:x+n_hour]))
-            else:
-                variable_zoomed.append(sum(var[x:]))
-    elif zoom == 'Month':
-        n_hour = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31] * int(len(var)/8760)
-        n_hour = [x * 24 for x in n_hour] 
-        n = 0
-        for x in range(0, 12*int(len(var)/8760)):
-            variable_zoomed.append(sum(var[n:n+n_hour[x]]))
-            n += n_hour[x]
-    return variable_zoomed
+    return _zoom_capitalized(var, zoom)
 
 # functions to create graph
 def plot_timeseries(axes, x, y, bot, lab):
@@ -1040,18 +1544,14 @@ def get_nodes_names_from_parameter_3C(parameter,clusters,dictionary):
 """
 def get_nodes_names_from_parameter_3C(parameter,clusters,dictionary):
     # get the names of nodes as a Dictionay in which the "parameter" is used
-    dic_nodes = dictionary["model"]["nodes"]
+    index = get_schema_index(dictionary)
+    using_parameter = index["cluster_parameters"].get(parameter, [])
     nodes_name = {'other':[]}
-    for node in dic_nodes:
+    for node in index["clusters"]:
         if node in clusters:
-            #dic_nodes[node] = dictionary["model"]["nodes"][node]["sub_nodes"] 
-            nodes_name[node] = []
-            for sub_node in dic_nodes[node]["sub_nodes"]:
-                if parameter in dic_nodes[node]["sub_nodes"][sub_node]["parameters"]:
-                    nodes_name[node].append(sub_node)
-        else:
-            if parameter in dic_nodes[node]["parameters"]:
-                nodes_name['other'].append(node)
+            nodes_name[node] = list(index["sub_parameters"][node].get(parameter, []))
+        elif node in using_parameter:
+            nodes_name['other'].append(node)
     return nodes_name
 
 
@@ -1098,6 +1598,11 @@ def get_nodes_names_from_parameter_3C(parameter,clusters,dictionary):
  
 def get_timeseries_dict(dictionary, cluster = None, nodes = None, variable = None, parameter = None):
     
+    if isinstance(dictionary, ResultModel) and variable is not None: # view on the matrix of the ResultModel
+        return dictionary.timeseries(cluster, variable, nodes)
+    if isinstance(dictionary, ResultModel):
+        dictionary = dictionary.dictionary
+    
     if nodes is None:
         nodes = {}
         
@@ -1125,6 +1630,17 @@ def get_timeseries_dict(dictionary, cluster = None, nodes = None, variable = Non
                 return nodes
     
 def get_total_timeseries_dict(data): 
+    if isinstance(data, pd.DataFrame): # e.g. ResultModel.select(...)
+        return data.to_numpy().sum(axis=0).tolist()
+    
+    # Series of the same length (arrays of a ResultModel or lists): one vectorized sum
+    lengths = {len(serie) for serie in data.values() if hasattr(serie, '__len__')}
+    if data and len(lengths) == 1 and all(hasattr(serie, '__len__') for serie in data.values()):
+        try:
+            return np.sum(np.array(list(data.values()), dtype=float), axis=0).tolist()
+        except (TypeError, ValueError):
+            pass
+    
     total = None
 
     for key, serie in data.items():
@@ -1237,19 +1753,19 @@ def zoom_with_timestep(data, zoom = 'hour', mean_or_sum='mean', zero_nodes='no')
                     var = value['values']
                 except:
                     var = value
-            elif isinstance(value, list):
+            elif isinstance(value, (list, np.ndarray)): # np.ndarray for the memory-mapped layout
                 var = value
             else:
                 raise ValueError("Each value in the dictionary must be a dictionary with a 'values' key or a list.")
             
             # Si zero_nodes == 'no', on ignore les séries de valeurs nulles ou composées uniquement de zéros
-            if zero_nodes == 'no' and (not var or all(v == 0 for v in var)):
+            if zero_nodes == 'no' and (len(var) == 0 or all(v == 0 for v in var)):
                 continue  # On ignore cette clé si la série est vide ou composée uniquement de zéros
 
             # Appliquer le zoom à la série
             variable_zoomed[key] = _apply_zoom(var, zoom, mean_or_sum)
 
-    elif isinstance(data, list):
+    elif isinstance(data, (list, np.ndarray)):
         variable_zoomed = _apply_zoom(data, zoom, mean_or_sum)
     else:
         raise ValueError("Data must be a dictionary or a list.")
@@ -1259,48 +1775,37 @@ def zoom_with_timestep(data, zoom = 'hour', mean_or_sum='mean', zero_nodes='no')
 
 def _apply_zoom(var, zoom, mean_or_sum):
     
-    variable_zoomed = []
+    how = 'sum' if mean_or_sum == 'sum' else 'mean'
 
-    if zoom == 'hour':
-        variable_zoomed = var
-
-    elif zoom == 'day':
-        n_hour = 24
-        for x in range(0, len(var), n_hour):
-            block = var[x:x+n_hour]
-            value = sum(block) if mean_or_sum == 'sum' else np.mean(block)
-            variable_zoomed.append(value)
+    if zoom == 'day':
+        return resample(var, 'day', how)
 
     elif zoom == 'week':
-        hours_per_week = 7 * 24
-        total_weeks = len(var) // hours_per_week
-
-        for i in range(total_weeks):
-            week_data = var[i * hours_per_week : (i + 1) * hours_per_week]
-            value = sum(week_data) if mean_or_sum == 'sum' else np.mean(week_data)
-            variable_zoomed.append(value)
+        return resample(var, 'week', how, partial='drop') # complete weeks only
 
     elif zoom == 'month':
-        month_lengths = [31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]
-        total_years = len(var) // 8760
-        month_lengths *= total_years
-        month_lengths_hours = [d * 24 for d in month_lengths]
-
-        n = 0
-        for month_hour in month_lengths_hours:
-            month_data = var[n:n + month_hour]
-            value = sum(month_data) if mean_or_sum == 'sum' else np.mean(month_data)
-            variable_zoomed.append(value)
-            n += month_hour
+        total_years = len(var) // HOURS_PER_YEAR # complete years only
+        return resample(var[:total_years * HOURS_PER_YEAR], 'month', how)
             
-    else:  
-        variable_zoomed = var    
+    # 'hour' or unknown zoom: the raw data
+    return var
 
-    return variable_zoomed
-    
-#%% N°42bis : functions to choose the zoom and the step of the data
 
-import builtins
+def zoom_matrix(matrix, zoom='hour', mean_or_sum='mean'):
+    # _apply_zoom of all the rows of a nodes x T matrix at once (numpy array out)
+    matrix = np.atleast_2d(np.asarray(matrix, dtype=float))
+    how = 'sum' if mean_or_sum == 'sum' else 'mean'
+
+    if zoom == 'day':
+        return resample_matrix(matrix, 'day', how)
+    elif zoom == 'week':
+        return resample_matrix(matrix, 'week', how, partial='drop')
+    elif zoom == 'month':
+        total_years = matrix.shape[1] // HOURS_PER_YEAR
+        return resample_matrix(matrix[:, :total_years * HOURS_PER_YEAR], 'month', how)
+    return matrix
+
+#%% N°42bis : functions to choose the zoom and the step of the data
 
 def precise_zoom_with_timestep(data, zoom, number, step='hour', time_horizon=8760, mean_or_sum='sum', zero_nodes='yes'):
     # If the input data is a dictionary, apply zoom to each key
@@ -1310,8 +1815,8 @@ def precise_zoom_with_timestep(data, zoom, number, step='hour', time_horizon=876
             # If the value is a dictionary containing the 'values' key
             if isinstance(value, dict) and 'values' in value:
                 var = value['values']
-            # If the value is a list
-            elif isinstance(value, list):
+            # If the value is a list (or a numpy view of the memory-mapped layout)
+            elif isinstance(value, (list, np.ndarray)):
                 var = value
             else:
                 raise ValueError("Each value must be either a dictionary with a 'values' key or a list.")
@@ -1320,7 +1825,7 @@ def precise_zoom_with_timestep(data, zoom, number, step='hour', time_horizon=876
             variable_zoomed[key] = _apply_precise_zoom(var, zoom, step, number, mean_or_sum, zero_nodes)
 
     # If the data is a list
-    elif isinstance(data, list):
+    elif isinstance(data, (list, np.ndarray)):
         variable_zoomed = _apply_precise_zoom(data, zoom, step, number, mean_or_sum, zero_nodes)
     
     # Unsupported data types
@@ -1335,62 +1840,33 @@ def _apply_precise_zoom(var, zoom, step, number, mean_or_sum, zero_nodes):
     if zero_nodes == 'no' and not any(var):
         return []
 
-    variable_zoomed = []
-
-    # Months associated with each season
-    seasons_months = {
-        'spring': [3, 4, 5],    # March, April, May
-        'summer': [6, 7, 8],    # June, July, August
-        'fall':   [9, 10, 11],  # September, October, November
-        'winter': [12, 1, 2]    # December, January, February
-    }
-
-    # If zooming by season
-    if zoom in seasons_months:
-        months = seasons_months[zoom]
-        for month in months:
-            start_hour = (month - 1) * 730  # Approx. 730 hours per month
-            end_hour = month * 730
-            season_data = var[start_hour:end_hour]
-            variable_zoomed.extend(_apply_step(season_data, step, mean_or_sum))
-
-    # Zoom by a specific month
-    elif zoom == 'month':
-        start_hour = (number - 1) * 730
-        end_hour = number * 730
-        month_data = var[start_hour:end_hour]
-        variable_zoomed.extend(_apply_step(month_data, step, mean_or_sum))
-
-    # Zoom by a specific week
-    elif zoom == 'week':
-        week_data = var[(number - 1) * 168 : number * 168]
-        variable_zoomed.extend(_apply_step(week_data, step, mean_or_sum))
-
-    # Zoom by a specific day
-    elif zoom == 'day':
-        day_data = var[(number - 1) * 24 : number * 24]
-        variable_zoomed.extend(_apply_step(day_data, step, mean_or_sum))
-
     # No zoom, return raw data
-    elif zoom == 'hour':
-        variable_zoomed = var
+    if zoom == 'hour':
+        return var
+    
+    if zoom not in SEASONS_MONTHS and zoom not in ('month', 'week', 'day'):
+        return []
 
-    return variable_zoomed
+    # True calendar boundaries of the month / season (no more 730 h months)
+    if zoom in SEASONS_MONTHS:
+        # Each month of the season is aggregated separately, then put one after the other
+        variable_zoomed = []
+        for month in SEASONS_MONTHS[zoom]:
+            month_data = np.asarray(var, dtype=float)[calendar_slice(len(var), 'month', month)]
+            variable_zoomed.extend(_apply_step(month_data, step, mean_or_sum))
+        return variable_zoomed
+    
+    index = calendar_slice(len(var), zoom, number)
+    return list(_apply_step(np.asarray(var, dtype=float)[index], step, mean_or_sum))
 
 
 def _apply_step(data, step, mean_or_sum):
+    how = 'sum' if mean_or_sum == 'sum' else 'mean'
     if step == 'hour':
         return data
-    elif step == 'day':
-        return [
-            builtins.sum(data[i:i + 24]) if mean_or_sum == 'sum' else np.mean(data[i:i + 24])
-            for i in range(0, len(data), 24)
-        ]
-    elif step == 'week':
-        return [
-            builtins.sum(data[i:i + 168]) if mean_or_sum == 'sum' else np.mean(data[i:i + 168])
-            for i in range(0, len(data), 168)
-        ]
+    elif step in ('day', 'week'):
+        # Blocks of 24 / 168 values from the start of "data", the last one can be shorter
+        return resample(data, step, how)
     else:
         raise ValueError(f"Step '{step}' not recognized. Use 'hour', 'day' or 'week'.")
 
@@ -1538,86 +2014,32 @@ def precise_zoom(data, format, number, step='hour', mean_sum='sum'):
     Returns:
         list: Aggregated values for the selected period.
     """
-    if 'values' not in data or not isinstance(data['values'], list):
+    if 'values' not in data or not isinstance(data['values'], (list, np.ndarray)):
         raise ValueError("Data must be a dictionary containing a 'values' list.")
 
     values = data['values']
     total_hours = len(values)  # Adaptation to the actual length of the data
+    allowed_steps = {'Day': ['hour'], 'Week': ['hour', 'day'], 'Month': ['hour', 'day', 'week'], 'Season': ['hour', 'day', 'week']}
 
-    # Number of hours per month for a standard year
-    hours_per_month = np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31]) * 24
-
-    # Extraction of a day
-    if format == 'Day':
-        start_idx = (number - 1) * 24
-        if start_idx >= total_hours:
-            raise ValueError("Requested day exceeds available data range.")
-        period_values = values[start_idx:min(start_idx + 24, total_hours)]
-        if step == 'hour':
-            return period_values
-        raise ValueError("For 'Day', only 'hour' step is allowed.")
-
-    # Extraction of a week
-    elif format == 'Week':
-        start_idx = (number - 1) * 7 * 24
-        if start_idx >= total_hours:
-            raise ValueError("Requested week exceeds available data range.")
-        period_values = values[start_idx:min(start_idx + 7 * 24, total_hours)]
-        if step == 'day':
-            period_values = [sum(period_values[i:i+24]) if mean_sum == 'sum' else np.mean(period_values[i:i+24]) 
-                             for i in range(0, len(period_values), 24)]
-        elif step != 'hour':
-            raise ValueError("For 'Week', only 'hour' and 'day' steps are allowed.")
-
-    # Extraction of a month
-    elif format == 'Month':
-        if number < 1 or number > 12:
-            raise ValueError("Month number must be between 1 and 12.")
-        start_idx = sum(hours_per_month[:number-1])  # Calculate the start index
-        if start_idx >= total_hours:
-            raise ValueError("Requested month exceeds available data range.")
-        period_values = values[start_idx:min(start_idx + hours_per_month[number-1], total_hours)]
-        if step == 'day':
-            period_values = [sum(period_values[i:i+24]) if mean_sum == 'sum' else np.mean(period_values[i:i+24]) 
-                             for i in range(0, len(period_values), 24)]
-        elif step == 'week':
-            period_values = [sum(period_values[i:i+7*24]) if mean_sum == 'sum' else np.mean(period_values[i:i+7*24]) 
-                             for i in range(0, len(period_values), 7*24)]
-        elif step != 'hour':
-            raise ValueError("For 'Month', only 'hour', 'day', and 'week' steps are allowed.")
-
-    # Extraction of a season
-    elif format == 'Season':
-        if number < 1 or number > 4:
-            raise ValueError("Season number must be between 1 (Winter), 2 (Spring), 3 (Summer), and 4 (Fall).")
-        season_hours = {
-            1: sum(hours_per_month[:2]) + 31 * 24,  # Winter: Dec (31 days) + Jan + Feb
-            2: sum(hours_per_month[2:5]),          # Spring: Mar + Apr + May
-            3: sum(hours_per_month[5:8]),          # Summer: Jun + Jul + Aug
-            4: sum(hours_per_month[8:11]) + 30 * 24  # Fall: Sep + Oct + Nov
-        }
-        start_idx = {
-            1: total_hours - 31 * 24 - sum(hours_per_month[:2]),  # Winter starts in Dec of the previous year
-            2: sum(hours_per_month[:2]),                         # Spring starts in Mar
-            3: sum(hours_per_month[:5]),                         # Summer starts in Jun
-            4: sum(hours_per_month[:8])                          # Fall starts in Sep
-        }[number]
-        if start_idx >= total_hours:
-            raise ValueError("Requested season exceeds available data range.")
-        period_values = values[start_idx:min(start_idx + season_hours[number], total_hours)]
-        if step == 'day':
-            period_values = [sum(period_values[i:i+24]) if mean_sum == 'sum' else np.mean(period_values[i:i+24]) 
-                             for i in range(0, len(period_values), 24)]
-        elif step == 'week':
-            period_values = [sum(period_values[i:i+7*24]) if mean_sum == 'sum' else np.mean(period_values[i:i+7*24]) 
-                             for i in range(0, len(period_values), 7*24)]
-        elif step != 'hour':
-            raise ValueError("For 'Season', only 'hour', 'day', and 'week' steps are allowed.")
-
-    else:
+    if format not in allowed_steps:
         raise ValueError("Invalid format. Choose 'Day', 'Week', 'Month', or 'Season'.")
-
-    return period_values
+    if format == 'Month' and (number < 1 or number > 12):
+        raise ValueError("Month number must be between 1 and 12.")
+    if format == 'Season' and (number < 1 or number > 4):
+        raise ValueError("Season number must be between 1 (Winter), 2 (Spring), 3 (Summer), and 4 (Fall).")
+    if step not in allowed_steps[format]:
+        raise ValueError(f"For '{format}', only {', '.join(allowed_steps[format])} steps are allowed.")
+
+    # True calendar boundaries, winter = December + January + February of the year
+    zoom = SEASONS_ORDER[number - 1] if format == 'Season' else format.lower()
+    index = calendar_slice(total_hours, zoom, number)
+    if len(index) == 0:
+        raise ValueError(f"Requested {format.lower()} exceeds available data range.")
+    
+    period_values = np.asarray(values, dtype=float)[index]
+    if step == 'hour':
+        return period_values.tolist() if isinstance(values, list) else period_values
+    return resample(period_values, step, 'sum' if mean_sum == 'sum' else 'mean')
 
 
 #%% N°45 : functions to create graph
@@ -2329,11 +2751,14 @@ def duration_sort(data, sort_by=None, ascending=False):
             raise ValueError("For dictionaries, 'sort_by' must be specified.")
         sorted_data = sorted(data.items(), key=lambda x: x[1][sort_by], reverse=not ascending)
         
-    elif isinstance(data, list):
-        if all(isinstance(i, (int, float)) for i in data):
-            sorted_data = sorted(data, reverse=not ascending)
-        else:
+    elif isinstance(data, (list, np.ndarray)):
+        try:
+            sorted_data = np.sort(np.asarray(data, dtype=float))
+        except (TypeError, ValueError):
             raise TypeError("The list must contain numbers (int or float).")
+        sorted_data = sorted_data if ascending else sorted_data[::-1]
+        if isinstance(data, list):
+            sorted_data = sorted_data.tolist()
         
     else:
         raise TypeError("The data must be a dictionary or a list of dictionaries.")
@@ -2341,6 +2766,192 @@ def duration_sort(data, sort_by=None, ascending=False):
     return sorted_data
 
     
+#%% N°51bis : duration-curve engine: sorted profiles of a nodes x T matrix, cached per result
+
+import hashlib
+
+DURATION_CACHE_SIZE = 64
+DURATION_CACHE_MAX_BYTES = 256 * 1024**2
+_DURATION_CACHE = OrderedDict() # key -> DurationCurves
+
+
+def _series_rows(data):
+    # (names, list of 1D float arrays) of {node: values}, list of series, 2D array or DataFrame
+    if isinstance(data, pd.DataFrame):
+        return list(data.index), list(data.to_numpy(dtype=float))
+    if isinstance(data, dict):
+        return list(data.keys()), [np.asarray(v, dtype=float).ravel() for v in data.values()]
+    if isinstance(data, np.ndarray) or (isinstance(data, (list, tuple)) and data and np.ndim(data[0]) == 0):
+        matrix = np.asarray(data, dtype=float)
+        rows = list(matrix.reshape(1, -1) if matrix.ndim == 1 else matrix)
+    else:
+        rows = [np.asarray(v, dtype=float).ravel() for v in data]
+    return [f"Node {i+1}" for i in range(len(rows))], rows
+
+
+class DurationCurves:
+    # Duration curves of several nodes: one np.sort of the whole nodes x T matrix.
+    # data: {node: values}, list of series, 2D array or DataFrame (nodes in rows)
+    # Series of different lengths are padded with NaN at the end of their sorted curve 
+    # (lengths gives the number of hours of each node).
+    # The sorted matrix is read-only and shared through the cache: do not modify it.
+    
+    def __init__(self, data, drop_zeros='yes'):
+        names, rows = _series_rows(data)
+        lengths = np.array([len(r) for r in rows], dtype=int)
+        matrix = np.full((len(rows), lengths.max() if len(rows) else 0), np.nan)
+        for i, r in enumerate(rows):
+            matrix[i, :len(r)] = r
+        
+        if drop_zeros == 'yes': # nodes which never produce are not shown
+            keep = np.any((matrix != 0) & ~np.isnan(matrix), axis=1)
+            names, matrix, lengths = [n for n, k in zip(names, keep) if k], matrix[keep], lengths[keep]
+        
+        self.sorted = -np.sort(-matrix, axis=1) # descending, the NaN padding stays at the end
+        self.sorted.setflags(write=False)
+        self.names = names
+        self.lengths = lengths
+        self.horizon = self.sorted.shape[1]
+        self._cumsum = None
+
+    @property
+    def nbytes(self):
+        return self.sorted.nbytes + (self._cumsum.nbytes if self._cumsum is not None else 0)
+
+    def _last(self, k):
+        # Value at the hour k of every curve (NaN when the curve is shorter)
+        rows = np.arange(len(self.names))
+        valid = (k >= 0) & (k < self.lengths)
+        values = self.sorted[rows, np.clip(k, 0, max(self.horizon - 1, 0))] if self.horizon else np.full(len(rows), np.nan)
+        return np.where(valid, values, np.nan)
+
+    @property
+    def totals(self):
+        return pd.Series(np.nansum(self.sorted, axis=1), index=self.names)
+
+    @property
+    def peaks(self):
+        return pd.Series(self._last(np.zeros(len(self.names), dtype=int)), index=self.names)
+
+    @property
+    def means(self):
+        totals = np.nansum(self.sorted, axis=1)
+        return pd.Series(np.where(self.lengths > 0, totals / np.maximum(self.lengths, 1), np.nan), index=self.names)
+
+    @property
+    def minimums(self):
+        return pd.Series(self._last(self.lengths - 1), index=self.names)
+
+    def curve(self, node):
+        i = self.names.index(node)
+        return self.sorted[i, :self.lengths[i]]
+
+    def quantile(self, q):
+        # Value exceeded during a fraction 1 - q of the hours (q scalar or list, in [0, 1])
+        if self.horizon == 0:
+            values = np.full((np.size(q), len(self.names)), np.nan)
+        else:
+            values = np.nanquantile(self.sorted, q, axis=1) if np.isnan(self.sorted).any() else np.quantile(self.sorted, q, axis=1)
+        if np.ndim(q) == 0:
+            return pd.Series(np.ravel(values), index=self.names)
+        return pd.DataFrame(np.reshape(values, (len(q), -1)).T, index=self.names, columns=list(q))
+
+    def hours_above(self, threshold):
+        # Number of hours strictly above the threshold (scalar or one per node)
+        threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (len(self.names),))
+        return pd.Series((self.sorted > threshold[:, None]).sum(axis=1), index=self.names)
+
+    def energy_above(self, threshold):
+        # Sum of (value - threshold) over the hours above the threshold, from the cumulated 
+        # sorted profiles: E = cumsum[k-1] - k * threshold with k the hours above
+        if self._cumsum is None:
+            self._cumsum = np.nancumsum(self.sorted, axis=1)
+        threshold = np.broadcast_to(np.asarray(threshold, dtype=float), (len(self.names),))
+        k = (self.sorted > threshold[:, None]).sum(axis=1)
+        above = np.where(k > 0, self._cumsum[np.arange(len(k)), np.maximum(k - 1, 0)], 0.0) if self.horizon else np.zeros(len(k))
+        return pd.Series(above - k * threshold, index=self.names)
+
+    def summary(self):
+        return pd.DataFrame({"Peak": self.peaks, "Mean": self.means, "Min": self.minimums, 
+                             "Total": self.totals}, index=self.names)
+
+    def compact(self, points=500):
+        # Resampled curves for the plots: the curves are monotonic so taking the values at 
+        # "points" hours (first and last included) keeps their shape
+        if self.horizon <= points:
+            hours = np.arange(self.horizon)
+        else:
+            hours = np.unique(np.linspace(0, self.horizon - 1, points).round().astype(int))
+        return hours, self.sorted[:, hours]
+
+
+def _duration_cache_put(key, curves):
+    # LRU bounded on the number of curves and on their memory (sorted + cumulated matrices)
+    _DURATION_CACHE[key] = curves
+    while len(_DURATION_CACHE) > 1 and (len(_DURATION_CACHE) > DURATION_CACHE_SIZE or 
+                                        sum(c.nbytes for c in _DURATION_CACHE.values()) > DURATION_CACHE_MAX_BYTES):
+        _DURATION_CACHE.popitem(last=False)
+    if curves.nbytes > DURATION_CACHE_MAX_BYTES:
+        _DURATION_CACHE.pop(key, None)
+    return curves
+
+
+def get_duration_curves(data, cluster=None, variable=None, nodes=None, drop_zeros='yes'):
+    # Cached DurationCurves.
+    # - result dictionary (or ResultModel) + cluster + variable: key = result id, the series 
+    #   are only extracted the first time
+    # - series ({node: values}, list, array, DataFrame): key = hash of their content
+    if isinstance(data, ResultModel) or _is_result_dictionary(data):
+        if cluster is None or variable is None:
+            raise ValueError("For a result, 'cluster' and 'variable' must be specified.")
+        result = data.dictionary if isinstance(data, ResultModel) else data
+        key = ("result", get_result_id(result), cluster, variable, tuple(nodes) if nodes is not None else None, drop_zeros)
+        if key in _DURATION_CACHE:
+            _DURATION_CACHE.move_to_end(key)
+            return _DURATION_CACHE[key]
+        if nodes is None or isinstance(data, ResultModel):
+            series = get_timeseries_dict(data, cluster=cluster, variable=variable, nodes=nodes)
+        else:
+            series = {node: get_cluster_element_variable(cluster, node, variable, result)['values'] for node in nodes}
+        return _duration_cache_put(key, DurationCurves(series, drop_zeros))
+    
+    names, rows = _series_rows(data)
+    digest = hashlib.blake2b(digest_size=16)
+    for row in rows: # series of any lengths
+        digest.update(len(row).to_bytes(8, "little"))
+        digest.update(np.ascontiguousarray(row).tobytes())
+    digest.update(repr(names).encode())
+    key = ("content", digest.hexdigest(), drop_zeros)
+    if key in _DURATION_CACHE:
+        _DURATION_CACHE.move_to_end(key)
+        return _DURATION_CACHE[key]
+    return _duration_cache_put(key, DurationCurves(dict(zip(names, rows)), drop_zeros))
+
+
+def clear_duration_cache():
+    _DURATION_CACHE.clear()
+
+
+def compare_duration_curves(results, cluster, variable, node=None, points=500, total='yes'):
+    # Compact duration curves of one variable across scenarios {name: result}.
+    # node=None and total='yes': duration curve of the sum over the nodes of the cluster
+    # Returns a DataFrame (hours x scenarios) ready to be plotted
+    curves = {}
+    for name, result in results.items():
+        if node is not None:
+            serie = get_duration_curves(result, cluster, variable, nodes=[node], drop_zeros='no').sorted[0]
+            curves[name] = serie
+        elif total == 'yes':
+            series = get_timeseries_dict(result, cluster=cluster, variable=variable)
+            curves[name] = get_duration_curves({"Total": get_total_timeseries_dict(series)}, drop_zeros='no').sorted[0]
+        else:
+            raise ValueError("Give a 'node' or use total='yes'.")
+    horizon = max(len(c) for c in curves.values())
+    hours = np.arange(horizon) if horizon <= points else np.unique(np.linspace(0, horizon - 1, points).round().astype(int))
+    return pd.DataFrame({name: pd.Series(c[hours[hours < len(c)]], index=hours[hours < len(c)]) 
+                         for name, c in curves.items()}, index=hours)
+
+    
 #%% N°52 : functions to plot load duration curves either in a single plot or stacked
     
 from matplotlib.lines import Line2D
@@ -2349,28 +2960,15 @@ import os
 
 def load_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6),
                         unit_cap='GW', unit_energy='TWh', is_together='no', ener_quan='Energy', 
-                        figsave = None): 
+                        figsave = None, points = 1000): 
 
-    node_productions = []
-    
-    if isinstance(data, list):
-        for i, value in enumerate(data):
-            if all(v == 0 for v in value):
-                continue
-            value_sorted = duration_sort(value, ascending=False)
-            peak_value = max(value_sorted)
-            total_production = sum(value_sorted)
-            node_productions.append((f"Node {i+1}", value_sorted, total_production))
-    elif isinstance(data, dict):
-        for node, value in data.items():
-            if all(v == 0 for v in value):
-                continue
-            value_sorted = duration_sort(value, ascending=False)
-            peak_value = max(value_sorted)
-            total_production = sum(value_sorted)
-            node_productions.append((node, value_sorted, total_production))
-    
-    node_productions.sort(key=lambda x: x[2], reverse=True)
+    # Sorted profiles of all the nodes with one np.sort (cached), plotted on "points" hours
+    curves = get_duration_curves(data)
+    order = np.argsort(-curves.totals.to_numpy(), kind='stable')
+    hours, compact = curves.compact(points)
+    horizon = curves.horizon
+    peaks, totals = curves.peaks.to_numpy(), curves.totals.to_numpy()
+    node_productions = [(curves.names[i], compact[i], peaks[i], totals[i]) for i in order]
 
     if is_together == 'no':
         plt.figure(figsize=figsize)
@@ -2378,18 +2976,17 @@ def load_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6),
         legend_labels = []  # Liste pour stocker les labels de légende
         handles = []  # Liste pour stocker les handles de légende
 
-        for node, value_sorted, total_production in node_productions:
-            peak_value = max(value_sorted) 
+        for node, value_sorted, peak_value, total_production in node_productions:
             legend_label = f'{node}: P$_{{rated}}$ = {peak_value:.2f} {unit_cap}, {ener_quan} = {total_production / 1000:.3f} {unit_energy}'
             legend_labels.append(legend_label)
-            handle, = plt.plot(value_sorted, label=legend_label)  # Garder le handle pour chaque courbe
+            handle, = plt.plot(hours, value_sorted, label=legend_label)  # Garder le handle pour chaque courbe
             handles.append(handle)  # Ajouter le handle à la liste
 
         plt.title(title)
         plt.xlabel(xlabel)
-        plt.xticks(ticks=np.append(np.arange(0, 8761, 1000), 8760))
+        plt.xticks(ticks=np.append(np.arange(0, horizon + 1, 1000), horizon))
         plt.ylabel(ylabel)
-        plt.xlim((0, 8761))
+        plt.xlim((0, horizon + 1))
         plt.legend(handles=handles, fontsize=8.5)
         plt.grid()
         
@@ -2398,8 +2995,7 @@ def load_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6),
         plt.show()
         
     else:
-        time_steps = len(node_productions[0][1])   
-        stacked_values = np.zeros(time_steps) 
+        stacked_values = np.zeros(len(hours)) 
 
         plt.figure(figsize=figsize)
 
@@ -2407,23 +3003,22 @@ def load_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6),
         legend_labels = []  # Liste pour stocker les labels de légende
         handles = []  # Liste pour stocker les handles de légende
 
-        for i, (node, value_sorted, total_production) in enumerate(node_productions):
-            peak_value = max(value_sorted)   
+        for i, (node, value_sorted, peak_value, total_production) in enumerate(node_productions):
             legend_labels.append(f'{node}: P$_{{rated}}$ = {peak_value:.2f} {unit_cap}, {ener_quan} = {total_production / 1000:.3f} {unit_energy}')
-            handle = plt.fill_between(range(time_steps), stacked_values, stacked_values + value_sorted, 
+            handle = plt.fill_between(hours, stacked_values, stacked_values + np.nan_to_num(value_sorted), 
                                         color=colors[i % len(colors)],
-                                        label=f'{node}: P$_{{rated}}$ = {peak_value:.2f} {unit_cap}, {ener_quan} = {total_production / 1000:.3f} {unit_energy}')
+                                        label=legend_labels[-1])
             handles.append(handle)  # Ajouter le handle à la liste
             
-            stacked_values += value_sorted
+            stacked_values += np.nan_to_num(value_sorted) # shorter series: NaN padding
 
         # ✅ Correction du calcul de l'énergie totale agrégée en TWh
-        E_tot = sum(tp for _, _, tp in node_productions) / 1000 
+        E_tot = sum(tp for _, _, _, tp in node_productions) / 1000 
 
         if is_together == 'yes':
 
             # Ajouter l'étiquette d'énergie totale dans la légende, en utilisant ener_quan
-            legend_label_total = r'Total {ener_quan} = $\int_{{t=0}}^{{8760}} P(t) \, dt = {0:.3f}$ {1}'.format(E_tot, unit_energy, ener_quan=ener_quan)
+            legend_label_total = r'Total {ener_quan} = $\int_{{t=0}}^{{{2}}} P(t) \, dt = {0:.3f}$ {1}'.format(E_tot, unit_energy, horizon, ener_quan=ener_quan)
 
             # Ajouter un élément invisible pour Total Energy dans la légende
             custom_legend = Line2D([0], [0], color='none', label=legend_label_total)
@@ -2431,9 +3026,9 @@ def load_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6),
 
         plt.title(title)
         plt.xlabel(xlabel)
-        plt.xticks(ticks=np.append(np.arange(0, 8761, 1000), 8760))
+        plt.xticks(ticks=np.append(np.arange(0, horizon + 1, 1000), horizon))
         plt.ylabel(ylabel)
-        plt.xlim((0, 8761))
+        plt.xlim((0, horizon + 1))
 
         # Mise à jour de la légende avec l'élément invisible et les autres labels
         plt.legend(handles=handles, fontsize=8.5)  # Passer la liste complète des handles
@@ -2443,53 +3038,36 @@ def load_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6),
             plt.savefig(figsave, format="pdf", bbox_inches="tight")
         plt.show()
         
-    return value_sorted
+    return curves.curve(curves.names[order[-1]]).tolist() if len(order) else []
 
 
 
-def cost_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6), figsave = None, unit='€/MWh'): 
-
-    node_productions = []
-    
-    if isinstance(data, list):
-        for i, value in enumerate(data):
-            if all(v == 0 for v in value):
-                continue
-            value_sorted = duration_sort(value, ascending=False)
-            peak_value = max(value_sorted)
-            total_production = sum(value_sorted)
-            node_productions.append((f"Node {i+1}", value_sorted, total_production))
-    elif isinstance(data, dict):
-        for node, value in data.items():
-            if all(v == 0 for v in value):
-                continue
-            value_sorted = duration_sort(value, ascending=False)
-            peak_value = max(value_sorted)
-            total_production = sum(value_sorted)
-            node_productions.append((node, value_sorted, total_production))
-    
-    node_productions.sort(key=lambda x: x[2], reverse=True)
+def cost_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6), figsave = None, unit='€/MWh', points = 1000): 
 
+    curves = get_duration_curves(data)
+    order = np.argsort(-curves.totals.to_numpy(), kind='stable')
+    hours, compact = curves.compact(points)
+    horizon = curves.horizon
+    summary = curves.summary()
 
     plt.figure(figsize=figsize)
 
     legend_labels = []  # Liste pour stocker les labels de légende
     handles = []  # Liste pour stocker les handles de légende
 
-    for node, value_sorted, total_production in node_productions:
-        peak_value = max(value_sorted) 
-        mean_value = mean(value_sorted)
-        min_value = min(value_sorted)
+    for i in order:
+        node = curves.names[i]
+        peak_value, mean_value, min_value = summary.iloc[i][["Peak", "Mean", "Min"]]
         legend_label = f'{node}: Max = {peak_value:.2f} {unit}, Mean = {mean_value:.2f} {unit}, Min = {min_value:.2f} {unit}'
         legend_labels.append(legend_label)
-        handle, = plt.plot(value_sorted, label=legend_label)  # Garder le handle pour chaque courbe
+        handle, = plt.plot(hours, compact[i], label=legend_label)  # Garder le handle pour chaque courbe
         handles.append(handle)  # Ajouter le handle à la liste
 
     plt.title(title)
     plt.xlabel(xlabel)
-    plt.xticks(ticks=np.append(np.arange(0, 8761, 1000), 8760))
+    plt.xticks(ticks=np.append(np.arange(0, horizon + 1, 1000), horizon))
     plt.ylabel(ylabel)
-    plt.xlim((0, 8761))
+    plt.xlim((0, horizon + 1))
     plt.legend(handles=handles, loc='upper center', bbox_to_anchor=(0.5, -0.12), ncol=5, fontsize=8.5)
     plt.grid()
     
@@ -2497,13 +3075,25 @@ def cost_duration_curves(data , xlabel, ylabel, title, figsize = (14, 6), figsav
         plt.savefig(figsave, format="pdf", bbox_inches="tight")
     plt.show()
 
-    return value_sorted
+    return curves.curve(curves.names[order[-1]]).tolist() if len(order) else []
 
         
         
 #%% TO HAVE ALL
 
+def _capacity_entry(variables, parameters, name_capacity, name_capacity_0, name_capacity_max):
+    # Same entry as get_cluster_subnodes_capacities_from_nodes, from the dicts of one node
+    capacity = variables[name_capacity]['values'][0] if name_capacity in variables else 0
+    capacity_0 = parameters[name_capacity_0][0] if name_capacity_0 in parameters else 0
+    capacity_max = parameters[name_capacity_max][0] if name_capacity_max in parameters else 'Not given'
+    return {"Preinstalled capacity":capacity_0,"Added capacity":capacity, "Total capacity":capacity_0 + capacity, "Max capacity": capacity_max}
+
+
+@memoize()
 def get_all_from_variable_and_parameter(dictionary, variable=None, parameter=None, to_print='no', cluster=None, global_parameter=None): 
+    # One traversal of solution.elements and model.nodes per cluster filling the 7 outputs 
+    # for all the variables at once (same output as the former loop version, see 
+    # Analyse/benchmark_extractors.py)
     if cluster is None:
         cluster = get_all_cluster_names(dictionary)
 
@@ -2514,140 +3104,100 @@ def get_all_from_variable_and_parameter(dictionary, variable=None, parameter=Non
     objective = {} 
     cost = {}
     prod = {}
+    
+    elements = dictionary["solution"]["elements"]
+    model_nodes = dictionary["model"]["nodes"]
 
     if variable is not None:
-        for v in variable: 
-            for clust in cluster: 
-                if clust not in var:
-                    var[clust] = {}
-                    cap[clust] = {}
-                    cost[clust] = {}
-                    prod[clust] = {}
-
-                var[clust][v] = {}
-                cap[clust][v] = {}
-                prod[clust][v] = {}
-
-                try:
-                    nodes = get_cluster_subnodes_names_from_variable(variable=v, cluster=clust, dictionary=dictionary)
-                except:
-                    try:
-                        cluster_data = get_cluster_variable(node=clust, variable=v, dictionary=dictionary)
-                        try:
-                            var[clust][v] = cluster_data['values']
-                        except:
-                            var[clust][v] = cluster_data
-                    except:
-                        continue
-
-                if not nodes:
+        for clust in cluster: 
+            var[clust] = {v: {} for v in variable}
+            cap[clust] = {v: {} for v in variable}
+            cost[clust] = {}
+            prod[clust] = {v: {} for v in variable}
+            
+            element = elements.get(clust)
+            if element is None:
+                continue
+            
+            if "sub_elements" not in element:
+                # No sub nodes: the variables of the cluster itself
+                for v in variable:
+                    if v in element.get("variables", {}):
+                        cluster_data = element["variables"][v]
+                        var[clust][v] = cluster_data['values'] if isinstance(cluster_data, dict) and 'values' in cluster_data else cluster_data
+                continue
+            
+            sub_nodes_par = model_nodes.get(clust, {}).get("sub_nodes", {})
+            
+            for node, sub in element["sub_elements"].items():
+                sub_variables = sub.get("variables", {})
+                used = [v for v in variable if v in sub_variables]
+                if not used:
                     continue
-
-                for node in nodes:
-                    try:
-                        if "sub_elements" not in dictionary["solution"]["elements"].get(clust, {}): 
-                            continue  
-
-                        # Capacités
-                        cluster_cap_data = {}
-                        not_given = False
-
-                        try:
-                            cap_result = get_cluster_subnodes_capacities_from_nodes(nodes=[node], cluster=clust, dictionary=dictionary)
-                            cluster_cap_data = cap_result
-                            values = list(cap_result.values())
-                            if values and isinstance(values[0], dict) and values[0].get("Max capacity", '') == 'Not given':
-                                not_given = True
-                        except:
-                            not_given = True
-
-                        if not_given:
-                            try:
-                                cluster_cap_data = get_cluster_subnodes_capacities_from_storage(nodes=[node], cluster=clust, dictionary=dictionary)
-                            except:
-                                cluster_cap_data = {}
-
-                        cap[clust][v].update(cluster_cap_data)
-
-                        # Objectif
-                        if clust not in objective:
-                            objective[clust] = {}
-
-                        try:
-                            obj_data = dictionary["solution"]["elements"][clust]["sub_elements"][node]["objectives"]
-                            obj_values = obj_data.get("named", obj_data).values()
-                            objective_sum = sum(val for val in obj_values if isinstance(val, (int, float)))
-                            objective[clust][node] = objective_sum
-                        except:
-                            objective_sum = 0
-
-                        # Production
-                        prod_val = 0
-                        try:
-                            var_entry = dictionary["solution"]["elements"][clust]["sub_elements"][node]["variables"].get(v, None)
-                            if var_entry is not None:
-                                if isinstance(var_entry, dict):
-                                    var_data = var_entry.get('values', [])
-                                else:
-                                    var_data = var_entry
-                                prod_val = sum(var_data) if isinstance(var_data, list) else var_data
-                                prod[clust][v][node] = prod_val / 1000
-                        except Exception as e:
-                            prod[clust][v][node] = 0
-                            print(f"Error computing prod for {clust}-{node}: {e}")
-                            continue
-
-                        # Coût
-                        try:
-                            cost[clust][node] = (objective_sum * 1000 / prod_val) if prod_val > 0 else 0
-                        except Exception as e:
-                            cost[clust][node] = 0
-                            print(f"Error computing cost for {clust}-{node}: {e}")
-
-                    except KeyError as e:
-                        print(f"KeyError in cluster {clust} for node {node}: {e}")
-                        continue  
-
-                # Variable globale (hors sous-nœuds)
-                try:
-                    cluster_data = get_timeseries_dict(dictionary, variable=v, cluster=clust)
-                    if cluster_data:
-                        if 'PRODUCTION' in cluster_data:
-                            try:
-                                special_data = get_cluster_variable(node=clust, variable=v, dictionary=dictionary)
-                                var[clust][v] = special_data['values']
-                            except:
-                                pass
-                        else:
-                            var[clust][v] = cluster_data
-                except:
-                    try:
-                        special_data = get_cluster_variable(node=clust, variable=v, dictionary=dictionary)
-                        if 'values' in special_data:
-                            var[clust][v] = special_data['values']
-                    except:
-                        continue
+                
+                # Capacities (node or storage), computed once for all the variables
+                if node in sub_nodes_par and "parameters" in sub_nodes_par[node]:
+                    parameters = sub_nodes_par[node]["parameters"]
+                    node_cap = {node: _capacity_entry(sub_variables, parameters, "new_capacity", "pre_installed_capacity", "max_capacity")}
+                    if node_cap[node]["Max capacity"] == 'Not given':
+                        node_cap = {node + ' power': _capacity_entry(sub_variables, parameters, "new_power_capacity", 
+                                                                     "pre_installed_capacity_power", "max_capacity_power"),
+                                    node + ' energy': _capacity_entry(sub_variables, parameters, "new_energy_capacity", 
+                                                                      "pre_installed_capacity_energy", "max_capacity_energy")}
+                else:
+                    node_cap = {}
+                
+                # Objective
+                objective.setdefault(clust, {})
+                objective_sum = 0
+                if "objectives" in sub:
+                    obj_data = sub["objectives"]
+                    obj_values = obj_data.get("named", obj_data).values()
+                    objective_sum = sum(val for val in obj_values if isinstance(val, (int, float)))
+                    objective[clust][node] = objective_sum
+                
+                for v in used:
+                    cap[clust][v].update(node_cap)
+                    
+                    # Production
+                    var_entry = sub_variables[v]
+                    var_data = var_entry.get('values', []) if isinstance(var_entry, dict) else var_entry
+                    if isinstance(var_data, list):
+                        prod_val = sum(var_data)
+                    elif isinstance(var_data, np.ndarray):
+                        prod_val = float(var_data.sum())
+                    else:
+                        prod_val = var_data
+                    prod[clust][v][node] = prod_val / 1000
+                    
+                    # Cost
+                    cost[clust][node] = (objective_sum * 1000 / prod_val) if prod_val > 0 else 0
+                    
+                    # Time series of the sub nodes
+                    var[clust][v][node] = var_data
+            
+            # Variable of the cluster (hors sous-nœuds) when the sub node is PRODUCTION
+            for v in variable:
+                if 'PRODUCTION' in var[clust][v]:
+                    special_data = element.get("variables", {}).get(v)
+                    var[clust][v] = special_data['values'] if isinstance(special_data, dict) and 'values' in special_data else {}
 
     if parameter is not None:
-        for p in parameter:
-            for clust in cluster:
-                if clust not in par:
-                    par[clust] = {}
-
-                try:
-                    cluster_data = get_timeseries_dict(dictionary, parameter=p, cluster=clust)
-                    if cluster_data:
-                        par[clust][p] = cluster_data
-                except:
-                    continue
+        for clust in cluster:
+            par[clust] = {}
+            sub_nodes = model_nodes.get(clust, {}).get("sub_nodes")
+            if sub_nodes is None:
+                continue
+            for p in parameter:
+                cluster_data = {node: sub["parameters"][p] for node, sub in sub_nodes.items() 
+                                if p in sub.get("parameters", {})}
+                if cluster_data:
+                    par[clust][p] = cluster_data
 
     if global_parameter is not None:
+        dic_global = dictionary["model"].get("global_parameters", {})
         for gp in global_parameter:
-            try:
-                data = get_timeseries_of_global_parameters(dictionary, gp)
-                glob_par[gp] = data
-            except:
-                continue 
+            glob_par[gp] = {gp: dic_global[gp]} if gp in dic_global else {}
 
     return {
         'variables': var,
@@ -2661,6 +3211,7 @@ def get_all_from_variable_and_parameter(dictionary, variable=None, parameter=Non
 
 
 
+
 #%% FUNCTION TO BAR PLOT 
 
 def map_energy_data(dict):
@@ -3247,45 +3798,80 @@ def get_total_cluster_subnodes_cost(capex_dict,fom_dict,vom_dict,obj_dict, all_v
     return total_cost
 
 
+def _cost_prod_metrics(row, all_var='yes', just_prod='no', type_node=None, time=8760):
+    # Dictionary of one production node (row of node_cost_table), as get_total_cluster_subnodes_cost
+    unit_prod, unit_cap, unit_cost = ("[TWh/y]", "[GW]", "[€/MWh]") if type_node is None else ("[Mt/y]", "[kt/h]", "[€/ton]")
+    total_prod = row["Production"]
+    capacity = row["Total capacity"]
+    tot_cost = row["Net objective [M€]"]
+    load_factor = 100*total_prod/ (capacity * time) if capacity > 0 else 0
+    if just_prod == 'yes':
+        return {f"Total production {unit_prod}": round(total_prod/1000, 3)}
+    
+    metrics = {}
+    if all_var == 'yes':
+        unit = "[M€/GW]" if type_node is None else "[M€/(kton/h)]"
+        metrics = {f"CAPEX {unit}": round(row["Capex"], 3),
+                   f"FOM {unit}": round(row["Fom"], 3),
+                   "VOM [M€/(GW.y)]" if type_node is None else "VOM [M€/(kton/h).y]": round(row["Vom"], 3)}
+    metrics.update({
+        f"Total production {unit_prod}": round(total_prod/1000, 3),
+        f"Total capacity {unit_cap}": round(capacity, 3),
+        "Total cost [M€]": round(tot_cost, 3),
+        "Load factor [%]": round(load_factor, 1)
+    })
+    if total_prod != 0:
+        metrics[f"Total cost {unit_cost}"] = round(tot_cost / (total_prod / 1000), 3)
+    return metrics
+
+
+def _cost_storage_metrics(row, all_var='yes', type_node=None):
+    # Dictionary of one storage node (row of node_cost_table), as get_total_cluster_storage_cost
+    ton = type_node is not None
+    unit_energy = "[kton/y]" if ton else "[TWh/y]"
+    metrics = {}
+    if all_var == 'yes':
+        unit = "[M€/(kton/h)]" if ton else "[M€/Gw]"
+        metrics = {f"CAPEX {unit}": round(row["Capex"], 3),
+                   f"FOM {unit}": round(row["Fom"], 3),
+                   "VOM [M€/(kton/h).y]" if ton else "VOM [M€/(Gw.y)]": round(row["Vom"], 3)}
+    metrics.update({
+        f"State of charge {unit_energy}": round(np.nan_to_num(row["Stored"])/1000, 3),
+        "Total capacity energy" if ton else "Total capacity energy [GWh]": round(np.nan_to_num(row["Total energy capacity"]), 3),
+        "Cost energy [M€]": round(row["Objective energy [M€]"], 3),
+        f"Total discharged {unit_energy}": round(np.nan_to_num(row["Discharged"])/1000, 3),
+        f"Total charged {unit_energy}": round(np.nan_to_num(row["Charged"])/1000, 3),
+        "Total capacity power" if ton else "Total capacity power [GW]": round(row["Total capacity"], 3),
+        "Cost power [M€]": round(row["Objective power [M€]"], 3),
+        "Total Cost [M€]": round(row["Objective [M€]"], 3),
+    })
+    return metrics
+
+
+@memoize(pure_when=lambda a: a['folder'] is None and a['show'] != 'yes')
 def all_cost_prod_dict_per_cluster(dict, cluster, variable, folder=None, file_name=None, all_var='yes', zero_node='yes', show ='yes',just_prod = 'no', type_node = None):
     """
     Fonction pour calculer les coûts de production, CAPEX, FOM, VOM et coûts totaux des sous-noeuds d’un cluster.
     Elle gère aussi bien les variables simples que multiples (ex: stockage avec puissance et énergie).
+    Les valeurs viennent de node_cost_table (même moteur de coûts que cost_table).
     """
     total_cost_tables_merged = {}
     cost_dicts = []
+    # Sous-noeuds en fonction de la variable (ou première si liste)
+    main_variable = variable[0] if isinstance(variable, list) else variable
+    table = node_cost_table(dict, variables=[main_variable], clusters=list(cluster))
 
     for clus in cluster:
-        # Récupération des noms des sous-noeuds en fonction de la variable (ou première si liste)
-        if isinstance(variable, list):
-            nodes = get_cluster_subnodes_names_from_variable(variable[0], clus, dict)
-        else:
-            nodes = get_cluster_subnodes_names_from_variable(variable, clus, dict)
-
-        # Récupération des capacités
-        capacities = get_cluster_subnodes_capacities_from_nodes(nodes, clus, dict)
-        
-        # Si les capacités max ne sont pas données, on bascule sur les versions "storage"
-        # Exclude 'LOAD_SHIFTING' node from special storage handling
-        if nodes and capacities.get(nodes[0], {}).get('Max capacity') == 'Not given' and nodes[0] != 'LOAD_SHIFTING' and nodes[0] != "DESALINATION" and just_prod == 'no':
-            capacities = get_cluster_subnodes_capacities_from_storage(nodes, clus, dict)
-            cost = get_objective_from_cluster_storage(clus, nodes, dict)
-            capex = get_capex_from_cluster_storage_capacities(clus, ['capex_power', 'capex_energy'], capacities, dict)
-            fom   = get_fom_from_cluster_storage_capacities(clus, ['fom_power', 'fom_energy'], capacities, dict)
-            vom   = get_vom_from_cluster_storage_variable(clus, ['vom_power', 'vom_energy'], variable, capacities, dict) 
-            cost_dict = get_total_cluster_storage_cost(capex, fom, vom, cost, all_var=all_var, type_node=type_node)
-        
-        else:
-            cost, _ = get_objective_from_cluster_subnodes_variable(clus, nodes, dict)
-            capex = get_capex_from_cluster_subnodes_capacity(clus, 'capex', capacities, dict)
-            fom   = get_fom_from_cluster_subnodes_capacity(clus, 'fom', capacities, dict)
-            vom   = get_vom_from_cluster_subnodes_variable(clus, 'vom', variable, capacities, dict) 
-            cost_dict = get_total_cluster_subnodes_cost(capex, fom, vom, cost, all_var=all_var,just_prod = just_prod, type_node=type_node)
-
-        # Supprime les noeuds à capacité nulle si demandé
-        if zero_node == 'no':
-            cost_dict = {k: v for k, v in cost_dict.items() if v.get("Total capacity [GW]", 0)}
-
+        cost_dict = {}
+        if clus in table.index.get_level_values("Cluster"):
+            for (node, _), row in table.xs(clus, level="Cluster").iterrows():
+                # Supprime les noeuds à capacité nulle si demandé
+                if zero_node == 'no' and not row["Total capacity"]:
+                    continue
+                if row["Type"] == "storage" and just_prod == 'no':
+                    cost_dict[node] = _cost_storage_metrics(row, all_var=all_var, type_node=type_node)
+                else:
+                    cost_dict[node] = _cost_prod_metrics(row, all_var=all_var, just_prod=just_prod, type_node=type_node)
         cost_dicts.append(cost_dict)
 
     merged_dict = merge_dictionaries(*cost_dicts, name=cluster) 
@@ -3319,6 +3905,7 @@ def cluster_objective(cluster, model):
     return cost 
 
 
+@memoize()
 def system_cost(model, approx=None, max_constraint = 'yes'):
     
     cluster_name = model['solution']["elements"]  
@@ -3635,3 +4222,848 @@ def month_xticks(data, unit="hour", align="start", strict=False):
 
     labels = months
     return data, positions, labels, n_target
+
+
+
+#%% N°53 : def iter_variables(dictionary, clusters=None): 
+
+def iter_variables(dictionary, clusters=None):
+    # Yield (cluster, node, variable, values) for every variable of the solution
+    # node is "" for the variables of the cluster itself
+    elements = dictionary["solution"]["elements"]
+    for cluster in elements:
+        if clusters is not None and cluster not in clusters:
+            continue
+        element = elements[cluster]
+        for variable, var in element.get("variables", {}).items():
+            yield cluster, "", variable, var["values"] if isinstance(var, dict) else var
+        for node, sub in element.get("sub_elements", {}).items():
+            for variable, var in sub.get("variables", {}).items():
+                yield cluster, node, variable, var["values"] if isinstance(var, dict) else var
+
+
+#%% N°54 : def diff_scenarios(dict_a, dict_b, tolerance=1e-6, top=None, clusters=None, elementwise='no'): 
+
+def diff_scenarios(dict_a, dict_b, tolerance=1e-6, top=None, clusters=None, elementwise='no'):
+    """
+    Compare two results on (cluster, node, variable), hourly and scalar variables.
+    The variables of a same length are stacked in one matrix per scenario so all the 
+    deltas are computed with numpy in one go.
+    
+    tolerance   : variables whose max absolute delta is below are skipped
+    top         : only keep the top largest changes (ranked on the max absolute delta)
+    elementwise : 'yes' also returns {(cluster, node, variable): array of b - a}
+    
+    Return a DataFrame (and the elementwise deltas if asked). The variables only in one 
+    scenario have a status 'only in a' / 'only in b', the ones whose series have different 
+    lengths a status 'shape mismatch' (sums only, no max delta).
+    """
+    a = {(c, n, v): val for c, n, v, val in iter_variables(dict_a, clusters)}
+    b = {(c, n, v): val for c, n, v, val in iter_variables(dict_b, clusters)}
+
+    # Group the common keys by length of the series
+    groups = {}
+    mismatched = []
+    for key in a.keys() & b.keys():
+        if len(a[key]) != len(b[key]):
+            mismatched.append(key)
+        elif len(a[key]): # two empty series: nothing to compare
+            groups.setdefault(len(a[key]), []).append(key)
+
+    rows = []
+    deltas = {}
+    for key in sorted(mismatched):
+        sum_a, sum_b = float(np.sum(a[key])), float(np.sum(b[key]))
+        rows.append({
+            "Cluster": key[0], "Node": key[1], "Variable": key[2],
+            "Type": "hourly" if max(len(a[key]), len(b[key])) > 1 else "scalar", 
+            "Status": f"shape mismatch ({len(a[key])} vs {len(b[key])})",
+            "Sum a": sum_a, "Sum b": sum_b, "Delta sum": sum_b - sum_a,
+            "Relative delta": (sum_b - sum_a) / abs(sum_a) if sum_a != 0 else np.nan,
+            "Max abs delta": np.nan, "Index max delta": -1,
+        })
+
+    for length, keys in groups.items():
+        keys.sort()
+        mat_a = np.array([a[k] for k in keys], dtype=float)
+        mat_b = np.array([b[k] for k in keys], dtype=float)
+        delta = mat_b - mat_a
+        abs_delta = np.abs(delta)
+        max_abs = abs_delta.max(axis=1)
+        arg_max = abs_delta.argmax(axis=1)
+        sum_a = mat_a.sum(axis=1)
+        sum_b = mat_b.sum(axis=1)
+        changed = np.flatnonzero(max_abs > tolerance)
+
+        for i in changed:
+            cluster, node, variable = keys[i]
+            rows.append({
+                "Cluster": cluster, "Node": node, "Variable": variable,
+                "Type": "hourly" if length > 1 else "scalar", "Status": "changed",
+                "Sum a": sum_a[i], "Sum b": sum_b[i], "Delta sum": sum_b[i] - sum_a[i],
+                "Relative delta": (sum_b[i] - sum_a[i]) / abs(sum_a[i]) if sum_a[i] != 0 else np.nan,
+                "Max abs delta": max_abs[i], "Index max delta": int(arg_max[i]),
+            })
+            if elementwise == 'yes':
+                deltas[keys[i]] = delta[i]
+
+    for status, only in (("only in a", a.keys() - b.keys()), ("only in b", b.keys() - a.keys())):
+        for key in sorted(only):
+            values = np.asarray(a[key] if status == "only in a" else b[key], dtype=float)
+            rows.append({
+                "Cluster": key[0], "Node": key[1], "Variable": key[2],
+                "Type": "hourly" if len(values) > 1 else "scalar", "Status": status,
+                "Sum a": values.sum() if status == "only in a" else np.nan, 
+                "Sum b": values.sum() if status == "only in b" else np.nan,
+                "Delta sum": np.nan, "Relative delta": np.nan,
+                "Max abs delta": np.abs(values).max() if len(values) else 0.0, "Index max delta": -1,
+            })
+
+    columns = ["Cluster", "Node", "Variable", "Type", "Status", "Sum a", "Sum b", "Delta sum", 
+               "Relative delta", "Max abs delta", "Index max delta"]
+    # The shape mismatches (no max delta) come first, top does not hide them
+    table = pd.DataFrame(rows, columns=columns).sort_values("Max abs delta", ascending=False, na_position="first", 
+                                                           ignore_index=True)
+    table.insert(0, "Rank", np.arange(1, len(table) + 1))
+    if top is not None:
+        table = table.head(top)
+
+    if elementwise == 'yes':
+        return table, deltas
+    return table
+
+
+#%% N°55 : class ResultModel(dictionary): 
+
+class ResultModel:
+    """
+    Solution ingested once as arrays:
+    - hourly  : DataFrame (cluster, node, variable) x hours, over one float matrix 
+    - scalars : tidy DataFrame (cluster, node, name, kind, value) with the scalar variables 
+                (capacities...), the named objectives and the scalar parameters
+    node is "" for what belongs to the cluster itself. The getters of this file 
+    (get_cluster_element_variable, get_timeseries_dict...) accept a ResultModel instead 
+    of the dictionary.
+    """
+
+    def __init__(self, dictionary, name=None):
+        self.name = name
+        self.dictionary = dictionary
+        self.objective = dictionary["solution"].get("objective")
+        
+        series = list(iter_variables(dictionary))
+        self.horizon = max((len(v) for *_, v in series), default=0)
+
+        hourly_keys, hourly_values, scalar_rows = [], [], []
+        for cluster, node, variable, values in series:
+            if len(values) == self.horizon and self.horizon > 1:
+                hourly_keys.append((cluster, node, variable))
+                hourly_values.append(values)
+            elif len(values) == 1:
+                scalar_rows.append((cluster, node, variable, "variable", float(values[0])))
+
+        elements = dictionary["solution"]["elements"]
+        for cluster, element in elements.items():
+            for obj, value in element.get("objectives", {}).get("named", {}).items():
+                scalar_rows.append((cluster, "", obj, "objective", value))
+            for node, sub in element.get("sub_elements", {}).items():
+                for obj, value in sub.get("objectives", {}).get("named", {}).items():
+                    scalar_rows.append((cluster, node, obj, "objective", value))
+
+        for cluster, model_node in dictionary["model"]["nodes"].items():
+            parameters = [("", model_node.get("parameters", {}))]
+            parameters += [(node, sub.get("parameters", {})) for node, sub in model_node.get("sub_nodes", {}).items()]
+            for node, params in parameters:
+                for param, value in params.items():
+                    if isinstance(value, list) and len(value) == 1:
+                        scalar_rows.append((cluster, node, param, "parameter", value[0]))
+
+        self.values = np.array(hourly_values, dtype=float).reshape(len(hourly_keys), self.horizon)
+        self.index = pd.MultiIndex.from_tuples(hourly_keys, names=["cluster", "node", "variable"])
+        self.hourly = pd.DataFrame(self.values, index=self.index, copy=False)
+        self.hourly.columns.name = "hour"
+        self._rows = {key: i for i, key in enumerate(hourly_keys)}
+        self.scalars = pd.DataFrame(scalar_rows, columns=["cluster", "node", "name", "kind", "value"])
+        self._scalars = {(c, n, v): value for c, n, v, kind, value in scalar_rows if kind == "variable"}
+
+    def __repr__(self):
+        return f"ResultModel({self.name}: {len(self._rows)} hourly series x {self.horizon} h, {len(self.scalars)} scalars)"
+
+    def series(self, cluster, node, variable):
+        # Hourly values (view on the matrix) or the scalar as an array of one value, None if unknown
+        key = (cluster, node, variable)
+        if key in self._rows:
+            return self.values[self._rows[key]]
+        if key in self._scalars:
+            return np.array([self._scalars[key]])
+        return None
+
+    def nodes_with(self, cluster, variable):
+        # Sub nodes of "cluster" having the hourly "variable"
+        return [n for (c, n, v) in self._rows if c == cluster and v == variable and n != ""]
+
+    def timeseries(self, cluster, variable, nodes=None):
+        # {node: hourly array} like get_timeseries_dict
+        if nodes is None:
+            nodes = self.nodes_with(cluster, variable)
+        return {n: self.values[self._rows[(cluster, n, variable)]] for n in nodes if (cluster, n, variable) in self._rows}
+
+    def select(self, cluster=None, node=None, variable=None):
+        # Sub-frame of the hourly series, every argument is a name or a list of names
+        mask = np.ones(len(self.index), dtype=bool)
+        for level, value in (("cluster", cluster), ("node", node), ("variable", variable)):
+            if value is not None:
+                mask &= self.index.get_level_values(level).isin([value] if isinstance(value, str) else value)
+        return self.hourly[mask]
+
+    def total(self, cluster=None, node=None, variable=None):
+        # Hourly sum over the selected series in one vectorized operation
+        return self.select(cluster, node, variable).to_numpy().sum(axis=0)
+
+    def scalar(self, cluster, node, name, kind=None):
+        table = self.scalars
+        mask = (table["cluster"] == cluster) & (table["node"] == node) & (table["name"] == name)
+        if kind is not None:
+            mask &= table["kind"] == kind
+        values = table.loc[mask, "value"]
+        return values.iloc[0] if len(values) else 0
+
+
+#%% N°56 : def cost_table(results, variables=None, clusters=None): node table of capacities, costs and production
+
+PRODUCTION_SUFFIXES = ("_produced", "_discharged")
+
+
+def _first_value(parameters, name):
+    value = parameters.get(name)
+    if value is None:
+        return np.nan
+    return float(value[0]) if isinstance(value, (list, tuple, np.ndarray)) else float(value)
+
+
+def _annuity(parameters, capex_name, lifetime_name):
+    # Yearly capex as in the templates: capex * wacc / (1 - (1 + wacc)**(-lifetime))
+    capex = _first_value(parameters, capex_name)
+    wacc = _first_value(parameters, "wacc")
+    lifetime = _first_value(parameters, lifetime_name)
+    if np.isnan(wacc) or np.isnan(lifetime) or lifetime == 0:
+        return capex
+    return capex if wacc == 0 else capex * wacc / (1 - (1 + wacc)**(-lifetime))
+
+
+def _node_cost_records(dictionary, variables=None, clusters=None):
+    # One walk over the solution / model of every cluster with sub nodes, one record per 
+    # (cluster, node, production variable). The storage nodes are recognised by their 
+    # power / energy capacities (no 'Not given' sentinel).
+    elements = dictionary["solution"]["elements"]
+    model_nodes = dictionary["model"]["nodes"]
+    records = []
+    horizon = None
+
+    for cluster, element in elements.items():
+        if (clusters is not None and cluster not in clusters) or "sub_elements" not in element:
+            continue
+        sub_nodes_par = model_nodes.get(cluster, {}).get("sub_nodes", {})
+
+        for node, sub in element["sub_elements"].items():
+            sub_variables = sub.get("variables", {})
+            if variables is None:
+                used = [v for v in sub_variables if v.endswith(PRODUCTION_SUFFIXES)]
+            else:
+                used = [v for v in variables if v in sub_variables]
+            if not used:
+                continue
+            parameters = sub_nodes_par.get(node, {}).get("parameters", {})
+            storage = "new_power_capacity" in sub_variables or "max_capacity_power" in parameters
+            suffix = "_power" if storage else ""
+
+            def scalar_variable(name):
+                var = sub_variables.get(name)
+                if var is None:
+                    return 0.0
+                values = var["values"] if isinstance(var, dict) else var
+                return float(values[0]) if len(values) else 0.0
+
+            def series_sum(name):
+                var = sub_variables.get(name)
+                if var is None:
+                    return np.nan
+                return float(np.sum(var["values"] if isinstance(var, dict) else var))
+
+            named = sub.get("objectives", {})
+            named = named.get("named", named)
+            objective = {k: v for k, v in named.items() if isinstance(v, (int, float))}
+            # Objective with the co2 capture and the exports counted as revenues (max_constraint)
+            revenues = sum(v for k, v in objective.items() 
+                           if (k == "co2_capt_cost" and "PCCC" not in node) or (k == "export_cost" and node != "CO2_EXPORT"))
+
+            common = {
+                "Cluster": cluster, "Node": node, 
+                "Type": "storage" if storage else "production",
+                "Preinstalled capacity": np.nan_to_num(_first_value(parameters, "pre_installed_capacity" + suffix)),
+                "Added capacity": scalar_variable("new_power_capacity" if storage else "new_capacity"),
+                "Max capacity": _first_value(parameters, "max_capacity" + suffix),
+                "Preinstalled energy capacity": np.nan_to_num(_first_value(parameters, "pre_installed_capacity_energy")) if storage else np.nan,
+                "Added energy capacity": scalar_variable("new_energy_capacity") if storage else np.nan,
+                "Capex": np.nan_to_num(_first_value(parameters, "capex" + suffix)),
+                "Yearly capex": np.nan_to_num(_annuity(parameters, "capex" + suffix, "lifetime" + suffix)),
+                "Fom": np.nan_to_num(_first_value(parameters, "fom" + suffix)),
+                "Vom": np.nan_to_num(_first_value(parameters, "vom" + suffix)),
+                "Vom energy": np.nan_to_num(_first_value(parameters, "vom_energy")) if storage else 0.0,
+                "Yearly capex energy": np.nan_to_num(_annuity(parameters, "capex_energy", "lifetime_energy")) if storage else 0.0,
+                "Fom energy": np.nan_to_num(_first_value(parameters, "fom_energy")) if storage else 0.0,
+                "Objective [M€]": sum(objective.values()),
+                "Objective power [M€]": sum(v for k, v in objective.items() if "power" in k),
+                "Objective energy [M€]": sum(v for k, v in objective.items() if "energy" in k),
+                "Net objective [M€]": sum(objective.values()) - 2 * revenues,
+                # Storages: the vom is paid on the charged energy and on the energy stored
+                "Charged": series_sum(next((v for v in sub_variables if v.endswith("_charged")), None)) if storage else np.nan,
+                "Discharged": series_sum(next((v for v in sub_variables if v.endswith("_discharged")), None)) if storage else np.nan,
+                "Stored": series_sum("state_of_charge") if storage else np.nan,
+            }
+            for v in used:
+                var = sub_variables[v]
+                values = var["values"] if isinstance(var, dict) else var
+                if horizon is None and len(values) > 1:
+                    horizon = len(values)
+                records.append(dict(common, Variable=v, Production=float(np.sum(values))))
+
+    return records, horizon
+
+
+@memoize()
+def node_cost_table(dictionary, variables=None, clusters=None):
+    """
+    Table (one row per cluster, node and production variable) of the capacities, cost 
+    parameters, production and objective of the nodes of one result, with the costs 
+    computed as column operations:
+        CAPEX [M€/y] = yearly capex x added capacity (+ energy part for the storages)
+        FOM [M€/y]   = fom x added capacity (+ energy part), as in the objectives
+        VOM [M€/y]   = vom x production / number of years, for the storages 
+                       (vom_power x charged + vom_energy x stored) / number of years
+        Cost [€/MWh] = objective / production, Load factor [%] = production / (capacity x T)
+    variables : production variables (default: all the *_produced and *_discharged)
+    """
+    records, horizon = _node_cost_records(dictionary, variables, clusters)
+    columns = ["Cluster", "Node", "Variable", "Type", "Preinstalled capacity", "Added capacity", "Max capacity",
+               "Preinstalled energy capacity", "Added energy capacity", "Capex", "Yearly capex", "Fom", "Vom", 
+               "Vom energy", "Yearly capex energy", "Fom energy", "Production", "Charged", "Discharged", "Stored",
+               "Objective [M€]", "Objective power [M€]", "Objective energy [M€]", "Net objective [M€]"]
+    table = pd.DataFrame(records, columns=columns)
+    horizon = horizon or HOURS_PER_YEAR
+    years = horizon / HOURS_PER_YEAR
+
+    energy_added = table["Added energy capacity"].fillna(0)
+    table["Total capacity"] = table["Preinstalled capacity"] + table["Added capacity"]
+    table["Total energy capacity"] = table["Preinstalled energy capacity"] + table["Added energy capacity"]
+    table["CAPEX [M€/y]"] = table["Yearly capex"] * table["Added capacity"] + table["Yearly capex energy"] * energy_added
+    table["FOM [M€/y]"] = table["Fom"] * table["Added capacity"] + table["Fom energy"] * energy_added
+    storage = table["Type"] == "storage"
+    table["VOM [M€/y]"] = (table["Vom"] * table["Production"]).where(
+        ~storage, table["Vom"] * table["Charged"].fillna(0) + table["Vom energy"] * table["Stored"].fillna(0)) / years
+    table["Production [TWh/y]"] = table["Production"] / 1000 / years
+    production = table["Production"] / 1000
+    table["Cost [€/MWh]"] = (table["Objective [M€]"] / production).where(production != 0)
+    capacity_hours = table["Total capacity"] * horizon
+    table["Load factor [%]"] = (100 * table["Production"] / capacity_hours).where(capacity_hours > 0)
+    return table.set_index(["Cluster", "Node", "Variable"])
+
+
+def cost_table(results, variables=None, clusters=None, zero_node='yes'):
+    # node_cost_table of one result or of several scenarios {name: result} stacked with a 
+    # first index level "Scenario"
+    if isinstance(results, ResultModel):
+        results = results.dictionary
+    if _is_result_dictionary(results):
+        table = node_cost_table(results, variables, clusters)
+    else:
+        table = pd.concat({name: node_cost_table(r.dictionary if isinstance(r, ResultModel) else r, variables, clusters) 
+                           for name, r in results.items()}, names=["Scenario"])
+    if zero_node == 'no':
+        table = table[(table["Total capacity"] != 0) | (table["Production"] != 0)]
+    return table
+
+
+def cost_summary(table, by=("Cluster",)):
+    # Totals of the costs of a cost_table by index levels (e.g. ("Scenario", "Cluster")). 
+    # A node with several production variables has several rows: its costs are counted once
+    costs = ["CAPEX [M€/y]", "FOM [M€/y]", "VOM [M€/y]", "Objective [M€]"]
+    node_levels = [level for level in table.index.names if level != "Variable"]
+    nodes = table.groupby(level=node_levels)[costs].first()
+    return nodes.groupby(level=list(by)).sum()
+
+
+#%% N°57 : def efuel_cost_breakdown(results, plants=None, cluster='INLAND'): marginal-price-weighted e-fuel costs
+
+from fnmatch import fnmatchcase
+
+EFUEL_PLANTS = ["DME*_PLANTS", "DMEOH_PLANTS", "METHANOL*_PLANTS", "NH3*_PLANTS", "FT*_PLANTS", "ETHANOL*_PLANTS"]
+EFUEL_PRODUCTS = ["dme_produced", "methanol_produced", "nh3_produced", "ft_produced", "ethanol_produced", 
+                  "bio_kerosene_produced", "kerosene_produced"]
+
+# Commodity consumed -> (hyperedge, constraint) whose dual is the hourly price [M€/GWh or M€/kt]
+EFUEL_DUAL_PRICES = {
+    "e_consumed": ("INLAND_BALANCE", "electricity"),
+    "h2_consumed": ("INLAND_BALANCE", "hydrogen"),
+}
+# Commodity consumed -> (hyperedge, constraint) whose (negative) scalar dual is the price
+EFUEL_QUOTA_PRICES = {
+    "co2_consumed": ("CO2_QUOTA", "co2_neutral"),
+}
+# Intermediate commodity -> (producing node, produced variable), valued at its mean production cost
+EFUEL_INTERMEDIATES = {
+    "n2_consumed": ("N2_PLANTS", "n2_produced"),
+    "methanol_consumed": ("METHANOL_PLANTS", "methanol_produced"),
+}
+EFUEL_COMPONENTS = {"e_consumed": "Electricity", "h2_consumed": "Hydrogen", "co2_consumed": "CO2", 
+                    "n2_consumed": "N2", "methanol_consumed": "Methanol"}
+# Named objectives of a plant -> component (first matching prefix, the rest goes to "Other")
+EFUEL_OBJECTIVES = [("fix_cost", "CAPEX + FOM"), ("var_cost", "VOM")]
+EFUEL_COST_COLUMNS = ["CAPEX + FOM", "VOM", "Other", "Electricity", "Hydrogen", "CO2", "N2", "Methanol", "Storage"]
+
+
+def get_hyperedge_dual(dictionary, hyperedge, constraint):
+    # Dual values (Pi) of a constraint of a hyperedge as an array (empty if not exported)
+    constraints = dictionary["solution"]["elements"].get(hyperedge, {}).get("constraints", {})
+    if constraint not in constraints:
+        return np.zeros(0)
+    dual = constraints[constraint]
+    return np.asarray(dual.get("Pi", []) if isinstance(dual, dict) else dual, dtype=float)
+
+
+def _node_series(sub, variable):
+    var = sub.get("variables", {}).get(variable)
+    if var is None:
+        return None
+    return np.asarray(var["values"] if isinstance(var, dict) else var, dtype=float)
+
+
+def _node_objective(sub):
+    named = sub.get("objectives", {})
+    named = named.get("named", named)
+    return float(sum(v for v in named.values() if isinstance(v, (int, float))))
+
+
+def _storage_node(plant, sub_elements):
+    # DME_PLANTS -> DME_STORAGE, NH3_PLANTS -> NH3_STORAGE
+    storage = plant.split("_PLANTS")[0] + "_STORAGE"
+    return storage if storage in sub_elements else None
+
+
+def _objective_components(sub):
+    # Objective of a node split by EFUEL_OBJECTIVES (each term counted once)
+    named = sub.get("objectives", {})
+    named = named.get("named", named)
+    costs = {"CAPEX + FOM": 0.0, "VOM": 0.0, "Other": 0.0}
+    for name, value in named.items():
+        if isinstance(value, (int, float)):
+            component = next((c for prefix, c in EFUEL_OBJECTIVES if name.startswith(prefix)), "Other")
+            costs[component] += float(value)
+    return costs
+
+
+def _plant_costs(dictionary, cluster, node, prices, co2_price):
+    # Direct costs of one plant [M€]: objective terms + consumption x dual price (vectorized)
+    sub = dictionary["solution"]["elements"][cluster]["sub_elements"][node]
+    costs = _objective_components(sub)
+    for variable, price in prices.items():
+        consumed = _node_series(sub, variable)
+        if consumed is not None and len(price):
+            n = min(len(price), len(consumed))
+            costs[EFUEL_COMPONENTS[variable]] = float(np.dot(price[:n], consumed[:n]))
+    for variable in EFUEL_QUOTA_PRICES:
+        consumed = _node_series(sub, variable)
+        if consumed is not None:
+            costs[EFUEL_COMPONENTS[variable]] = co2_price * float(consumed.sum())
+    return costs
+
+
+def efuel_cost_breakdown_one(dictionary, plants=None, cluster='INLAND'):
+    """
+    Cost of the e-fuel plants of one result, each consumption being valued at the marginal 
+    price of the commodity (dual of the balance hyperedge, hour by hour):
+        Electricity / Hydrogen : sum_t Pi(INLAND_BALANCE.electricity / hydrogen)[t] * consumed[t]
+        CO2                    : -Pi(CO2_QUOTA.co2_neutral) * co2 consumed
+        N2 / Methanol          : mean production cost of N2_PLANTS / METHANOL_PLANTS * consumed
+        CAPEX + FOM / VOM      : fix_cost / var_cost objectives of the plant
+        Other                  : other objectives of the plant (fuel_cost...)
+        Storage                : objective of the <FUEL>_STORAGE node
+    plants : node names or patterns (default EFUEL_PLANTS)
+    Returns a DataFrame (one row per plant) with the costs in M€, the production and the €/MWh
+    """
+    elements = dictionary["solution"]["elements"]
+    if cluster not in elements or "sub_elements" not in elements[cluster]:
+        raise ValueError(f"Cluster '{cluster}' has no sub nodes in this result.")
+    sub_elements = elements[cluster]["sub_elements"]
+    patterns = EFUEL_PLANTS if plants is None else plants
+    nodes = [n for n in sub_elements if any(fnmatchcase(n, p) for p in patterns)]
+
+    prices = {variable: get_hyperedge_dual(dictionary, *constraint) for variable, constraint in EFUEL_DUAL_PRICES.items()}
+    co2_dual = get_hyperedge_dual(dictionary, *EFUEL_QUOTA_PRICES["co2_consumed"])
+    co2_price = -float(co2_dual[0]) if len(co2_dual) else 0.0
+
+    # Mean cost of the intermediate commodities (one level: their own direct costs)
+    intermediate_cost = {}
+    for variable, (producer, produced) in EFUEL_INTERMEDIATES.items():
+        if producer in sub_elements:
+            production = _node_series(sub_elements[producer], produced)
+            total = sum(_plant_costs(dictionary, cluster, producer, prices, co2_price).values())
+            if production is not None and production.sum() > 0:
+                intermediate_cost[variable] = total / production.sum()
+
+    rows = []
+    for node in nodes:
+        sub = sub_elements[node]
+        costs = _plant_costs(dictionary, cluster, node, prices, co2_price)
+        for variable, unit_cost in intermediate_cost.items():
+            consumed = _node_series(sub, variable)
+            if consumed is not None and node != EFUEL_INTERMEDIATES[variable][0]:
+                costs[EFUEL_COMPONENTS[variable]] = unit_cost * float(consumed.sum())
+        storage = _storage_node(node, sub_elements)
+        costs["Storage"] = _node_objective(sub_elements[storage]) if storage is not None else 0.0
+        
+        products = [v for v in EFUEL_PRODUCTS if v in sub.get("variables", {})]
+        production = float(_node_series(sub, products[0]).sum()) if products else 0.0
+        rows.append(dict(costs, Plant=node, Product=products[0] if products else "", Production=production))
+
+    components = EFUEL_COST_COLUMNS
+    table = pd.DataFrame(rows, columns=["Plant", "Product", "Production"] + components).set_index("Plant")
+    table[components] = table[components].fillna(0.0)
+    table["Total [M€]"] = table[components].sum(axis=1)
+    production_twh = (table["Production"] / 1000).where(table["Production"] > 0)
+    for component in components:
+        table[f"{component} [€/MWh]"] = table[component] / production_twh
+    table["Total [€/MWh]"] = table["Total [M€]"] / production_twh
+    return table
+
+
+def efuel_cost_breakdown(results, plants=None, cluster='INLAND', zero_production='no'):
+    # efuel_cost_breakdown_one for one result or several scenarios {name: result} in one 
+    # table indexed by (Scenario, Plant)
+    if isinstance(results, ResultModel):
+        results = results.dictionary
+    if _is_result_dictionary(results):
+        table = efuel_cost_breakdown_one(results, plants, cluster)
+    else:
+        table = pd.concat({name: efuel_cost_breakdown_one(r.dictionary if isinstance(r, ResultModel) else r, plants, cluster) 
+                           for name, r in results.items()}, names=["Scenario"])
+    if zero_production == 'no':
+        table = table[table["Production"] > 0]
+    return table
+
+
+def efuel_cost_shares(table):
+    # Share [%] of every component in the total cost of each plant (for the stacked bar plots)
+    components = [c for c in EFUEL_COST_COLUMNS if c in table]
+    return 100 * table[components].div(table["Total [M€]"].where(table["Total [M€]"] != 0), axis=0)
+
+
+#%% N°58 : def carrier_balances(data, carriers=None): declarative carrier x cluster x flow role balances
+
+# Flow roles of a cluster balance and their sign (supply > 0, demand < 0). The sub node 
+# BALANCE of each cluster carries the "balanced" role (exchange with the hyperedges)
+FLOW_ROLES = OrderedDict([("produced", 1), ("captured", 1), ("consumed", -1), ("charged", -1), ("discharged", 1), 
+                          ("load_increase", -1), ("load_reduction", 1), ("imported", 1), ("exported", -1), 
+                          ("released", -1)])
+BALANCE_ROLE = "balanced"
+
+
+def _flows(prefix, *roles):
+    return OrderedDict((role, f"{prefix}_{role}") for role in roles)
+
+
+# carrier -> label, hourly / total units, clusters and variable of each flow role
+CARRIERS = OrderedDict([
+    ("electricity", {"label": "Electricity", "unit": "GWh", "total": "TWh", "clusters": ["OFFSHORE", "ZEEBRUGGE", "INLAND"],
+                     "flows": OrderedDict(_flows("e", "produced", "consumed", "charged", "discharged", "imported", "exported"),
+                                          load_increase="load_increase", load_reduction="load_reduction"),
+                     "balanced": "e_balanced"}),
+    ("hydrogen", {"label": "Hydrogen", "unit": "GWh", "total": "TWh", "clusters": ["OFFSHORE", "ZEEBRUGGE", "INLAND"],
+                  "flows": _flows("h2", "produced", "consumed", "charged", "discharged", "imported", "exported"),
+                  "balanced": "h2_balanced"}),
+    ("natural_gas", {"label": "Natural gas", "unit": "GWh", "total": "TWh", "clusters": ["ZEEBRUGGE", "INLAND"],
+                     "flows": _flows("ng", "produced", "consumed", "charged", "discharged", "imported", "exported"),
+                     "balanced": "ng_balanced"}),
+    ("co2", {"label": "Carbon dioxide", "unit": "kton", "total": "Mt", "clusters": ["ZEEBRUGGE", "INLAND"],
+             "flows": _flows("co2", "produced", "captured", "consumed", "charged", "discharged", "exported", "released"),
+             "balanced": "co2_balanced"}),
+    ("water", {"label": "Water", "unit": "kton", "total": "Mt", "clusters": ["OFFSHORE"],
+               "flows": _flows("h2o", "produced", "consumed", "charged", "discharged"),
+               "balanced": "h2o_balanced"}),
+])
+
+BALANCE_CACHE_SIZE = 16
+_BALANCE_CACHE = OrderedDict() # (result id, carriers) -> CarrierBalances
+
+
+class CarrierBalances:
+    # All the carrier balances of one result: one signed matrix (flows x T) with a row per 
+    # (carrier, cluster, role, node, variable). Totals, tables and zoomed series are slices 
+    # and column operations of this matrix. The matrix is read-only (shared through the cache).
+    
+    LEVELS = ["Carrier", "Cluster", "Role", "Node", "Variable"]
+
+    def __init__(self, rows, series):
+        horizon = max((len(s) for s in series), default=0)
+        keep = [i for i, s in enumerate(series) if len(s) == horizon]
+        if len(keep) < len(rows):
+            skipped = sorted({row[4] for row, s in zip(rows, series) if len(s) != horizon})
+            print(f"[Warning] Variables not over the {horizon} time steps ignored: {skipped}")
+        rows = [rows[i] for i in keep]
+        signs = np.array([FLOW_ROLES.get(row[2], 1) for row in rows], dtype=float)
+        
+        self.matrix = np.array([series[i] for i in keep], dtype=float).reshape(len(rows), horizon) * signs[:, None]
+        self.matrix.setflags(write=False)
+        self.index = pd.MultiIndex.from_tuples(rows, names=self.LEVELS)
+        self.horizon = horizon
+        self.totals = pd.Series(self.matrix.sum(axis=1) / 1000, index=self.index) # TWh or Mt, signed
+        self._levels = {name: np.array([row[i] for row in rows], dtype=object) for i, name in enumerate(self.LEVELS)}
+
+    def _mask(self, carrier, cluster, roles=None):
+        mask = (self._levels["Carrier"] == carrier) & (self._levels["Cluster"] == cluster)
+        if roles is not None:
+            mask &= np.isin(self._levels["Role"], list(roles))
+        return mask
+
+    def table(self, carrier, cluster, roles=None, zero_nodes='yes'):
+        # Totals (magnitudes) by (role, node, variable) of one cluster, balance role excluded
+        roles = [r for r in FLOW_ROLES if r in roles] if roles is not None else list(FLOW_ROLES)
+        totals = self.totals[self._mask(carrier, cluster, roles)].abs()
+        if zero_nodes == 'no':
+            totals = totals[totals != 0]
+        column = f"Total [{CARRIERS[carrier]['total']}]"
+        return totals.droplevel(["Carrier", "Cluster"]).to_frame(column)
+
+    def frame(self, carrier, cluster, roles=None, zoom=None, mean_or_sum='mean', zero_nodes='yes'):
+        # Signed series (rows (role, node, variable) x time steps) of one cluster, zoomed at once
+        mask = self._mask(carrier, cluster, list(FLOW_ROLES) if roles is None else roles)
+        matrix = self.matrix[mask]
+        if zero_nodes == 'no':
+            keep = np.any(matrix != 0, axis=1)
+            mask[mask] = keep
+            matrix = matrix[keep]
+        if zoom is not None:
+            matrix = zoom_matrix(matrix, zoom, mean_or_sum)
+        return pd.DataFrame(matrix, index=self.index[mask].droplevel(["Carrier", "Cluster"]))
+
+    def balance(self, carrier, cluster, zoom=None, mean_or_sum='mean'):
+        # Series of the BALANCE sub node of the cluster
+        series = self.matrix[self._mask(carrier, cluster, [BALANCE_ROLE])].sum(axis=0)
+        return zoom_matrix(series, zoom, mean_or_sum)[0] if zoom is not None else series
+
+    def summary(self):
+        # Supply, demand, net of the flows and balance of every (carrier, cluster) [TWh or Mt]
+        totals = self.totals.groupby(level=["Carrier", "Cluster", "Role"], sort=False).sum()
+        roles = totals.index.get_level_values("Role")
+        flows = totals[roles != BALANCE_ROLE]
+        table = pd.DataFrame({
+            "Supply": flows[flows > 0].groupby(level=["Carrier", "Cluster"], sort=False).sum(),
+            "Demand": -flows[flows < 0].groupby(level=["Carrier", "Cluster"], sort=False).sum(),
+            "Net": flows.groupby(level=["Carrier", "Cluster"], sort=False).sum(),
+            "Balance": totals[roles == BALANCE_ROLE].groupby(level=["Carrier", "Cluster"], sort=False).sum()})
+        return table.fillna(0.0)
+
+
+def _compute_carrier_balances(dictionary, carriers):
+    # One walk over the sub nodes of the clusters of the carriers: each variable is looked 
+    # up in a variable -> (carrier, role) table
+    lookup = {}
+    wanted = OrderedDict()
+    for carrier in carriers:
+        spec = CARRIERS[carrier]
+        for role, variable in list(spec["flows"].items()) + [(BALANCE_ROLE, spec["balanced"])]:
+            lookup.setdefault(variable, []).append((carrier, role))
+        for cluster in spec["clusters"]:
+            wanted.setdefault(cluster, set()).add(carrier)
+
+    elements = dictionary["solution"]["elements"]
+    rows, series = [], []
+    for cluster, cluster_carriers in wanted.items():
+        for node, sub in elements.get(cluster, {}).get("sub_elements", {}).items():
+            for variable, var in sub.get("variables", {}).items():
+                for carrier, role in lookup.get(variable, ()):
+                    if carrier in cluster_carriers:
+                        rows.append((carrier, cluster, role, node, variable))
+                        series.append(var["values"] if isinstance(var, dict) else var)
+    return CarrierBalances(rows, series)
+
+
+def carrier_balances(data, carriers=None):
+    # Cached CarrierBalances of a result dictionary or ResultModel (key = result id)
+    result = data.dictionary if isinstance(data, ResultModel) else data
+    carriers = tuple(CARRIERS) if carriers is None else tuple(carriers)
+    unknown = [c for c in carriers if c not in CARRIERS]
+    if unknown:
+        raise ValueError(f"Unknown carriers {unknown}, choose among {list(CARRIERS)}")
+    key = (get_result_id(result), carriers)
+    if key in _BALANCE_CACHE:
+        _BALANCE_CACHE.move_to_end(key)
+        return _BALANCE_CACHE[key]
+    _BALANCE_CACHE[key] = _compute_carrier_balances(result, carriers)
+    while len(_BALANCE_CACHE) > BALANCE_CACHE_SIZE:
+        _BALANCE_CACHE.popitem(last=False)
+    return _BALANCE_CACHE[key]
+
+
+def clear_balance_cache():
+    _BALANCE_CACHE.clear()
+
+
+#%% N°59 : def batch_balances(results, carriers=None, processes=None): balances of many scenarios in one table
+
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _balance_worker(path, carriers, cached):
+    # Run in a worker process: load one result file and return only its balance totals 
+    # and summary (a few kB), the result itself never goes back to the parent process
+    path = os.fspath(path)
+    dictionary = gf.load_result_cached(path) if cached == 'yes' else gf.load_result(path)
+    balances = _compute_carrier_balances(dictionary, carriers)
+    return balances.totals, balances.summary()
+
+
+def batch_balances(results, carriers=None, processes=None, cached='no'):
+    """
+    Carrier balances of several scenarios in two tables stacked with a first index level 
+    "Scenario": totals (Scenario, Carrier, Cluster, Role, Node, Variable) -> "Total" 
+    (signed, TWh or Mt) and summary (Scenario, Carrier, Cluster) -> Supply, Demand, Net, Balance.
+    results : {name: path} or {name: result} (a list is named "Scenario 1", "Scenario 2"...)
+    - paths are loaded and balanced in a pool of processes (processes=None: one per CPU)
+    - results already in memory use the cached carrier_balances: pickling a result to a 
+      worker costs more than its balance
+    """
+    if isinstance(results, (list, tuple)):
+        results = OrderedDict((f"Scenario {i+1}", r) for i, r in enumerate(results))
+    carriers = tuple(CARRIERS) if carriers is None else tuple(carriers)
+    unknown = [c for c in carriers if c not in CARRIERS]
+    if unknown:
+        raise ValueError(f"Unknown carriers {unknown}, choose among {list(CARRIERS)}")
+
+    outputs = OrderedDict((name, None) for name in results)
+    paths = OrderedDict((name, r) for name, r in results.items() if isinstance(r, (str, os.PathLike)))
+    for name, result in results.items():
+        if name not in paths:
+            balances = carrier_balances(result, carriers)
+            outputs[name] = (balances.totals, balances.summary())
+
+    if paths:
+        workers = min(processes or os.cpu_count() or 1, len(paths))
+        if workers == 1:
+            for name, path in paths.items():
+                outputs[name] = _balance_worker(path, carriers, cached)
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                futures = {name: executor.submit(_balance_worker, path, carriers, cached) for name, path in paths.items()}
+                for name, future in futures.items():
+                    outputs[name] = future.result()
+
+    totals = pd.concat({name: out[0] for name, out in outputs.items()}, names=["Scenario"]).to_frame("Total")
+    summary = pd.concat({name: out[1] for name, out in outputs.items()}, names=["Scenario"])
+    return totals, summary
+
+
+def batch_balance_table(totals, carrier, cluster, zero_nodes='yes'):
+    # Wide view of the batch_balances totals of one cluster: rows (Role, Node), one column 
+    # per scenario (magnitudes, the role gives the direction)
+    table = totals["Total"].xs((carrier, cluster), level=["Carrier", "Cluster"]).abs()
+    table = table.groupby(level=["Scenario", "Role", "Node"], sort=False).sum().unstack("Scenario", fill_value=0.0)
+    table = table[list(dict.fromkeys(totals.index.get_level_values("Scenario")))]
+    if zero_nodes == 'no':
+        table = table[(table != 0).any(axis=1)]
+    return table
+
+
+#%% N°60 : def ens_events(results, variables=None, threshold=0.0): run-length events of the energy not served
+
+# Energy not served variables of the INLAND cluster (the e-fuel one depends on the scenario)
+ENS_VARIABLES = OrderedDict([("e_ens", "Electricity"), ("h2_ens", "Hydrogen"), ("ng_ens", "Natural gas"),
+                             ("methanol_ens", "Methanol"), ("dme_ens", "DME"), ("nh3_ens", "Ammonia")])
+
+
+def run_lengths(values, threshold=0.0):
+    # (starts, ends) of the runs of consecutive values above threshold, ends excluded: 
+    # +1 / -1 of the np.diff of the padded mask
+    mask = np.asarray(values, dtype=float) > threshold
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def _events_of_series(series, threshold=0.0):
+    # Events of several series in one pass: the series are concatenated with a -inf separator 
+    # (never above the threshold) so a run never spans two series, then one reduceat on the 
+    # (start, end) boundaries gives the energy of every event
+    lengths = np.array([len(s) for s in series], dtype=int)
+    offsets = np.concatenate(([0], np.cumsum(lengths + 1)[:-1]))
+    x = np.concatenate([np.append(np.asarray(s, dtype=float), -np.inf) for s in series]) if series else np.zeros(0)
+    starts, ends = run_lengths(x, threshold)
+    if len(starts) == 0:
+        empty = np.zeros(0)
+        return empty.astype(int), empty.astype(int), empty.astype(int), empty, empty, empty.astype(int)
+    durations = ends - starts
+    energies = np.add.reduceat(x, np.column_stack([starts, ends]).ravel())[::2]
+    # hours of all the events, sorted by event then decreasing value: the first hour of 
+    # each event is its peak
+    first = np.cumsum(durations) - durations
+    hours = np.arange(durations.sum()) - np.repeat(first, durations) + np.repeat(starts, durations)
+    order = np.lexsort((-x[hours], np.repeat(np.arange(len(starts)), durations)))
+    peak_hours = hours[order[first]]
+    peaks = x[peak_hours]
+    owner = np.searchsorted(offsets, starts, side='right') - 1
+    return owner, starts - offsets[owner], durations, peaks, energies, peak_hours - offsets[owner]
+
+
+def ens_events(results, variables=None, threshold=0.0, cluster='INLAND'):
+    """
+    Every energy not served event (run of consecutive hours with ens > threshold) of every 
+    scenario and carrier, in one tidy table:
+        Scenario, Carrier, Variable, Start, Duration [h], Peak [GW], Peak hour, Energy [GWh], 
+        Season and Month of the start (winter = December, January, February)
+    results   : result, ResultModel, {name: result} or list of results
+    variables : ens variables (default ENS_VARIABLES, the missing ones are skipped, as the 
+                scenarios without the cluster)
+    """
+    if isinstance(results, ResultModel) or _is_result_dictionary(results):
+        results = {"Scenario 1": results}
+    elif isinstance(results, (list, tuple)):
+        results = OrderedDict((f"Scenario {i+1}", r) for i, r in enumerate(results))
+    variables = list(ENS_VARIABLES) if variables is None else list(variables)
+
+    keys, series = [], []
+    for name, result in results.items():
+        result = result.dictionary if isinstance(result, ResultModel) else result
+        element = result["solution"]["elements"].get(cluster)
+        if element is None:
+            print(f"[Warning] {name}: no cluster {cluster}, skipped")
+            continue
+        cluster_variables = element.get("variables", {})
+        for variable in variables:
+            if variable in cluster_variables:
+                var = cluster_variables[variable]
+                keys.append((name, ENS_VARIABLES.get(variable, variable), variable))
+                series.append(var["values"] if isinstance(var, dict) else var)
+
+    owner, starts, durations, peaks, energies, peak_hours = _events_of_series(series, threshold)
+    months = _calendar_group_of_hours(starts, 'month') % 12
+    seasons = _calendar_group_of_hours(starts, 'season') % 4
+    table = pd.DataFrame({
+        "Scenario": [keys[i][0] for i in owner],
+        "Carrier": [keys[i][1] for i in owner],
+        "Variable": [keys[i][2] for i in owner],
+        "Start": starts, "Duration [h]": durations, "Peak [GW]": peaks, "Peak hour": peak_hours,
+        "Energy [GWh]": energies,
+        "Season": np.array(SEASONS_ORDER, dtype=object)[seasons] if len(seasons) else np.zeros(0, dtype=object),
+        "Month": months + 1})
+    return table
+
+
+def ens_event_summary(events, by=("Scenario", "Carrier", "Season")):
+    # Seasonal (or any other) clustering of the events of ens_events
+    grouped = events.groupby(list(by), sort=False)
+    return pd.DataFrame({
+        "Events": grouped.size(),
+        "Hours": grouped["Duration [h]"].sum(),
+        "Longest [h]": grouped["Duration [h]"].max(),
+        "Mean duration [h]": grouped["Duration [h]"].mean(),
+        "Peak [GW]": grouped["Peak [GW]"].max(),
+        "Energy [GWh]": grouped["Energy [GWh]"].sum()})
@@ -0,0 +1,374 @@
+#%% Re-costing of a solved model without re-solving it
+import os
+import re
+import numpy as np
+import pandas as pd
+from fnmatch import fnmatchcase
+from termcolor import colored
+import process_funct as pf
+
+# The optimal dispatch and capacities of a result are kept, only the cost assumptions
+# (capex, fom, vom, wacc, lifetime...) change. The parameters of every node are re-evaluated
+# from the expressions of its template (and of the "with" block of the model file), then
+# the objective terms of the template are evaluated on the stored variables.
+# An override can be an array of N values: all the points of a sweep are computed at once
+# (parameters of shape (N, 1) broadcast against the hourly variables of shape (T,)).
+
+
+#%% Parser of the GBOML templates and of the imports of the model file
+
+_COMMENT = re.compile(r"//.*?$", re.MULTILINE)
+_HEADER = re.compile(r"#(TIMEHORIZON|NODE|PARAMETERS|VARIABLES|CONSTRAINTS|OBJECTIVES|HYPEREDGE)\b")
+_ASSIGNMENT = re.compile(r"^\s*(\w+)\s*=\s*(.+?)\s*$", re.DOTALL)
+_OBJECTIVE = re.compile(r"^\s*(min|max)\s*(\w+)?\s*:\s*(.+?)\s*$", re.DOTALL)
+_IMPORT = re.compile(r'^([ \t]*)#NODE\s+(\w+)\s*=\s*import\s+(\w+)\s+from\s+"([^"]+)"\s*(with)?', re.MULTILINE)
+_CLUSTER = re.compile(r'^#NODE\s+(\w+)\s*$', re.MULTILINE)
+
+
+def _statements(text):
+    # Statements (ending with ';') of a block, comments removed
+    return [s.strip() for s in _COMMENT.sub("", text).split(";") if s.strip()]
+
+
+def read_template(path):
+    """
+    Parse a template file (Templates/*.txt), one entry per #NODE:
+        {node: {"parameters": [(name, expression)], "objectives": [(name, sense, expression)]}}
+    The expressions are kept as GBOML text, see compile_expression.
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        text = file.read()
+
+    nodes = {}
+    blocks = re.split(r"^#NODE\s+", text, flags=re.MULTILINE)[1:]
+    for block in blocks:
+        name = block.split(None, 1)[0]
+        sections = {}
+        parts = _HEADER.split(block)
+        for header, body in zip(parts[1::2], parts[2::2]):
+            sections[header] = sections.get(header, "") + body
+        parameters = [m.groups() for m in map(_ASSIGNMENT.match, _statements(sections.get("PARAMETERS", ""))) if m]
+        objectives = []
+        for i, statement in enumerate(_statements(sections.get("OBJECTIVES", ""))):
+            m = _OBJECTIVE.match(statement)
+            if m:
+                objectives.append((m.group(2) or f"objective_{i}", m.group(1), m.group(3)))
+        nodes[name] = {"parameters": parameters, "objectives": objectives}
+    return nodes
+
+
+def _find_file(path):
+    # The model files were written on a case-insensitive file system (CO2_STORAGE.txt, dme.txt)
+    if os.path.isfile(path):
+        return path
+    folder, name = os.path.split(path)
+    if os.path.isdir(folder):
+        for candidate in os.listdir(folder):
+            if candidate.lower() == name.lower():
+                return os.path.join(folder, candidate)
+    return path
+
+
+def read_model_imports(model_file):
+    """
+    Nodes of a model file imported from a template:
+        {(cluster, node): {"template": name, "file": absolute path, "with": [(name, expression)]}}
+    cluster is "" for the nodes at the top level (HV_OFF_ZB, PIPE_...).
+    """
+    with open(model_file, "r", encoding="utf-8") as file:
+        text = _COMMENT.sub("", file.read())
+    folder = os.path.dirname(os.path.abspath(model_file))
+
+    clusters = [(m.start(), m.group(1)) for m in _CLUSTER.finditer(text)]
+    imports = {}
+    matches = list(_IMPORT.finditer(text))
+    for i, m in enumerate(matches):
+        indent, node, template, path, has_with = m.groups()
+        cluster = ""
+        if indent:
+            before = [name for start, name in clusters if start < m.start()]
+            cluster = before[-1] if before else ""
+        overrides = []
+        if has_with:
+            # the "with" block goes until the next header (#NODE, #VARIABLES, ...)
+            rest = text[m.end():]
+            end = _HEADER.search(rest)
+            block = rest[:end.start()] if end else rest
+            overrides = [g.groups() for g in map(_ASSIGNMENT.match, _statements(block)) if g]
+        imports[(cluster, node)] = {"template": template, "file": _find_file(os.path.normpath(os.path.join(folder, path))),
+                                    "with": overrides}
+    return imports
+
+
+_HYPEREDGE = re.compile(r'^([ \t]*)#HYPEREDGE\s+(\w+)[ \t]*$', re.MULTILINE)
+_BLOCK_END = re.compile(r'^([ \t]*)#(NODE|HYPEREDGE|PARAMETERS|VARIABLES|CONSTRAINTS|OBJECTIVES)\b', re.MULTILINE)
+_CONSTRAINT = re.compile(r"^\s*(?:(\w+)\s*:(?!=))?\s*(.+?)\s*(==|<=|>=)\s*(.+?)\s*$", re.DOTALL)
+
+
+def read_hyperedges(model_file):
+    """
+    Hyperedges written in a model file (the ones imported from a template are skipped):
+        {(scope, name): {"parameters": [(name, expression)], "constraints": [(name, sense, lhs, rhs)]}}
+    scope is "" at the top level (INLAND_BALANCE...), otherwise the enclosing node (the
+    BALANCES hyperedge of INLAND has the scope "INLAND"). Unnamed constraints are numbered.
+    """
+    with open(model_file, "r", encoding="utf-8") as file:
+        text = _COMMENT.sub("", file.read())
+
+    clusters = [(m.start(), m.group(1)) for m in _CLUSTER.finditer(text)]
+    hyperedges = {}
+    for m in _HYPEREDGE.finditer(text):
+        indent, name = len(m.group(1).expandtabs()), m.group(2)
+        scope = ""
+        if indent:
+            before = [node for start, node in clusters if start < m.start()]
+            scope = before[-1] if before else ""
+        # the block goes until the next #NODE / #HYPEREDGE, or a section of the enclosing node
+        end = len(text)
+        for b in _BLOCK_END.finditer(text, m.end()):
+            if b.group(2) in ("NODE", "HYPEREDGE") or len(b.group(1).expandtabs()) < indent:
+                end = b.start()
+                break
+        sections = {}
+        parts = _HEADER.split(text[m.end():end])
+        for header, body in zip(parts[1::2], parts[2::2]):
+            sections[header] = sections.get(header, "") + body
+        parameters = [g.groups() for g in map(_ASSIGNMENT.match, _statements(sections.get("PARAMETERS", ""))) if g]
+        constraints = []
+        for i, statement in enumerate(_statements(sections.get("CONSTRAINTS", ""))):
+            c = _CONSTRAINT.match(statement)
+            if c:
+                constraints.append((c.group(1) or f"constraint_{i}", c.group(3), c.group(2), c.group(4)))
+        hyperedges[(scope, name)] = {"parameters": parameters, "constraints": constraints}
+    return hyperedges
+
+
+#%% Expressions
+
+_GLOBAL = re.compile(r"\bglobal\.(\w+)")
+_INDEXED_T = re.compile(r"\b(\w+)\[t\]")
+_NAME = re.compile(r"\b([A-Za-z_]\w*)\b")
+_FUNCTIONS = {"mod": np.mod, "exp": np.exp, "log": np.log, "sqrt": np.sqrt, "abs": np.abs}
+
+
+def compile_expression(expression):
+    """
+    Translate a GBOML expression into a compiled Python expression. Return (code, names,
+    hourly) or None when the expression cannot be evaluated outside GBOML (import of a file,
+    sum over a range, index other than [t], reference to another node...).
+    hourly: the expression uses x[t] and is summed over the horizon (objective terms)
+    """
+    expression = " ".join(expression.split()) # statements written on several lines
+    if re.search(r'\bimport\s*"', expression) or re.search(r"\b(for|where)\b", expression):
+        return None
+    hourly = bool(_INDEXED_T.search(expression))
+    python = _INDEXED_T.sub(r"\1", expression)
+    python = _GLOBAL.sub(r"_global_['\1']", python)
+    if "[" in python.replace("_global_[", "") or re.search(r"\b[A-Z]\w*\.\w", python):
+        return None
+    try:
+        code = compile(python, "<gboml>", "eval")
+    except SyntaxError:
+        return None
+    names = set(_NAME.findall(_GLOBAL.sub("", expression))) - set(_FUNCTIONS) - {"t"}
+    return code, names, hourly
+
+
+def _evaluate(compiled, namespace, global_parameters):
+    code, _, _ = compiled
+    return eval(code, {"__builtins__": {}, "_global_": global_parameters, **_FUNCTIONS}, namespace)
+
+
+def _stored_value(values):
+    values = np.asarray(values, dtype=float)
+    return float(values[0]) if values.size == 1 else values
+
+
+#%% Re-costing
+
+class Recoster:
+    """
+    Re-evaluate the objective terms of the nodes imported from the templates for new cost
+    assumptions, on the stored dispatch and capacities of a result.
+
+        recoster = Recoster(dictionary, "Models GBOML/scenario_methanol.txt")
+        recoster.recost({"BATTERIES": {"capex_power": 40}})                 # one point
+        recoster.sweep({"*": {"wacc": np.linspace(0.03, 0.1, 100)}})        # 100 points at once
+
+    overrides: {node or pattern or (cluster, node): {parameter: value or array}}
+    The objective terms which cannot be evaluated from the template (nodes written in the
+    model file, hyperedges, sums over ranges) keep their stored value.
+    """
+
+    def __init__(self, dictionary, model_file):
+        if isinstance(dictionary, pf.ResultModel):
+            dictionary = dictionary.dictionary
+        self.dictionary = dictionary
+        self.model_file = model_file
+        self.imports = read_model_imports(model_file)
+        self.global_parameters = {k: _stored_value(v) for k, v in dictionary["model"].get("global_parameters", {}).items()}
+        self.horizon = dictionary["model"].get("horizon", None) or self._guess_horizon()
+        self.nodes = {}
+        templates = {}
+
+        elements = dictionary["solution"]["elements"]
+        model_nodes = dictionary["model"]["nodes"]
+        for (cluster, node), info in self.imports.items():
+            if info["file"] not in templates:
+                templates[info["file"]] = read_template(info["file"]) if os.path.isfile(info["file"]) else {}
+            template = templates[info["file"]].get(info["template"])
+            solution, model = self._node_data(elements, model_nodes, cluster, node)
+            if template is None or solution is None:
+                continue
+
+            # Expressions: template, replaced by the "with" block of the model file
+            expressions = dict(template["parameters"])
+            expressions.update(dict(info["with"]))
+            parameters = [(name, compile_expression(expr)) for name, expr in expressions.items()]
+            stored = {k: _stored_value(v) for k, v in model.get("parameters", {}).items()}
+            variables = {}
+            for name, var in solution.get("variables", {}).items():
+                variables[name] = _stored_value(var["values"] if isinstance(var, dict) else var)
+            named = solution.get("objectives", {})
+            named = named.get("named", named)
+            objectives = [(name, sense, compile_expression(expr)) for name, sense, expr in template["objectives"]]
+
+            self.nodes[(cluster, node)] = {"parameters": parameters, "stored": stored, "variables": variables,
+                                           "objectives": objectives, "named": named}
+
+        self.stored_total = self._stored_objectives()
+
+    def _guess_horizon(self):
+        for _, _, _, values in pf.iter_variables(self.dictionary):
+            if len(values) > 1:
+                return len(values)
+        return pf.HOURS_PER_YEAR
+
+    @staticmethod
+    def _node_data(elements, model_nodes, cluster, node):
+        if cluster:
+            solution = elements.get(cluster, {}).get("sub_elements", {}).get(node)
+            model = model_nodes.get(cluster, {}).get("sub_nodes", {}).get(node, {})
+        else:
+            solution = elements.get(node)
+            model = model_nodes.get(node, {})
+        return solution, model
+
+    def _stored_objectives(self):
+        # Every named objective of the result (nodes, clusters), with the value of the solve
+        rows = []
+        for cluster, element in self.dictionary["solution"]["elements"].items():
+            named = element.get("objectives", {})
+            top_level = ("", cluster) in self.imports # node imported at the top level (HV_OFF_ZB...)
+            for name, value in named.get("named", {}).items() if isinstance(named, dict) else []:
+                rows.append(("", cluster, name, value) if top_level else (cluster, "", name, value))
+            for node, sub in element.get("sub_elements", {}).items():
+                named = sub.get("objectives", {})
+                for name, value in named.get("named", {}).items() if isinstance(named, dict) else []:
+                    rows.append((cluster, node, name, value))
+        return {(c, n, o): float(v) for c, n, o, v in rows if isinstance(v, (int, float))}
+
+    def _node_overrides(self, overrides, cluster, node):
+        values = {}
+        for key, params in (overrides or {}).items():
+            if isinstance(key, tuple):
+                match = key == (cluster, node)
+            else:
+                match = fnmatchcase(node, key) or (cluster == "" and key == node)
+            if match:
+                values.update(params)
+        return values
+
+    def _parameters(self, data, node_overrides, points):
+        # Parameters in the order of the template: overridden, re-evaluated when they depend
+        # on a changed parameter, otherwise the value stored in the result
+        namespace = {"T": self.horizon}
+        changed = set()
+        for name, compiled in data["parameters"]:
+            if name in node_overrides:
+                value = np.asarray(node_overrides[name], dtype=float)
+                namespace[name] = value.reshape(-1, 1) if value.ndim == 1 and points > 1 else value
+                changed.add(name)
+            elif compiled is not None and compiled[1] & changed:
+                try:
+                    namespace[name] = _evaluate(compiled, namespace, self.global_parameters)
+                    changed.add(name)
+                except Exception:
+                    namespace[name] = data["stored"].get(name, np.nan)
+            elif name in data["stored"]:
+                namespace[name] = data["stored"][name]
+            elif compiled is not None:
+                try:
+                    namespace[name] = _evaluate(compiled, namespace, self.global_parameters)
+                except Exception:
+                    pass
+        for name, value in data["stored"].items(): # parameters not in the template
+            namespace.setdefault(name, value)
+        return namespace, changed
+
+    def _evaluate_points(self, overrides=None):
+        points = max([np.size(v) for params in (overrides or {}).values() for v in params.values()] or [1])
+        results = {key: (np.full(points, value), "stored") for key, value in self.stored_total.items()}
+
+        for (cluster, node), data in self.nodes.items():
+            node_overrides = self._node_overrides(overrides, cluster, node)
+            namespace, changed = self._parameters(data, node_overrides, points)
+            namespace.update(data["variables"])
+            for name, _, compiled in data["objectives"]:
+                key = (cluster, node, name)
+                if compiled is None or key not in results or not (compiled[1] & changed):
+                    continue # unchanged term: stored value (same as the solve)
+                try:
+                    value = np.asarray(_evaluate(compiled, namespace, self.global_parameters), dtype=float)
+                except Exception as e:
+                    print(f"[Warning] {cluster}.{node}.{name} kept at its stored value ({e})")
+                    continue
+                if compiled[2]:
+                    value = value.sum(axis=-1)
+                elif value.ndim == 2:
+                    value = value[:, 0]
+                results[key] = (np.broadcast_to(value, (points,)).astype(float), "template")
+        return results, points
+
+    def recost(self, overrides=None):
+        """
+        One point: table (cluster, node, objective) with the stored and the re-costed value
+        of every named objective term [M€] and the method used ('template' or 'stored').
+        """
+        results, _ = self._evaluate_points(overrides)
+        table = pd.DataFrame([(c, n, o, self.stored_total[(c, n, o)], float(v[0]), method)
+                              for (c, n, o), (v, method) in results.items()],
+                             columns=["Cluster", "Node", "Objective", "Stored [M€]", "Recosted [M€]", "Method"])
+        table["Delta [M€]"] = table["Recosted [M€]"] - table["Stored [M€]"]
+        return table.set_index(["Cluster", "Node", "Objective"])
+
+    def sweep(self, overrides, by=None):
+        """
+        N points (overrides given as arrays of N values, the scalars are shared):
+        DataFrame (points x objective terms) of the re-costed values [M€], or the totals by
+        'Cluster' / 'Node' when by is given, with the total system cost in the last column.
+        """
+        results, points = self._evaluate_points(overrides)
+        keys = list(results)
+        matrix = np.array([results[k][0] for k in keys]).T
+        columns = pd.MultiIndex.from_tuples(keys, names=["Cluster", "Node", "Objective"])
+        table = pd.DataFrame(matrix, index=pd.RangeIndex(points, name="Point"), columns=columns)
+        if by is not None:
+            table = table.T.groupby(level=by).sum().T
+        table["Total [M€]"] = matrix.sum(axis=1)
+        return table
+
+    def report(self, overrides=None):
+        table = self.recost(overrides)
+        stored = table["Stored [M€]"].sum()
+        recosted = table["Recosted [M€]"].sum()
+        n_template = (table["Method"] == "template").sum()
+        print(colored(f"Stored objective   : {stored:.3f} M€", 'blue'))
+        print(colored(f"Re-costed objective: {recosted:.3f} M€ ({recosted - stored:+.3f} M€)", 'blue'))
+        print(f"{n_template} terms re-evaluated from the templates, {len(table) - n_template} kept at their stored value")
+        return table
+
+
+def recost(dictionary, model_file, overrides=None):
+    # Shortcut for one evaluation, see Recoster
+    return Recoster(dictionary, model_file).recost(overrides)
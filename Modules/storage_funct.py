@@ -0,0 +1,186 @@
+#%% Storage KPIs and rainflow cycle counting for all the storage nodes
+import numpy as np
+import pandas as pd
+from termcolor import colored
+import process_funct as pf
+
+# A storage is a sub node with a state of charge (state_of_charge or <commodity>_stored) and
+# <commodity>_charged / <commodity>_discharged series: BATTERIES, PUMPED_HYDRO, H2_STORAGE,
+# NG_STORAGE, LINEPACK, CO2/H2O storages and the liquid storages of the e-fuels.
+# The KPIs of all the storages of a result are column operations on (storages x T) matrices.
+
+ENERGY_CAPACITY = [("pre_installed_capacity_energy", "new_energy_capacity"),
+                   ("pre_installed_capacity_stock", "capacity_stock"),
+                   ("pre_installed_capacity", None)]                       # LINEPACK
+POWER_CAPACITY = [("pre_installed_capacity_power", "new_power_capacity"),
+                  ("pre_installed_capacity_flow", "capacity_flow")]
+DOD_BINS = [0, 0.2, 0.4, 0.6, 0.8, 1.0]
+
+
+#%% Rainflow cycle counting
+
+def reversals(series):
+    # Turning points of a series (the flat steps are removed first)
+    x = np.asarray(series, dtype=float)
+    if len(x) == 0:
+        return x
+    x = x[np.concatenate(([True], np.diff(x) != 0))]
+    if len(x) < 3:
+        return x
+    slope = np.sign(np.diff(x))
+    return x[np.concatenate(([True], slope[1:] != slope[:-1], [True]))]
+
+
+def rainflow(series, periodic='yes'):
+    """
+    Rainflow cycle count of a state of charge: (ranges, counts), count 1 for a full cycle and
+    0.5 for a half cycle of the residue.
+    A range which is not larger than its two neighbours closes a full cycle (four-point rule):
+    all those ranges are extracted at once, then the pass is repeated on the remaining
+    reversals. periodic = 'yes' (the model links the last hour to the first one): the series
+    is rotated to start and end at its maximum, so the residue is a single cycle.
+    """
+    x = np.asarray(series, dtype=float)
+    if periodic == 'yes' and len(x):
+        start = int(np.argmax(x))
+        x = np.concatenate((x[start:], x[:start], x[start:start + 1]))
+    r = reversals(x)
+    ranges, counts = [], []
+
+    while len(r) > 3:
+        span = np.abs(np.diff(r))
+        inner = np.zeros(len(span), dtype=bool)
+        inner[1:-1] = (span[1:-1] <= span[:-2]) & (span[1:-1] <= span[2:])
+        inner[1:] &= ~inner[:-1] # two adjacent ranges share a reversal: the first one is taken
+        k = np.flatnonzero(inner)
+        if len(k) == 0:
+            break
+        ranges.append(span[k])
+        counts.append(np.ones(len(k)))
+        remove = np.zeros(len(r), dtype=bool)
+        remove[k] = True
+        remove[k + 1] = True
+        r = r[~remove]
+
+    residue = np.abs(np.diff(r))
+    ranges.append(residue)
+    counts.append(np.full(len(residue), 0.5))
+    return np.concatenate(ranges), np.concatenate(counts)
+
+
+#%% Storage nodes
+
+def _first_value(values):
+    if values is None:
+        return None
+    values = values["values"] if isinstance(values, dict) else values
+    return float(np.ravel(values)[0]) if np.size(values) else 0.0
+
+
+def _capacity(parameters, variables, names):
+    # Preinstalled + added capacity of the first pair of names found in the node
+    for parameter, variable in names:
+        if parameter in parameters or (variable is not None and variable in variables):
+            return (_first_value(parameters.get(parameter)) or 0.0) + (_first_value(variables.get(variable)) or 0.0)
+    return np.nan
+
+
+def find_storages(dictionary, clusters=None):
+    # {(cluster, node): {"soc", "charged", "discharged" (series), "energy", "power" (capacities)}}
+    if isinstance(dictionary, pf.ResultModel):
+        dictionary = dictionary.dictionary
+    elements = dictionary["solution"]["elements"]
+    model_nodes = dictionary["model"]["nodes"]
+    storages = {}
+    for cluster, element in elements.items():
+        if (clusters is not None and cluster not in clusters) or "sub_elements" not in element:
+            continue
+        for node, sub in element["sub_elements"].items():
+            variables = sub.get("variables", {})
+            soc = "state_of_charge" if "state_of_charge" in variables else next((v for v in variables if v.endswith("_stored")), None)
+            charged = next((v for v in variables if v.endswith("_charged")), None)
+            discharged = next((v for v in variables if v.endswith("_discharged")), None)
+            if soc is None or charged is None or discharged is None:
+                continue
+            parameters = model_nodes.get(cluster, {}).get("sub_nodes", {}).get(node, {}).get("parameters", {})
+            series = lambda v: variables[v]["values"] if isinstance(variables[v], dict) else variables[v]
+            storages[(cluster, node)] = {"soc": series(soc), "charged": series(charged), "discharged": series(discharged),
+                                         "energy": _capacity(parameters, variables, ENERGY_CAPACITY),
+                                         "power": _capacity(parameters, variables, POWER_CAPACITY)}
+    return storages
+
+
+def _ratio(a, b):
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    return np.where(b > 0, a / np.where(b > 0, b, 1), np.nan)
+
+
+def storage_kpis(dictionary, clusters=None, periodic='yes', bins=DOD_BINS):
+    """
+    One row per storage node (Cluster, Node) of a result: capacities, energy charged /
+    discharged, yield, charge / discharge factors, active hours, equivalent cycles, depth of
+    discharge, power and energy solicitations, and the rainflow cycles (count, equivalent
+    full cycles, mean depth and number of cycles per depth of discharge bin).
+    """
+    storages = find_storages(dictionary, clusters)
+    index = pd.MultiIndex.from_tuples(list(storages), names=["Cluster", "Node"])
+    if not storages:
+        return pd.DataFrame(index=index)
+    S = np.array([s["soc"] for s in storages.values()], dtype=float)
+    C = np.array([s["charged"] for s in storages.values()], dtype=float)
+    D = np.array([s["discharged"] for s in storages.values()], dtype=float)
+    E = np.array([s["energy"] for s in storages.values()], dtype=float)
+    P = np.array([s["power"] for s in storages.values()], dtype=float)
+    charged, discharged = C.sum(axis=1), D.sum(axis=1)
+    swing = S.max(axis=1) - S.min(axis=1)
+
+    table = pd.DataFrame({
+        "Energy capacity": E,
+        "Power capacity": P,
+        "Charged": charged,
+        "Discharged": discharged,
+        "Yield [%]": 100 * _ratio(discharged, charged),
+        "Mean state of charge [%]": 100 * _ratio(S.mean(axis=1), E),
+        "Charge factor [%]": 100 * _ratio(C.mean(axis=1), C.max(axis=1)),
+        "Discharge factor [%]": 100 * _ratio(D.mean(axis=1), D.max(axis=1)),
+        "Charge hours": (C > 0).sum(axis=1),
+        "Discharge hours": (D > 0).sum(axis=1),
+        "Active hours": ((C > 0) | (D > 0)).sum(axis=1),
+        "Cycles (minimum)": _ratio(np.minimum(charged, discharged), E),
+        "Cycles (average)": _ratio(charged + discharged, 2 * E),
+        "Depth of discharge [%]": 100 * _ratio(swing, E),
+        "Charge power solicitation [%]": 100 * _ratio(C.max(axis=1), P),
+        "Discharge power solicitation [%]": 100 * _ratio(D.max(axis=1), P),
+    }, index=index)
+
+    # Rainflow: one count per storage, the depths are binned in one np.histogram each
+    rain_cycles, rain_efc, rain_dod, histograms = [], [], [], []
+    for soc, capacity in zip(S, E):
+        ranges, counts = rainflow(soc, periodic)
+        depth = ranges / capacity if capacity > 0 else np.full(len(ranges), np.nan)
+        rain_cycles.append(counts.sum())
+        rain_efc.append(np.sum(counts * depth) if capacity > 0 else np.nan)
+        rain_dod.append(100 * np.sum(counts * depth) / counts.sum() if capacity > 0 and counts.sum() else np.nan)
+        histograms.append(np.histogram(np.clip(depth, bins[0], bins[-1]), bins=bins, weights=counts)[0] if capacity > 0
+                          else np.full(len(bins) - 1, np.nan))
+    table["Rainflow cycles"] = rain_cycles
+    table["Rainflow equivalent cycles"] = rain_efc
+    table["Rainflow mean depth [%]"] = rain_dod
+    for i in range(len(bins) - 1):
+        table[f"Cycles DoD {100 * bins[i]:.0f}-{100 * bins[i + 1]:.0f}%"] = [h[i] for h in histograms]
+    return table
+
+
+def storage_kpi_tables(results, clusters=None, periodic='yes', bins=DOD_BINS, to_display='no'):
+    # storage_kpis of every scenario: {name: table} (a list is named "Scenario 1", ...)
+    if isinstance(results, pf.ResultModel) or pf._is_result_dictionary(results):
+        results = {"Scenario 1": results}
+    elif isinstance(results, (list, tuple)):
+        results = {f"Scenario {i+1}": r for i, r in enumerate(results)}
+    tables = {name: storage_kpis(result, clusters, periodic, bins) for name, result in results.items()}
+    if to_display == 'yes':
+        from IPython.display import display
+        for name, table in tables.items():
+            print(colored(f'\n=== Storage KPIs: {name} ===', 'black', 'on_cyan'))
+            display(table.round(2))
+    return tables